@@ -14,8 +14,28 @@ MODEL_NAME = "gemini-2.0-flash"
 MAX_RPM = 1600      # Actual limit 2000
 MAX_TPM = 3_200_000 # Actual limit 4,000,000
 
-# Lowering concurrency prevents "bursting" past the TPM limit
-MAX_CONCURRENT_CALLS = 15 
+# RPM/TPM are enforced by the rolling-window RateLimiter in llm_client.py,
+# so concurrency only needs to cover request latency, not protect the quota
+MAX_CONCURRENT_CALLS = 50  # Starting limit of the adaptive concurrency controller
+
+# =============================================================================
+# Adaptive Concurrency (AIMD on 429s and latency inflation, see src/core/concurrency.py)
+# =============================================================================
+MIN_CONCURRENT_CALLS = 4
+CONCURRENCY_CEILING = 200            # Upper bound of the limit (also sizes the HTTP pool)
+CONCURRENCY_BACKOFF = 0.5            # Limit multiplier on a 429
+CONCURRENCY_LATENCY_TOLERANCE = 1.5  # Smoothed latency / no-load baseline treated as congestion
+CONCURRENCY_LATENCY_BACKOFF = 0.9    # Limit multiplier on latency inflation
+
+# Prompt token estimate used to reserve TPM before usage_metadata is known
+CHARS_PER_TOKEN = 4.0
+
+# =============================================================================
+# HTTP Connection Pool (shared by all agents, sized to CONCURRENCY_CEILING)
+# =============================================================================
+HTTP2_ENABLED = True          # Used when the optional `h2` package is installed
+HTTP_KEEPALIVE_EXPIRY = 60.0  # Seconds an idle pooled connection is kept open
+WARMUP_CONNECTIONS = 4        # Connections opened at startup before the first real call
 
 # =============================================================================
 # Retry Configuration (More patient backoff)
@@ -24,18 +44,127 @@ MAX_RETRIES = 5
 # Starting at 2s gives the 60-second rolling window time to recover
 BASE_RETRY_DELAY = 2.0
 
+# =============================================================================
+# Request Hedging (--hedge): duplicate calls that outlive recent latency
+# =============================================================================
+HEDGE_PERCENTILE = 95.0     # A call still running after this percentile of recent latency is duplicated
+HEDGE_BUDGET_RATIO = 0.05   # Max hedges as a fraction of calls (caps the extra spend at ~5%)
+HEDGE_MIN_SAMPLES = 20      # Calls observed per agent before hedging starts
+HEDGE_MIN_DELAY_MS = 250.0  # Never hedge sooner than this
+LATENCY_WINDOW = 500        # Recent calls per agent used for latency percentiles
+
+# =============================================================================
+# Response Cache
+# =============================================================================
+# Modes: "write-through" (read + store), "read-only", "bypass"
+CACHE_MODE = "write-through"
+CACHE_DIR = ".cache/llm_responses"
+CACHE_MAX_BYTES = 512 * 1024 * 1024  # LRU-evicted beyond this size
+
+# =============================================================================
+# Context Caching (--context-cache): system prompt + document stored once per document
+# =============================================================================
+# Smallest cacheable prefix per model (provider minimum, system prompt included);
+# shorter prefixes are sent inline as usual
+CONTEXT_CACHE_MIN_TOKENS = {
+    "gemini-2.0-flash": 4096,
+    "gemini-2.5-flash": 1024,
+    "gemini-2.5-pro": 4096,
+    "default": 4096,
+}
+CONTEXT_CACHE_TTL_S = 300.0           # Server-side lifetime of a document cache (released earlier when the sample finishes)
+CONTEXT_CACHE_REFRESH_MARGIN_S = 30.0  # A cache this close to expiry is re-created instead of reused
+
 # =============================================================================
 # Benchmark Defaults
 # =============================================================================
 DEFAULT_SAMPLE_LIMIT = 1000
 STRATEGIES = ["fast", "advanced"]
+# Samples pulled from the DataLoader at once (backpressure keeps memory flat); enough
+# to keep the concurrency limit busy even at its ceiling
+MAX_IN_FLIGHT_SAMPLES = CONCURRENCY_CEILING
+JOURNAL_PATH = "results/journal.jsonl"  # Incremental per-sample results (used by --resume)
+TRACE_PATH = "results/trace.json"       # Chrome trace written by --trace (open in chrome://tracing or Perfetto)
+RESULT_STORE_DIR = "results/store"      # Parquet result store rebuilt from the journal at the end of a run
+RESULT_STORE_BATCH_ROWS = 1000          # Rows per record batch (Parquet row group) written to the store
+RESULT_EXPORTS = []                     # Derived exports written by default besides the store: "csv", "xlsx"
+
+# =============================================================================
+# Summarization Service (python -m src.service)
+# =============================================================================
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8080
+SERVICE_MAX_ACTIVE = MAX_CONCURRENT_CALLS  # Requests running the pipeline at once (coalesced duplicates not counted)
+SERVICE_MAX_QUEUE = 500                    # Requests waiting for a slot; beyond this, 503 right away
+SERVICE_QUEUE_TIMEOUT_S = 30.0             # A request still queued after this is rejected with 503
+SERVICE_RETRY_AFTER_S = 5                  # Retry-After header of 503 responses
+SERVICE_MAX_BODY_BYTES = 4 * 1024 * 1024   # Largest accepted request body
+
+# =============================================================================
+# Batch Mode (--batch): one bulk job per LLM round instead of interactive calls
+# =============================================================================
+BATCH_DIR = "results/batches"  # Job files and job-id manifests (used to re-attach after a crash)
+BATCH_POLL_INTERVAL = 30.0     # Seconds between job status checks
 
 # =============================================================================
 # Content Limits
 # =============================================================================
-MAX_CONTENT_CHARS = 8000  # Max chars to send to LLM per request
+MAX_CONTENT_TOKENS = 2000  # Token budget for page content in a single summarize call
+# Script-aware token estimate (Latin text uses CHARS_PER_TOKEN)
+NON_LATIN_CHARS_PER_TOKEN = 2.0  # Hebrew, Arabic, Cyrillic, Greek, ...
+CJK_CHARS_PER_TOKEN = 1.0        # Chinese, Japanese, Korean
+# Map-reduce for pages over the budget (--map-reduce): chunks are summarized concurrently, then merged
+MAP_REDUCE_CHUNK_TOKENS = 2000
+MAP_REDUCE_MAX_CHUNKS = 8  # Bounds cost and latency on very long pages; later chunks are dropped
 MAX_SUMMARY_CHARS = 1500  # Target max summary length
 
+# =============================================================================
+# Duplicate Detection (--dedup)
+# =============================================================================
+DEDUP_NUM_PERM = 64          # MinHash signature length
+DEDUP_BANDS = 16             # LSH bands (64 / 16 = 4 rows: candidates from ~0.5 Jaccard)
+DEDUP_SHINGLE_SIZE = 5       # Tokens per shingle
+DEDUP_NEAR_THRESHOLD = 0.85  # Estimated Jaccard similarity to reuse a summary
+
+# =============================================================================
+# Pre-judge Gate (--prejudge): local checks before the LLM judge (advanced strategy)
+# =============================================================================
+PREJUDGE_PASS_THRESHOLD = 0.70  # Score >= this: PASS without the LLM judge
+PREJUDGE_FAIL_THRESHOLD = 0.30  # Score <= this: FAIL and refine without the LLM judge
+PREJUDGE_AUDIT_RATE = 0.10      # Share of local decisions also sent to the LLM judge (agreement tracking)
+PREJUDGE_WEIGHTS = {
+    "rouge1_precision": 0.20,   # Summary words found in the source
+    "rouge2_precision": 0.30,   # Summary bigrams found in the source
+    "number_precision": 0.20,   # Summary numbers found in the source
+    "entity_precision": 0.15,   # Summary names found in the source
+    "entity_coverage": 0.15,    # Most frequent source names mentioned in the summary
+}
+
+# =============================================================================
+# Strategy Router (--strategy auto): advanced only where it is predicted to pay off
+# =============================================================================
+ROUTER_PATH = "results/router.json"  # Trained model written by `python -m src.router`
+ROUTER_QUALITY_MARGIN = 0.5          # Advanced "wins" a page when it beats fast by this many quality points (1-10)
+ROUTER_THRESHOLD = 0.5               # Route to advanced when the predicted win probability is at least this
+ROUTER_AUDIT_RATE = 0.10             # Share of fast-routed pages also run through advanced (measures quality lost)
+
+# =============================================================================
+# Reference Metrics (--metrics) and BERTScore Scoring Stage
+# =============================================================================
+SCORING_METRICS = ["rouge", "bert"]  # Scored against the baseline summary; "none" disables both
+BERT_BATCH_SIZE = 32       # Max summaries scored per RoBERTa forward pass
+BERT_BATCH_TIMEOUT = 0.05  # Seconds to wait for a batch to fill before flushing
+
+# =============================================================================
+# Pricing (USD per 1M tokens), used by src/metrics.py
+# =============================================================================
+BATCH_PRICE_FACTOR = 0.5  # Batch API requests are billed at 50% of the interactive price
+# "cached_input" is billed for prompt tokens served from a context cache, "cache_storage"
+# per 1M cached tokens per hour of cache lifetime
+PRICING = {
+    "gemini-2.0-flash": {"input": 0.10, "output": 0.40, "cached_input": 0.025, "cache_storage": 1.00},
+}
+
 # =============================================================================
 # Quality Score Weights (must sum to 1.0)
 # =============================================================================
@@ -1,41 +1,43 @@
-from typing import Tuple
+from typing import Optional, Tuple
+from src.core.backends import LlmBackend
 from src.core.llm_client import LlmAgent, LoopAgent
+from src.core.tracing import span
 from src.schema import SummaryOutput, JudgeFeedback
 from config.settings import MODEL_NAME
 
 class JudgeAgent:
-    def __init__(self, model_name: str = MODEL_NAME):
+    def __init__(self, model_name: str = MODEL_NAME, backend: Optional[LlmBackend] = None):
         with open("src/agents/judge.md", "r", encoding="utf-8") as f:
             system_prompt = f.read()
             
         self.agent = LlmAgent(
             model=model_name,
             system_prompt=system_prompt,
-            output_type=JudgeFeedback
+            output_type=JudgeFeedback,
+            backend=backend
+        )
+
+    @staticmethod
+    def _evaluate_prompt(summary: SummaryOutput) -> str:
+        return (
+            f"Summary Content:\n{summary.content}\n\n"
+            f"Metadata:\nLength: {summary.char_count} chars\n"
+            f"Strategy: {summary.strategy}"
         )
 
     async def async_evaluate(self, summary: SummaryOutput) -> JudgeFeedback:
         """
         Evaluates the summary asynchronously.
         """
-        prompt = (
-            f"Summary Content:\n{summary.content}\n\n"
-            f"Metadata:\nLength: {summary.char_count} chars\n"
-            f"Strategy: {summary.strategy}\n"
-            f"Latency: {summary.latency_ms}ms"
-        )
-        return await self.agent.async_run(prompt)
+        prompt = self._evaluate_prompt(summary)
+        with span("judge", strategy=summary.strategy):
+            return await self.agent.async_run(prompt)
 
     def evaluate(self, summary: SummaryOutput) -> JudgeFeedback:
         """
         Evaluates the summary.
         """
-        prompt = (
-            f"Summary Content:\n{summary.content}\n\n"
-            f"Metadata:\nLength: {summary.char_count} chars\n"
-            f"Strategy: {summary.strategy}\n"
-            f"Latency: {summary.latency_ms}ms"
-        )
+        prompt = self._evaluate_prompt(summary)
         return self.agent.run(prompt)
 
 class JudgeLoop:
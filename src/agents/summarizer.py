@@ -1,7 +1,13 @@
 import time
-from src.core.llm_client import LlmAgent
-from src.schema import RawContent, SummaryOutput, JudgeFeedback
-from config.settings import MODEL_NAME, MAX_CONTENT_CHARS
+import asyncio
+from typing import Callable, Dict, List, Optional
+from src.core.backends import LlmBackend
+from src.core.llm_client import LlmAgent, StreamingCall
+from src.core.preprocess import chunk_text, count_tokens, prepare_content, strip_boilerplate
+from src.core.tracing import span
+from src.schema import (CombinedSummaryOutput, CombinedSummaryResponse, RawContent, SummaryOutput, SummaryResponse,
+                        JudgeFeedback)
+from config.settings import MODEL_NAME, MAX_CONTENT_TOKENS, MAP_REDUCE_CHUNK_TOKENS, MAP_REDUCE_MAX_CHUNKS
 
 
 class SummarizerAgent:
@@ -10,37 +16,237 @@ class SummarizerAgent:
     Produces a summary directly from raw content.
     """
     
-    def __init__(self, model_name: str = MODEL_NAME):
+    def __init__(self, model_name: str = MODEL_NAME, backend: Optional[LlmBackend] = None,
+                 map_reduce: bool = False):
+        """
+        Args:
+            map_reduce: Summarize pages over MAX_CONTENT_TOKENS chunk by chunk (concurrently)
+                and merge the partial summaries, instead of truncating them.
+        """
+        self.map_reduce = map_reduce
         with open("src/agents/summarizer.md", "r", encoding="utf-8") as f:
             system_prompt = f.read()
             
         self.agent = LlmAgent(
             model=model_name,
             system_prompt=system_prompt,
-            output_type=SummaryOutput
+            output_type=SummaryResponse,
+            result_type=SummaryOutput,
+            backend=backend
+        )
+        # Both strategies in one call (see async_summarize_combined); same prompt, provider and client
+        self.combined_agent = LlmAgent(
+            model=model_name,
+            system_prompt=system_prompt,
+            output_type=CombinedSummaryResponse,
+            result_type=CombinedSummaryOutput,
+            backend=self.agent.backend
         )
 
-    def summarize(self, content: RawContent, strategy: str = "fast") -> SummaryOutput:
-        """
-        Generates a summary directly from raw content in a single LLM call.
-        """
-        start_time = time.time()
-        
+    # Prompts start with the page itself and end with the strategy-specific instructions,
+    # so the page prefix is identical across strategies and refine rounds (context-cacheable)
+    @staticmethod
+    def _document_prefix(content: RawContent) -> str:
+        return (
+            f"URL: {content.url}\n"
+            f"Title: {content.metadata.get('title', 'N/A')}\n\n"
+            f"Content:\n{prepare_content(content.text)}\n\n"
+        )
+
+    @staticmethod
+    def _summary_suffix(strategy: str) -> str:
+        suffix = f"Strategy: {strategy.upper()}\n"
+        if strategy == "advanced":
+            suffix += "\nUse your advanced chain-of-thought reasoning."
+        return suffix
+
+    @classmethod
+    def _summary_prompt(cls, content: RawContent, strategy: str) -> str:
+        return cls._document_prefix(content) + cls._summary_suffix(strategy)
+
+    @staticmethod
+    def _combined_suffix() -> str:
+        return (
+            f"Strategy: FAST and ADVANCED\n"
+            f"Write two independent summaries of this page in one response:\n"
+            f"- fast: a direct summary.\n"
+            f"- advanced: use your advanced chain-of-thought reasoning.\n"
+            f"Each follows the original constraints (max 1500 chars, same language as source)."
+        )
+
+    @staticmethod
+    def _refine_suffix(strategy: str, feedback: JudgeFeedback, original_summary: str) -> str:
+        return (
+            f"Strategy: {strategy.upper()}\n\n"
+            f"PREVIOUS SUMMARY:\n{original_summary}\n\n"
+            f"CRITIQUE (Why it failed):\n{feedback.critique}\n\n"
+            f"INSTRUCTIONS:\n"
+            f"Rewrite the summary to address the critique above. "
+            f"Ensure you still follow the original constraints (max 1500 chars, same language as source)."
+        )
+
+    @classmethod
+    def _refine_prompt(cls, content: RawContent, strategy: str, feedback: JudgeFeedback, original_summary: str) -> str:
+        return cls._document_prefix(content) + cls._refine_suffix(strategy, feedback, original_summary)
+
+    @staticmethod
+    def _chunk_prefix(content: RawContent, chunk: str, index: int, total: int) -> str:
+        return (
+            f"URL: {content.url}\n"
+            f"Title: {content.metadata.get('title', 'N/A')}\n\n"
+            f"Content (part {index + 1}/{total}):\n{chunk}\n\n"
+        )
+
+    @staticmethod
+    def _map_suffix(strategy: str, index: int, total: int) -> str:
+        return (
+            f"Strategy: {strategy.upper()}\n"
+            f"This is part {index + 1} of {total} of a long page. "
+            f"Summarize only this part; the partial summaries will be merged afterwards.\n"
+        )
+
+    @classmethod
+    def _map_prompt(cls, content: RawContent, strategy: str, chunk: str, index: int, total: int) -> str:
+        return cls._chunk_prefix(content, chunk, index, total) + cls._map_suffix(strategy, index, total)
+
+    @staticmethod
+    def _reduce_prompt(content: RawContent, strategy: str, partial_summaries: List[str]) -> str:
+        parts = "\n\n".join(f"Part {i + 1}:\n{text}" for i, text in enumerate(partial_summaries))
         prompt = (
             f"Strategy: {strategy.upper()}\n"
             f"URL: {content.url}\n"
             f"Title: {content.metadata.get('title', 'N/A')}\n\n"
-            f"Content:\n{content.text[:8000]}\n"  # Limit input to avoid token overflow
+            f"The page was too long to read at once. Below are summaries of its consecutive parts.\n"
+            f"Merge them into one summary of the whole page: keep the most important facts, "
+            f"drop repetition, and follow the original constraints (max 1500 chars, same language as source).\n\n"
+            f"Partial summaries:\n{parts}\n"
         )
-        
         if strategy == "advanced":
             prompt += "\nUse your advanced chain-of-thought reasoning."
-            
-        summary_output = self.agent.run(prompt)
+        return prompt
+
+    def _map_chunks(self, content: RawContent) -> List[str]:
+        """Chunks to map over, or [] when map-reduce is off or the page fits the budget."""
+        if not self.map_reduce:
+            return []
+        text = strip_boilerplate(content.text)
+        if count_tokens(text) <= MAX_CONTENT_TOKENS:
+            return []
+        return chunk_text(text, MAP_REDUCE_CHUNK_TOKENS)[:MAP_REDUCE_MAX_CHUNKS]
+
+    @staticmethod
+    def _add_map_usage(summary_output: SummaryOutput, partials: List[SummaryOutput]):
+        summary_output.tokens_input = (summary_output.tokens_input or 0) + sum(p.tokens_input or 0 for p in partials)
+        summary_output.tokens_output = (summary_output.tokens_output or 0) + sum(p.tokens_output or 0 for p in partials)
+        summary_output.tokens_cached = (summary_output.tokens_cached or 0) + sum(p.tokens_cached or 0 for p in partials)
+
+    @staticmethod
+    def _replayed_ms(summary_output: SummaryOutput, partials: List[SummaryOutput] = (), concurrent: bool = True) -> float:
+        """
+        Original latency of the calls answered from the response cache, which the wall clock
+        around a replay does not see (map calls count once when they ran concurrently).
+        """
+        map_ms = [p.cached_latency_ms or 0.0 for p in partials]
+        replayed = max(map_ms, default=0.0) if concurrent else sum(map_ms)
+        return replayed + (summary_output.cached_latency_ms or 0.0)
+
+    async def _async_map(self, content: RawContent, strategy: str, chunks: List[str]) -> List[SummaryOutput]:
+        """Summarizes all chunks concurrently (each call still takes its own concurrency slot)."""
+        with span("summarize.map", chunks=len(chunks)):
+            return await asyncio.gather(*(
+                self.agent.async_run(self._map_suffix(strategy, i, len(chunks)),
+                                     prefix=self._chunk_prefix(content, chunk, i, len(chunks)))
+                for i, chunk in enumerate(chunks)
+            ))
+
+    @staticmethod
+    def _split_tokens(total: Optional[int], weights: List[float]) -> List[int]:
+        """Splits a token count proportionally to `weights`, keeping the parts summing to the total."""
+        total = total or 0
+        if not sum(weights):
+            weights = [1] * len(weights)
+        parts = [int(total * weight / sum(weights)) for weight in weights]
+        parts[-1] += total - sum(parts)
+        return parts
+
+    def _split_combined(self, combined: CombinedSummaryOutput, latency_ms: float) -> Dict[str, SummaryOutput]:
+        """
+        One SummaryOutput per strategy from a combined response. The page was read once
+        for both, so input (and cached) tokens are split evenly; output tokens are split
+        by summary length. Both summaries were available after the one call's latency.
+        """
+        strategies = ("fast", "advanced")
+        drafts = [getattr(combined, strategy) for strategy in strategies]
+        tokens_input = self._split_tokens(combined.tokens_input, [1, 1])
+        tokens_cached = self._split_tokens(combined.tokens_cached, [1, 1])
+        tokens_output = self._split_tokens(combined.tokens_output, [len(draft.content) for draft in drafts])
+        return {
+            strategy: SummaryOutput(
+                content=draft.content,
+                strategy=strategy,
+                char_count=len(draft.content),
+                latency_ms=latency_ms,
+                tokens_input=tokens_input[i],
+                tokens_output=tokens_output[i],
+                tokens_cached=tokens_cached[i],
+                language=draft.language,
+            )
+            for i, (strategy, draft) in enumerate(zip(strategies, drafts))
+        }
+
+    async def async_summarize_combined(self, content: RawContent) -> Dict[str, SummaryOutput]:
+        """
+        Generates the fast and advanced summaries in a single LLM call (one prefill of the
+        page instead of two). Long pages in map-reduce mode fall back to one call per strategy.
+
+        Returns:
+            {"fast": SummaryOutput, "advanced": SummaryOutput}
+        """
+        if self._map_chunks(content):
+            fast, advanced = await asyncio.gather(
+                self.async_summarize(content, "fast"), self.async_summarize(content, "advanced")
+            )
+            return {"fast": fast, "advanced": advanced}
+
+        start_time = time.time()
+        with span("summarize", strategy="combined"):
+            combined = await self.combined_agent.async_run(self._combined_suffix(), prefix=self._document_prefix(content))
+        latency_ms = (time.time() - start_time) * 1000 + (combined.cached_latency_ms or 0.0)
+        return self._split_combined(combined, latency_ms)
+
+    async def release_document(self, content: RawContent):
+        """Deletes the context caches of this page's prompt prefixes once none of its calls needs them."""
+        cache = self.agent.context_cache
+        if cache is None:
+            return
+        chunks = self._map_chunks(content)
+        prefixes = [self._document_prefix(content)]
+        prefixes += [self._chunk_prefix(content, chunk, i, len(chunks)) for i, chunk in enumerate(chunks)]
+        await asyncio.gather(*(
+            cache.release(self.agent.model_name, self.agent.system_prompt, prefix) for prefix in prefixes
+        ))
+
+    def summarize(self, content: RawContent, strategy: str = "fast") -> SummaryOutput:
+        """
+        Generates a summary directly from raw content in a single LLM call.
+        """
+        start_time = time.time()
+        
+        partials = []
+        chunks = self._map_chunks(content)
+        if chunks:
+            partials = [
+                self.agent.run(self._map_prompt(content, strategy, chunk, i, len(chunks)))
+                for i, chunk in enumerate(chunks)
+            ]
+            summary_output = self.agent.run(self._reduce_prompt(content, strategy, [p.content for p in partials]))
+            self._add_map_usage(summary_output, partials)
+        else:
+            summary_output = self.agent.run(self._summary_prompt(content, strategy))
         
         # Overwrite with actual measurements
         end_time = time.time()
-        latency_ms = (end_time - start_time) * 1000
+        latency_ms = (end_time - start_time) * 1000 + self._replayed_ms(summary_output, partials, concurrent=False)
         
         summary_output.latency_ms = latency_ms
         summary_output.char_count = len(summary_output.content)
@@ -54,48 +260,85 @@ class SummarizerAgent:
         """
         start_time = time.time()
         
-        prompt = (
-            f"Strategy: {strategy.upper()}\n"
-            f"URL: {content.url}\n"
-            f"Title: {content.metadata.get('title', 'N/A')}\n\n"
-            f"Content:\n{content.text[:8000]}\n"
-        )
-        
-        if strategy == "advanced":
-            prompt += "\nUse your advanced chain-of-thought reasoning."
-            
-        summary_output = await self.agent.async_run(prompt)
+        partials = []
+        with span("summarize", strategy=strategy):
+            chunks = self._map_chunks(content)
+            if chunks:
+                partials = await self._async_map(content, strategy, chunks)
+                summary_output = await self.agent.async_run(
+                    self._reduce_prompt(content, strategy, [p.content for p in partials])
+                )
+                self._add_map_usage(summary_output, partials)
+            else:
+                summary_output = await self.agent.async_run(self._summary_suffix(strategy),
+                                                            prefix=self._document_prefix(content))
         
         end_time = time.time()
-        latency_ms = (end_time - start_time) * 1000
+        latency_ms = (end_time - start_time) * 1000 + self._replayed_ms(summary_output, partials)
         
         summary_output.latency_ms = latency_ms
         summary_output.char_count = len(summary_output.content)
         summary_output.strategy = strategy
         
         return summary_output
+
+    def stream_summary(self, content: RawContent, strategy: str = "fast") -> StreamingCall:
+        """
+        Starts a streaming summarization call.
+        Iterate the returned call for text deltas of the summary as they are generated.
+        """
+        return self.agent.async_stream(self._summary_suffix(strategy), field="content",
+                                       prefix=self._document_prefix(content))
+
+    async def async_summarize_stream(self, content: RawContent, strategy: str = "fast",
+                                     on_delta: Optional[Callable[[str], None]] = None) -> SummaryOutput:
+        """
+        Generates a summary with the streaming endpoint, recording time-to-first-token.
+        In map-reduce mode only the final merge call is streamed; the map phase counts
+        towards TTFT and latency.
+
+        Args:
+            on_delta: Optional callback receiving each summary text delta as it arrives.
+        """
+        map_ms = 0.0
+        partials = []
+        with span("summarize", strategy=strategy, stream=True):
+            chunks = self._map_chunks(content)
+            if chunks:
+                map_start = time.perf_counter()
+                partials = await self._async_map(content, strategy, chunks)
+                map_ms = (time.perf_counter() - map_start) * 1000 + max(
+                    (p.cached_latency_ms or 0.0 for p in partials), default=0.0)
+                call = self.agent.async_stream(
+                    self._reduce_prompt(content, strategy, [p.content for p in partials]), field="content"
+                )
+            else:
+                call = self.stream_summary(content, strategy)
+            async for delta in call:
+                if on_delta:
+                    on_delta(delta)
+            summary_output = await call.result()
+        self._add_map_usage(summary_output, partials)
+        
+        summary_output.latency_ms = call.latency_ms + map_ms
+        summary_output.ttft_ms = call.ttft_ms + map_ms if call.ttft_ms is not None else None
+        summary_output.char_count = len(summary_output.content)
+        summary_output.strategy = strategy
+        
+        return summary_output
+
     async def async_refine_summary(self, content: RawContent, strategy: str, feedback: JudgeFeedback, original_summary: str) -> SummaryOutput:
         """
         Refines a summary based on Judge feedback.
         """
         start_time = time.time()
         
-        prompt = (
-            f"Strategy: {strategy.upper()}\n"
-            f"URL: {content.url}\n"
-            f"Title: {content.metadata.get('title', 'N/A')}\n\n"
-            f"Original Content:\n{content.text[:8000]}\n\n"
-            f"PREVIOUS SUMMARY:\n{original_summary}\n\n"
-            f"CRITIQUE (Why it failed):\n{feedback.critique}\n\n"
-            f"INSTRUCTIONS:\n"
-            f"Rewrite the summary to address the critique above. "
-            f"Ensure you still follow the original constraints (max 1500 chars, same language as source)."
-        )
-        
-        summary_output = await self.agent.async_run(prompt)
+        with span("refine", strategy=strategy):
+            summary_output = await self.agent.async_run(self._refine_suffix(strategy, feedback, original_summary),
+                                                        prefix=self._document_prefix(content))
         
         end_time = time.time()
-        latency_ms = (end_time - start_time) * 1000
+        latency_ms = (end_time - start_time) * 1000 + self._replayed_ms(summary_output)
         
         summary_output.latency_ms = latency_ms
         summary_output.char_count = len(summary_output.content)
@@ -109,22 +352,12 @@ class SummarizerAgent:
         """
         start_time = time.time()
         
-        prompt = (
-            f"Strategy: {strategy.upper()}\n"
-            f"URL: {content.url}\n"
-            f"Title: {content.metadata.get('title', 'N/A')}\n\n"
-            f"Original Content:\n{content.text[:8000]}\n\n"
-            f"PREVIOUS SUMMARY:\n{original_summary}\n\n"
-            f"CRITIQUE (Why it failed):\n{feedback.critique}\n\n"
-            f"INSTRUCTIONS:\n"
-            f"Rewrite the summary to address the critique above. "
-            f"Ensure you still follow the original constraints (max 1500 chars, same language as source)."
-        )
+        prompt = self._refine_prompt(content, strategy, feedback, original_summary)
         
         summary_output = self.agent.run(prompt)
         
         end_time = time.time()
-        latency_ms = (end_time - start_time) * 1000
+        latency_ms = (end_time - start_time) * 1000 + self._replayed_ms(summary_output)
         
         summary_output.latency_ms = latency_ms
         summary_output.char_count = len(summary_output.content)
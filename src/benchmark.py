@@ -1,266 +1,890 @@
 import argparse
-import csv
 import time
 import os
 import asyncio
 import warnings
-import pandas as pd
-from tqdm import tqdm
+from contextlib import redirect_stdout
 
-# Suppress BERTScore's RoBERTa warnings and use cached model
-os.environ["TOKENIZERS_PARALLELISM"] = "false"
-os.environ["HF_HUB_OFFLINE"] = "1"
-import transformers
-transformers.logging.set_verbosity_error()
-
-from config.settings import MAX_CONCURRENT_CALLS, STRATEGIES, DEFAULT_SAMPLE_LIMIT, WEIGHTS, MAX_SUMMARY_CHARS
+from config.settings import (
+    MAX_CONCURRENT_CALLS, CONCURRENCY_CEILING, MAX_CONTENT_TOKENS, MAX_IN_FLIGHT_SAMPLES, STRATEGIES, DEFAULT_SAMPLE_LIMIT, CACHE_MODE,
+    PREJUDGE_AUDIT_RATE, BATCH_POLL_INTERVAL, HEDGE_PERCENTILE, HEDGE_BUDGET_RATIO, TRACE_PATH, CONTEXT_CACHE_TTL_S,
+    SCORING_METRICS, JOURNAL_PATH, RESULT_EXPORTS, ROUTER_PATH, ROUTER_AUDIT_RATE
+)
 from src.data_loader import DataLoader
+from src.journal import ResultJournal
+from src.result_store import RESULT_COLUMNS, TEXT_COLUMNS, ResultStore
+from src.dedup import DedupIndex, SummaryReuse
 from src.agents.summarizer import SummarizerAgent
 from src.agents.judge import JudgeAgent
-from rouge_score import rouge_scorer
-try:
-    from bert_score import score as bert_score
-except ImportError:
-    bert_score = None
+from src.schema import JudgeFeedback, SummaryOutput
+from src.core.backends import FakeBackend
+from src.core.batch import GeminiBatchBackend, LocalBatchBackend, run_batch_round
+from src.core.cache import CACHE_MODES, get_response_cache
+from src.core.concurrency import get_concurrency_limiter
+from src.core.context_cache import ContextCacheManager
+from src.core.hedging import HedgePolicy, format_latency_report
+from src.core.llm_client import RateLimiter
+from src.metrics import cache_storage_usd, cost_usd, print_report, quality_score, round_results
+from src.loadtest import LoopLagMonitor, percentile, synthetic_samples
+from src.parallel import run_workers
+from src.core.prejudge import PreJudgeGate
+from src.core.tracing import get_tracer, span
+from src.core.scoring import BertScoringStage, bert_score_available
+from src.strategies import run_strategy
+from src.core.rouge import RougeLScorer
+from src.router import StrategyRouter
+
+# Derived exports of the result store (--export) and their column layout
+EXPORT_FORMATS = ("csv", "xlsx")
+EXPORT_COLUMNS = [
+    "sample", "url", "language", "latency_ms", "ttft_ms", "tokens_input", "tokens_output", "tokens_cached", "cost_usd", "char_count",
+    "judge_status", "judge_score", "judge_critique",
+    "rouge_l_f1", "bert_score_f1", "quality_score",
+    "summary_content", "baseline_summary",
+    "baseline_char_count",
+    "connect_ms", "tls_ms", "ttfb_ms", "connection_reused",
+    "duplicate_of", "dedup_kind",
+    "judge_source", "judge_llm_calls", "prejudge_decision", "prejudge_score", "batch", "generation",
+    "route", "route_probability"
+]
+
+async def score_summary(summary, reference, r_scorer, bert_stage=None):
+    """
+    Computes ROUGE-L and BERTScore F1 of a summary against the baseline reference
+    (0.0 for a metric whose scorer is disabled).
+    """
+    rouge_l = 0.0
+    bert_f1 = 0.0
+    
+    if reference:
+        if r_scorer:
+            with span("score.rouge"):
+                rouge_l = r_scorer.score(reference, summary.content).fmeasure
+        
+        if bert_stage:
+            try:
+                with span("score.bert"):
+                    bert_f1 = await bert_stage.score(summary.content, reference)
+            except Exception as e:
+                print(f"BERTScore error: {e}")
+                bert_f1 = -1.0
+
+    return rouge_l, bert_f1
+
+async def build_result(content, strategy, summary, feedback, r_scorer, bert_stage=None, judging=None, batch=False,
+                       generation=None):
+    """
+    Scores a summary against the sample's baseline and builds its result row.
+    `batch` marks rows produced through the Batch API (billed at BATCH_PRICE_FACTOR);
+    `generation` records whether the summary came from its own call ("separate") or
+    from one call for both strategies ("combined").
+    """
+    judging = judging or {}
+    verdict = judging.get("verdict")
+    reference = content.metadata.get("baseline_summary", "")
+    rouge_l, bert_f1 = await score_summary(summary, reference, r_scorer, bert_stage)
+    
+    # Raw values are journaled; quality and cost come from the shared metrics module
+    # so saved results can be re-scored offline (python -m src.metrics)
+    tokens_in = summary.tokens_input or 0
+    tokens_out = summary.tokens_output or 0
+    tokens_cached = summary.tokens_cached or 0
+    quality = float(quality_score(bert_f1, rouge_l, feedback.score_accuracy, summary.char_count))
+    cost = float(cost_usd(tokens_in, tokens_out, batch=batch, tokens_cached=tokens_cached))
+    
+    result = {
+        "url": content.url,
+        "latency_ms": summary.latency_ms,
+        "ttft_ms": summary.ttft_ms,
+        "tokens_input": tokens_in,
+        "tokens_output": tokens_out,
+        "tokens_cached": tokens_cached,
+        "cost_usd": cost,
+        "char_count": summary.char_count,
+        "judge_status": feedback.status,
+        "judge_score": feedback.score_accuracy,
+        "judge_critique": feedback.critique,
+        "rouge_l_f1": rouge_l,
+        "bert_score_f1": bert_f1,
+        "quality_score": quality,
+        "summary_content": summary.content,
+        "baseline_summary": reference,
+        "baseline_char_count": len(reference),
+        "strategy": strategy,
+        "language": summary.language or "unknown",
+        "connect_ms": summary.connect_ms,
+        "tls_ms": summary.tls_ms,
+        "ttfb_ms": summary.ttfb_ms,
+        "connection_reused": summary.connection_reused,
+        "judge_source": judging.get("source"),
+        "judge_llm_calls": judging.get("llm_calls", 0),
+        "prejudge_decision": verdict.decision if verdict else None,
+        "prejudge_score": verdict.score if verdict else None,
+        "batch": batch,
+        "generation": generation,
+    }
+    
+    print(f"  [{strategy.upper()}] Quality: {quality}/10, ROUGE: {round(rouge_l, 3)}, BERT: {round(bert_f1, 3)}, Latency: {int(round(summary.latency_ms))}ms")
+    return result
+
+async def process_strategy(content, strategy, summarizer, judge, r_scorer, bert_stage=None, stream=False, gate=None,
+                           summary=None):
+    """
+    Runs one strategy for a sample and builds its result row (None on failure).
+    `summary` is the strategy's output of a combined call, if one was made.
+    """
+    generation = "combined" if summary is not None else "separate"
+    try:
+        with span("strategy", strategy=strategy):
+            summary, feedback, judging = await run_strategy(content, strategy, summarizer, judge, stream, gate, summary)
+            return await build_result(content, strategy, summary, feedback, r_scorer, bert_stage, judging,
+                                      generation=generation)
+
+    except Exception as e_strat:
+        print(f"  [{strategy.upper()}] Failed: {e_strat}")
+        return None
 
-# Semaphore for rate limiting (from config)
-semaphore = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+async def reuse_strategy(content, strategy, original, r_scorer, bert_stage=None):
+    """
+    Builds the result row of a duplicate sample from its original's summary and
+    verdict, without any LLM call. Scores are recomputed against this sample's baseline.
+    """
+    try:
+        summary = SummaryOutput(
+            content=original["summary_content"],
+            strategy=strategy,
+            char_count=original["char_count"],
+            latency_ms=0.0,
+            language=original["language"],
+        )
+        feedback = JudgeFeedback(
+            status=original["judge_status"],
+            score_accuracy=original["judge_score"],
+            critique=original["judge_critique"],
+        )
+        with span("strategy", strategy=strategy, reused=True):
+            result = await build_result(content, strategy, summary, feedback, r_scorer, bert_stage)
+        result["duplicate_of"] = content.metadata["duplicate_of"]
+        result["dedup_kind"] = content.metadata["dedup_kind"]
+        return result
+
+    except Exception as e_strat:
+        print(f"  [{strategy.upper()}] Reuse failed: {e_strat}")
+        return None
+
+async def summarize_combined(content, summarizer):
+    """Both strategies' summaries from one LLM call, or {} (separate calls) if it fails."""
+    try:
+        return await summarizer.async_summarize_combined(content)
+    except Exception as e:
+        print(f"  [COMBINED] Failed, falling back to one call per strategy: {e}")
+        return {}
 
-async def process_sample(i, content, summarizer, judge, strategies, r_scorer):
+async def process_sample(i, content, summarizer, judge, strategies, r_scorer, bert_stage=None, stream=False,
+                         reused=None, gate=None, combined=False):
     """
     Process a single sample using the 2-Agent architecture:
     - Fast: Summarizer only (1 LLM call)
     - Advanced: Summarizer + Judge (2 LLM calls)
+    Strategies run concurrently, so fast scoring overlaps the advanced judge round.
+    Strategies found in `reused` (original results of a duplicate sample) make no LLM calls.
+    With `combined`, the fast and advanced summaries come from a single LLM call
+    (when both are still needed); judging and refining stay per strategy.
     """
     print(f"Processing sample {i+1}...")
-    results = []
+    reused = reused or {}
     
-    async with semaphore:
-        try:
-            reference = content.metadata.get("baseline_summary", "")
-            
-            for strategy in strategies:
-                try:
-                    # Single LLM call for summarization
-                    summary = await summarizer.async_summarize(content, strategy=strategy)
-                    
-                    # For "advanced" strategy, validate with Judge
-                    feedback = None
-                    if strategy == "advanced":
-                        feedback = await judge.async_evaluate(summary)
-                        # Simple retry if Judge fails (max 1 retry for speed)
-                        # Simple retry if Judge fails (max 1 retry for speed)
-                        if feedback.status == "FAIL":
-                            print(f"  [ADVANCED] Judge failed, retrying...")
-                            original_latency = summary.latency_ms
-                            original_tokens_input = summary.tokens_input
-                            original_tokens_output = summary.tokens_output
-                            summary = await summarizer.async_refine_summary(
-                                content=content, 
-                                strategy=strategy, 
-                                feedback=feedback, 
-                                original_summary=summary.content
-                            )
-                            summary.latency_ms += original_latency  # Accumulate latency
-                            # Accumulate tokens from failed attempt
-                            summary.tokens_input = (summary.tokens_input or 0) + (original_tokens_input or 0)
-                            summary.tokens_output = (summary.tokens_output or 0) + (original_tokens_output or 0)
-                            feedback = await judge.async_evaluate(summary)
-                    else:
-                        # For "fast", auto-pass (no Judge call)
-                        from src.schema import JudgeFeedback
-                        feedback = JudgeFeedback(
-                            status="PASS",
-                            score_accuracy=0.95,
-                            critique=None
-                        )
-                    
-                    # Calculate Metrics
-                    rouge_l = 0.0
-                    bert_f1 = 0.0
-                    
-                    if reference:
-                        scores = r_scorer.score(reference, summary.content)
-                        rouge_l = scores['rougeL'].fmeasure
-                        
-                        if bert_score:
-                            try:
-                                P, R, F1 = bert_score([summary.content], [reference], lang="en", verbose=False)
-                                bert_f1 = F1.mean().item()
-                            except Exception as e:
-                                print(f"BERTScore error: {e}")
-                                bert_f1 = -1.0
-                    
-                    # Rounding
-                    latency_rounded = int(round(summary.latency_ms))
-                    rouge_rounded = round(rouge_l, 3)
-                    bert_rounded = round(bert_f1, 3)
-                    
-                    # Composite Quality Score (1-10) - weights from config
-                    # BERTScore: Typically 0.7-0.95, normalize to 0-1 scale (0.7 = 0, 0.95 = 1)
-                    bert_normalized = max(0, min(1, (bert_f1 - 0.70) / 0.25)) if bert_f1 > 0 else 0.5
-                    # ROUGE-L: Typically 0.1-0.4 for abstractive, normalize (0.1 = 0, 0.4 = 1)
-                    rouge_normalized = max(0, min(1, (rouge_l - 0.10) / 0.30))
-                    # Judge score: Already 0-1
-                    judge_normalized = feedback.score_accuracy
-                    # Length compliance: 1 if under MAX_SUMMARY_CHARS, penalize if over
-                    length_score = 1.0 if summary.char_count <= MAX_SUMMARY_CHARS else max(0, 1 - (summary.char_count - MAX_SUMMARY_CHARS) / 500)
-                    
-                    composite_raw = (
-                        bert_normalized * WEIGHTS["bert_score"] +
-                        judge_normalized * WEIGHTS["judge_score"] +
-                        length_score * WEIGHTS["length_compliance"] +
-                        rouge_normalized * WEIGHTS["rouge_l"]
-                    )
-                    # Scale to 1-10
-                    quality_score = round(1 + composite_raw * 9, 1)
-
-                    # Cost Calculation (Gemini 2.0 Flash)
-                    # Input: $0.10 / 1M tokens
-                    # Output: $0.40 / 1M tokens
-                    tokens_in = summary.tokens_input or 0
-                    tokens_out = summary.tokens_output or 0
-                    cost_usd = (tokens_in / 1_000_000 * 0.10) + (tokens_out / 1_000_000 * 0.40)
-                    
-                    
-                    result = {
-                        "url": content.url,
-                        "latency_ms": latency_rounded,
-                        "tokens_input": tokens_in,
-                        "tokens_output": tokens_out,
-                        "cost_usd": round(cost_usd, 6),
-                        "char_count": summary.char_count,
-                        "judge_status": feedback.status,
-                        "judge_score": feedback.score_accuracy,
-                        "judge_critique": feedback.critique,
-                        "rouge_l_f1": rouge_rounded,
-                        "bert_score_f1": bert_rounded,
-                        "quality_score": quality_score,
-                        "summary_content": summary.content,
-                        "baseline_summary": reference,
-                        "baseline_char_count": len(reference),
-                        "strategy": strategy,
-                        "language": summary.language or "unknown"
-                    }
-                    results.append(result)
-                    
-                    print(f"  [{strategy.upper()}] Quality: {quality_score}/10, ROUGE: {rouge_rounded}, BERT: {bert_rounded}, Latency: {latency_rounded}ms")
-
-                except Exception as e_strat:
-                    print(f"  [{strategy.upper()}] Failed: {e_strat}")
-        
-        except Exception as e_sample:
-            print(f"Sample {i+1} Failed Completely: {e_sample}")
+    try:
+        with span("sample", sample=i, url=content.url):
+            generate = [strategy for strategy in strategies if strategy not in reused]
+            summaries = {}
+            if combined and sorted(generate) == ["advanced", "fast"]:
+                summaries = await summarize_combined(content, summarizer)
+            outcomes = await asyncio.gather(*(
+                reuse_strategy(content, strategy, reused[strategy], r_scorer, bert_stage) if strategy in reused
+                else process_strategy(content, strategy, summarizer, judge, r_scorer, bert_stage, stream, gate,
+                                      summaries.get(strategy))
+                for strategy in strategies
+            ))
+    except Exception as e_sample:
+        print(f"Sample {i+1} Failed Completely: {e_sample}")
+        return []
+    finally:
+        # Every strategy and refine round of this page is done: free its context caches
+        await summarizer.release_document(content)
             
-    return results
+    return [result for result in outcomes if result is not None]
 
-async def main_async():
-    parser = argparse.ArgumentParser(description="Tavily Summarization Benchmark (2-Agent Architecture)")
-    parser.add_argument("--limit", type=int, default=DEFAULT_SAMPLE_LIMIT, help="Number of samples to process")
-    args = parser.parse_args()
+async def run_bounded(items, worker_fn, max_in_flight):
+    """
+    Consumes an async stream with backpressure: at most `max_in_flight` items are
+    pulled from `items` and processed by `worker_fn` at any time.
+    """
+    queue = asyncio.Queue(maxsize=max_in_flight)
 
-    print(f"Starting async benchmark with limit: {args.limit}")
-    print(f"Architecture: 2-Agent (Summarizer + optional Judge)")
-    print(f"Max Concurrent Calls: {MAX_CONCURRENT_CALLS}")
+    async def producer():
+        async for item in items:
+            await queue.put(item)  # Blocks while all workers are busy
+        for _ in range(max_in_flight):
+            await queue.put(None)
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            await worker_fn(item)
+
+    await asyncio.gather(producer(), *(worker() for _ in range(max_in_flight)))
+
+def parse_choices(text, choices):
+    """Parses a comma-separated subset of `choices`, or "none" (the empty set)."""
+    selected = {name.strip() for name in text.split(",") if name.strip()}
+    if selected == {"none"}:
+        return set()
+    unknown = selected - set(choices)
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown value(s) {', '.join(sorted(unknown))}; choose from {','.join(choices)} or none"
+        )
+    return selected
+
+def parse_metrics(text):
+    """Parses --metrics: a comma-separated subset of rouge,bert, or "none"."""
+    return parse_choices(text, SCORING_METRICS)
+
+def parse_exports(text):
+    """Parses --export: a comma-separated subset of csv,xlsx, or "none"."""
+    return parse_choices(text, EXPORT_FORMATS)
+
+def build_scorers(metrics):
+    """
+    Creates the scorers selected with --metrics: (RougeLScorer or None, started
+    BertScoringStage or None). BERTScore is skipped when bert_score is not installed.
+    Must be called from a running event loop.
+    """
+    r_scorer = RougeLScorer() if "rouge" in metrics else None
+    bert_stage = None
+    if "bert" in metrics:
+        if bert_score_available():
+            bert_stage = BertScoringStage()
+            bert_stage.start()
+        else:
+            print("BERTScore disabled: bert_score is not installed")
+    return r_scorer, bert_stage
+
+def llm_agents(summarizer, judge):
+    """Every LlmAgent the pipeline calls (for shared limiters, hedging and context caching)."""
+    return summarizer.agent, summarizer.combined_agent, judge.agent
+
+def use_combined(generation, i):
+    """Whether sample `i` gets combined generation (`compare` alternates, for an A/B comparison)."""
+    return generation == "combined" or (generation == "compare" and i % 2 == 0)
+
+def enable_hedging(agents, percentile, budget_ratio):
+    """Gives each agent its own hedge policy (thresholds follow each agent's own latency)."""
+    for agent in agents:
+        agent.hedge = HedgePolicy(percentile=percentile, budget_ratio=budget_ratio)
+
+def enable_context_cache(agents, backend, ttl_s=CONTEXT_CACHE_TTL_S):
+    """Gives the agents one shared context cache manager (caches are created on `backend`)."""
+    manager = ContextCacheManager(backend, ttl_s=ttl_s)
+    for agent in agents:
+        agent.context_cache = manager
+    return manager
+
+def print_context_cache_report(manager):
+    stats = manager.stats()
+    print(f"\nContext cache: {stats['created']} created, {stats['reused']} reuses, "
+          f"{stats['skipped']} prefixes below the provider minimum (sent inline), {stats['failed']} failed; "
+          f"storage {stats['token_hours']:.2f} token-hours (~${cache_storage_usd(stats['token_hours']):.6f})")
+
+def configure_concurrency(fixed=None, workers=1):
+    """
+    Pins the process-wide concurrency limit to `fixed` calls, or leaves it adaptive.
+    With several worker processes, each gets an equal share of the limits.
+    """
+    limiter = get_concurrency_limiter()
+    if fixed:
+        limiter.min_limit = limiter.max_limit = max(1, fixed // workers)
+        limiter.limit = float(limiter.max_limit)
+    elif workers > 1:
+        limiter.max_limit = max(limiter.min_limit, CONCURRENCY_CEILING // workers)
+        limiter.limit = float(max(limiter.min_limit, MAX_CONCURRENT_CALLS // workers))
+        limiter.lowest = limiter.highest = limiter.limit
+    return limiter
+
+def describe_concurrency(limiter):
+    if not limiter.adaptive:
+        return f"fixed at {int(limiter.limit)} calls"
+    return f"adaptive (start {int(limiter.limit)}, range {limiter.min_limit}-{limiter.max_limit})"
+
+def print_concurrency_report(limiter):
+    stats = limiter.stats()
+    if not limiter.adaptive:
+        print(f"\nConcurrency limit: fixed at {int(stats['limit'])}")
+        return
+    print(f"\nConcurrency limit: final {stats['limit']:.0f} (range {stats['lowest']:.0f}-{stats['highest']:.0f}), "
+          f"cut {stats['rate_limit_cuts']}x on 429s and {stats['latency_cuts']}x on latency inflation")
+
+def print_dedup_report(dedup):
+    print(f"Dedup index: {sum(dedup.hits.values())}/{dedup.seen} duplicates ({dedup.hit_rate:.1%}): "
+          f"{dedup.hits['url']} same URL, {dedup.hits['exact']} exact, {dedup.hits['near']} near")
+
+def print_latency_report(summarizer, judge):
+    print("\nPer-agent call latency:")
+    agents = [("Summarizer", summarizer.agent), ("Judge", judge.agent)]
+    if summarizer.combined_agent.latency.count:
+        agents.insert(1, ("Summarizer (combined)", summarizer.combined_agent))
+    for name, agent in agents:
+        for line in format_latency_report(name, agent.latency, agent.hedge):
+            print(f"  {line}")
+
+def finish_trace(path, monitor):
+    """Prints the per-stage latency breakdown and writes the Chrome trace."""
+    tracer = get_tracer()
+    print("\nPer-stage latency breakdown:")
+    for line in tracer.format_breakdown():
+        print(f"  {line}")
+    print(f"  Event-loop lag p50/p99/max: {percentile(monitor.lags_ms, 50):.1f} / "
+          f"{percentile(monitor.lags_ms, 99):.1f} / {max(monitor.lags_ms, default=0.0):.1f} ms")
+    try:
+        tracer.export(path)
+        print(f"Trace written to {path} ({len(tracer.spans)} spans; open in chrome://tracing or ui.perfetto.dev)")
+    except Exception as e:
+        print(f"Error writing trace: {e}")
+
+async def run_load_test(args):
+    """
+    Drives the full pipeline against the offline FakeBackend and reports throughput,
+    per-sample latency percentiles and event-loop lag. Uses no network or quota.
+    """
+    backend = FakeBackend(
+        latency_ms=args.fake_latency_ms,
+        rate_limit_rate=args.fake_429_rate,
+        capacity=args.fake_capacity,
+        judge_pass_rate=args.fake_pass_rate,
+        seed=args.seed,
+        prefill_ms_per_1k_tokens=args.fake_prefill_ms,
+    )
+    summarizer = SummarizerAgent(backend=backend, map_reduce=args.map_reduce)
+    judge = JudgeAgent(backend=backend)
+    gate = PreJudgeGate(audit_rate=args.prejudge_audit) if args.prejudge else None
+    if args.hedge:
+        enable_hedging(llm_agents(summarizer, judge), args.hedge_percentile, args.hedge_budget)
+    context_cache = enable_context_cache(llm_agents(summarizer, judge), backend) if args.context_cache else None
+    # Measure the pipeline itself: no quota throttling and no cache hits
+    unlimited = RateLimiter(max_rpm=10**9, max_tpm=10**15)
+    for agent in llm_agents(summarizer, judge):
+        agent.rate_limiter = unlimited
+    get_response_cache().mode = "bypass"
+    r_scorer, _ = build_scorers(args.metrics - {"bert"})  # BERTScore would measure the model, not the pipeline
+
+    limiter = configure_concurrency(args.fixed_concurrency)
+
+    print(f"Load test: {args.loadtest} synthetic samples, median call latency {args.fake_latency_ms}ms, "
+          f"429 rate {args.fake_429_rate}, judge pass rate {args.fake_pass_rate}, "
+          f"server capacity {args.fake_capacity or 'unlimited'}, prefill {args.fake_prefill_ms}ms/1k tokens")
+    print(f"Concurrency: {describe_concurrency(limiter)}")
+    print(f"Context cache: {'on' if context_cache else 'off'}")
+    print(f"Summary generation: {args.generation}")
+
+    sample_latencies_ms = []
+    latencies_by_generation = {"separate": [], "combined": []}
+    ttfts_ms = []
+    failed_strategies = 0
+    tokens = {"input": 0, "cached": 0}
+
+    async def samples():
+        for i, content in enumerate(synthetic_samples(args.loadtest, seed=args.seed)):
+            yield i, content
+
+    async def handle(item):
+        nonlocal failed_strategies
+        i, content = item
+        sample_start = time.perf_counter()
+        combined = use_combined(args.generation, i)
+        results = await process_sample(i, content, summarizer, judge, STRATEGIES, r_scorer, stream=args.stream,
+                                       gate=gate, combined=combined)
+        sample_latencies_ms.append((time.perf_counter() - sample_start) * 1000)
+        latencies_by_generation["combined" if combined else "separate"].append(sample_latencies_ms[-1])
+        failed_strategies += len(STRATEGIES) - len(results)
+        tokens["input"] += sum(result["tokens_input"] for result in results)
+        tokens["cached"] += sum(result["tokens_cached"] for result in results)
+        ttfts_ms.extend(result["ttft_ms"] for result in results if result["ttft_ms"] is not None)
+        pbar.set_postfix_str(limiter.describe(), refresh=False)
+        pbar.update(1)
+
+    get_tracer().enabled = bool(args.trace)
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    from tqdm import tqdm
+    # Per-sample prints would dominate the measurement at 100k samples
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        with tqdm(total=args.loadtest, desc="Load test", unit="sample") as pbar:
+            await run_bounded(samples(), handle, MAX_IN_FLIGHT_SAMPLES)
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+    if context_cache:
+        await context_cache.close()
+
+    print("\nLoad test report (FakeBackend)")
+    print(f"  Samples: {args.loadtest} in {elapsed:.1f}s")
+    print(f"  Throughput: {args.loadtest / elapsed:.1f} samples/s, {backend.calls / elapsed:.1f} LLM calls/s")
+    print(f"  Sample latency p50/p95/p99: {percentile(sample_latencies_ms, 50):.0f} / "
+          f"{percentile(sample_latencies_ms, 95):.0f} / {percentile(sample_latencies_ms, 99):.0f} ms")
+    if args.generation == "compare":
+        for generation, latencies in latencies_by_generation.items():
+            print(f"    {generation} generation ({len(latencies)} samples) p50/p95: "
+                  f"{percentile(latencies, 50):.0f} / {percentile(latencies, 95):.0f} ms")
+    if ttfts_ms:
+        print(f"  Summary TTFT p50/p95/p99: {percentile(ttfts_ms, 50):.0f} / "
+              f"{percentile(ttfts_ms, 95):.0f} / {percentile(ttfts_ms, 99):.0f} ms")
+    print(f"  Event-loop lag p50/p99/max: {percentile(monitor.lags_ms, 50):.1f} / "
+          f"{percentile(monitor.lags_ms, 99):.1f} / {max(monitor.lags_ms, default=0.0):.1f} ms")
+    print(f"  LLM calls: {backend.calls} ({backend.rate_limited} injected 429s), failed strategies: {failed_strategies}")
+    print(f"  Input tokens: {tokens['input']} ({tokens['cached']} from context caches), "
+          f"input cost ${float(cost_usd(tokens['input'], 0, tokens_cached=tokens['cached'])):.4f}")
+    if context_cache:
+        print_context_cache_report(context_cache)
+    print_concurrency_report(limiter)
+    print_latency_report(summarizer, judge)
+    if args.trace:
+        finish_trace(args.trace, monitor)
+
+async def run_batch(args):
+    """
+    Offline bulk mode: every LLM round is submitted as one batch job instead of
+    thousands of interactive calls. Rounds: summaries -> judge (advanced) ->
+    refine (judge FAILs) -> judge again. The pre-judge gate, when enabled, decides
+    clear cases locally so they never enter a judge batch.
+    Row latencies are the batch turnaround of the rounds a row went through.
+    """
+    if args.batch_backend == "local":
+        fake = FakeBackend(latency_ms=args.fake_latency_ms, rate_limit_rate=args.fake_429_rate,
+                           judge_pass_rate=args.fake_pass_rate, seed=args.seed)
+        batch_backend = LocalBatchBackend(fake)
+        summarizer = SummarizerAgent(backend=fake)
+        judge = JudgeAgent(backend=fake)
+    else:
+        try:
+            batch_backend = GeminiBatchBackend()
+            summarizer = SummarizerAgent()
+            judge = JudgeAgent()
+        except Exception as e:
+            print(f"Error initializing batch mode: {e}")
+            return
+
+    response_cache = get_response_cache()
+    response_cache.mode = args.cache
+    gate = PreJudgeGate(audit_rate=args.prejudge_audit) if args.prejudge else None
+    r_scorer, bert_stage = build_scorers(args.metrics)
+
+    journal = ResultJournal()
+    if args.resume:
+        completed = journal.completed()
+        print(f"Resuming: {len(completed)} samples already journaled")
+    else:
+        journal.reset()
+        completed = {}
+
+    # Batch jobs need every request up front: (sample index, strategy) -> state
+    contents = {}
+    tasks = {}
+    for i, content in enumerate(DataLoader(args.data).load_samples(limit=args.limit)):
+        for strategy in STRATEGIES:
+            if strategy not in completed.get(i, ()):
+                contents[i] = content
+                tasks[f"{i}:{strategy}"] = {"strategy": strategy, "summary": None, "feedback": None, "latency_ms": 0.0,
+                                            "judging": {"verdict": None, "llm_calls": 0, "source": None}}
+    print(f"Batch mode ({args.batch_backend}): {len(contents)} samples, {len(tasks)} (sample, strategy) pairs")
+
+    def sample_of(key):
+        return contents[int(key.split(":")[0])]
+
+    async def batch_round(agent, prompts, name):
+        start = time.perf_counter()
+        outputs = await run_batch_round(agent, prompts, batch_backend, name, poll_interval=args.batch_poll_interval)
+        turnaround_ms = (time.perf_counter() - start) * 1000
+        for key, output in outputs.items():
+            tasks[key]["latency_ms"] += turnaround_ms
+            if isinstance(output, Exception):
+                print(f"  [{tasks[key]['strategy'].upper()}] {name} failed for {key}: {output}")
+                tasks.pop(key)
+        return {key: output for key, output in outputs.items() if key in tasks}
+
+    def set_summary(key, summary):
+        task = tasks[key]
+        previous = task["summary"]
+        summary.strategy = task["strategy"]
+        summary.char_count = len(summary.content)
+        if previous:
+            # Accumulate tokens from the failed attempt
+            summary.tokens_input = (summary.tokens_input or 0) + (previous.tokens_input or 0)
+            summary.tokens_output = (summary.tokens_output or 0) + (previous.tokens_output or 0)
+        task["summary"] = summary
+
+    async def judge_round(keys, name):
+        """Judges the given advanced tasks: locally through the gate where clear, else in one batch."""
+        prompts = {}
+        for key in keys:
+            task = tasks[key]
+            verdict = gate.evaluate(task["summary"], sample_of(key).text) if gate else None
+            task["judging"]["verdict"] = verdict
+            if verdict and verdict.decision != "UNSURE" and not gate.should_audit(task["summary"]):
+                task["feedback"] = verdict.to_feedback()
+                task["judging"]["source"] = "gate"
+            else:
+                # Latency is set once all rounds are done; judge prompts only hold fields that are
+                # the same on a rerun, so an interrupted round re-attaches to its submitted job
+                prompts[key] = judge._evaluate_prompt(task["summary"])
+        for key, feedback in (await batch_round(judge.agent, prompts, name)).items():
+            tasks[key]["feedback"] = feedback
+            tasks[key]["judging"]["source"] = "llm"
+            tasks[key]["judging"]["llm_calls"] += 1
 
+    # Round 1: summaries for every pair
+    summaries = await batch_round(summarizer.agent, {
+        key: summarizer._summary_prompt(sample_of(key), task["strategy"]) for key, task in tasks.items()
+    }, "summarize")
+    for key in list(tasks):
+        if key not in summaries:
+            tasks.pop(key, None)
+            continue
+        set_summary(key, summaries[key])
+        if tasks[key]["strategy"] != "advanced":
+            # For "fast", auto-pass (no Judge call)
+            tasks[key]["feedback"] = JudgeFeedback(status="PASS", score_accuracy=0.95, critique=None)
+
+    # Round 2: judge advanced summaries
+    await judge_round([key for key, task in tasks.items() if task["strategy"] == "advanced"], "judge")
+
+    # Round 3: refine failures, then judge the refined summaries (round 4)
+    failed = [key for key, task in tasks.items() if task["feedback"] and task["feedback"].status == "FAIL"]
+    if failed:
+        refined = await batch_round(summarizer.agent, {
+            key: summarizer._refine_prompt(sample_of(key), tasks[key]["strategy"], tasks[key]["feedback"],
+                                           tasks[key]["summary"].content)
+            for key in failed
+        }, "refine")
+        for key, summary in refined.items():
+            set_summary(key, summary)
+        await judge_round(list(refined), "rejudge")
+
+    # Score and journal per sample
+    by_sample = {}
+    for key, task in tasks.items():
+        if task["feedback"] is None:
+            continue
+        task["summary"].latency_ms = task["latency_ms"]
+        content = sample_of(key)
+        result = await build_result(content, task["strategy"], task["summary"], task["feedback"], r_scorer,
+                                    bert_stage, task["judging"], batch=True)
+        result["sample"] = int(key.split(":")[0])
+        by_sample.setdefault(result["sample"], []).append(result)
+    for results in by_sample.values():
+        journal.append(results)
+
+    if bert_stage:
+        await bert_stage.close()
+    save_results(journal.iter_results(), STRATEGIES, args.export)
+
+async def run_pipeline(args, completed, emit, progress, samples=None, rate_limiter=None):
+    """
+    Summarizes, judges and scores the dataset samples (or the given share of them),
+    then prints the run's cache, concurrency, latency and trace reports.
+
+    Args:
+        args: Parsed command-line arguments.
+        completed: Sample index -> strategies already journaled, which are skipped.
+        emit: Called with the result rows of each finished sample.
+        progress: Called with the concurrency limiter once per sample (finished or skipped).
+        samples: Async iterable of (dataset index, RawContent) to run instead of loading
+            `args.data` (e.g. a worker's share, already deduplicated by the parent).
+        rate_limiter: RPM/TPM limiter to use instead of the process-wide one (e.g. shared by workers).
+    """
     # Initialize agents (only 2 now!)
     try:
-        summarizer = SummarizerAgent()
+        summarizer = SummarizerAgent(map_reduce=args.map_reduce)
         judge = JudgeAgent()
     except Exception as e:
         print(f"Error initializing agents: {e}")
         return
+    if rate_limiter is not None:
+        for agent in llm_agents(summarizer, judge):
+            agent.rate_limiter = rate_limiter
+    if args.hedge:
+        enable_hedging(llm_agents(summarizer, judge), args.hedge_percentile, args.hedge_budget)
+    context_cache = None
+    if args.context_cache:
+        context_cache = enable_context_cache(llm_agents(summarizer, judge), summarizer.agent.backend)
 
-    loader = DataLoader()
-    r_scorer = rouge_scorer.RougeScorer(['rougeL'], use_stemmer=True)
-    
-    strategies = STRATEGIES
-    
-    # Load all samples
-    samples = list(loader.load_samples(limit=args.limit))
-    
-    # Create tasks
-    tasks = [
-        process_sample(i, content, summarizer, judge, strategies, r_scorer) 
-        for i, content in enumerate(samples)
-    ]
-    
-    # Run tasks with progress bar
-    all_results_lists = []
-    with tqdm(total=len(tasks), desc="Processing samples", unit="sample") as pbar:
-        for coro in asyncio.as_completed(tasks):
-            result = await coro
-            all_results_lists.append(result)
-            pbar.update(1)
-    
-    # Flatten results
-    flat_results = [item for sublist in all_results_lists for item in sublist]
-    
-    # Save results
-    save_results(flat_results, strategies)
-
-def save_results(flat_results, strategies):
-    fieldnames = [
-        "url", "language", "latency_ms", "tokens_input", "tokens_output", "cost_usd", "char_count", 
-        "judge_status", "judge_score", "judge_critique",
-        "rouge_l_f1", "bert_score_f1", "quality_score",
-        "summary_content", "baseline_summary",
-        "baseline_char_count"
-    ]
-    
-    print("\nSaving results...")
+    # Both agents share one pooled client: open its connections before timing anything
+    try:
+        await summarizer.agent.backend.warm_up(summarizer.agent.model_name)
+    except Exception as e:
+        print(f"Warm-up failed (continuing with cold connections): {e}")
+
+    gate = PreJudgeGate(audit_rate=args.prejudge_audit) if args.prejudge else None
+    loader = DataLoader(args.data)
+    r_scorer, bert_stage = build_scorers(args.metrics)
     
-    # Write CSVs
-    files = {}
-    writers = {}
+    strategies = STRATEGIES if args.strategy in ("all", "auto") else [args.strategy]
+    router = None
+    if args.strategy == "auto":
+        try:
+            router = StrategyRouter.load(args.router)
+        except Exception as e:
+            print(f"Error loading strategy router {args.router} (train one with python -m src.router): {e}")
+            return
+
+    # Duplicates of an earlier page reuse its results; on resume, originals may already be journaled
+    dedup = DedupIndex() if args.dedup and samples is None else None
+    reuse = SummaryReuse()
+    if args.dedup and args.resume:
+        for result in ResultJournal().iter_results():
+            if not result.get("duplicate_of"):
+                reuse.publish(result["url"], [result])
+
+    # Stream samples through a bounded worker pool: the loader is only advanced when
+    # a worker frees up, so memory stays flat regardless of dataset size
+    async def dataset():
+        for item in enumerate(loader.load_samples(limit=args.limit, dedup=dedup)):
+            yield item
+
+    if samples is None:
+        samples = dataset()
+
+    get_tracer().enabled = bool(args.trace)
+    monitor = LoopLagMonitor()
+    if args.trace:
+        monitor.start()
+
+    limiter = get_concurrency_limiter()
+
+    async def handle(i, content, pending, routing):
+        url = str(content.url) if content.url else None
+        original = content.metadata.get("duplicate_of")
+        result = []
+        try:
+            reused = await reuse.lookup(original) if original else None
+            result = await process_sample(i, content, summarizer, judge, pending, r_scorer, bert_stage, args.stream,
+                                          reused, gate, use_combined(args.generation, i))
+            for row in result:
+                row["sample"] = i
+                if routing:
+                    row["route"], row["route_probability"] = routing
+            emit(result)
+        finally:
+            # Always resolve, so waiting duplicates fall back to their own LLM calls on failure
+            if args.dedup and url and not original:
+                reuse.publish(url, result)
+        progress(limiter)
+
+    async def pending_samples():
+        async for i, content in samples:
+            url = str(content.url) if content.url else None
+            sample_strategies, routing = strategies, None
+            if router:
+                sample_strategies, route, probability = router.plan(content, args.router_audit)
+                routing = (route, probability)
+            pending = [strategy for strategy in sample_strategies if strategy not in completed.get(i, ())]
+            if pending:
+                # Registered in dataset order, before any worker can pick up a duplicate
+                if args.dedup and url and not content.metadata.get("duplicate_of"):
+                    reuse.expect(url)
+                yield i, content, pending, routing
+            else:
+                progress(limiter)
+
+    await run_bounded(pending_samples(), lambda item: handle(*item), max(1, MAX_IN_FLIGHT_SAMPLES // args.workers))
+
+    if bert_stage:
+        await bert_stage.close()
+    await monitor.stop()
+    if context_cache:
+        await context_cache.close()
+
+    if args.cache != "bypass":
+        response_cache = get_response_cache()
+        print(f"Response cache: {response_cache.hits} hits, {response_cache.misses} misses")
+    if dedup:
+        print_dedup_report(dedup)
+    if context_cache:
+        print_context_cache_report(context_cache)
+    print_concurrency_report(limiter)
+    print_latency_report(summarizer, judge)
+    if args.trace:
+        finish_trace(args.trace, monitor)
+
+async def main_async():
+    parser = argparse.ArgumentParser(description="Tavily Summarization Benchmark (2-Agent Architecture)")
+    parser.add_argument("--limit", type=int, default=DEFAULT_SAMPLE_LIMIT, help="Number of samples to process")
+    parser.add_argument("--data", default="data/summaries_1k.json", help="Dataset path (.json, .jsonl, optionally .gz)")
+    parser.add_argument("--cache", choices=CACHE_MODES, default=CACHE_MODE, help="LLM response cache mode")
+    parser.add_argument("--resume", action="store_true", help="Skip (sample, strategy) pairs already in the results journal")
+    parser.add_argument("--stream", action="store_true", help="Stream summaries and record time-to-first-token (ttft_ms)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Reuse the summary of an earlier exact/near-duplicate page instead of calling the LLM")
+    parser.add_argument("--prejudge", action="store_true",
+                        help="Decide clear PASS/FAIL advanced summaries with local checks instead of the LLM judge")
+    parser.add_argument("--prejudge-audit", type=float, default=PREJUDGE_AUDIT_RATE, metavar="RATE",
+                        help="Share of local pre-judge decisions also sent to the LLM judge to measure agreement")
+    parser.add_argument("--map-reduce", action="store_true",
+                        help="Summarize pages over the token budget chunk by chunk and merge, instead of truncating")
+    parser.add_argument("--batch", action="store_true",
+                        help="Submit each LLM round as one batch job (lower cost, higher quota, slower turnaround)")
+    parser.add_argument("--batch-backend", choices=("gemini", "local"), default="gemini",
+                        help="Batch service: Gemini Batch API, or a local file-based stand-in using the fake backend")
+    parser.add_argument("--batch-poll-interval", type=float, default=BATCH_POLL_INTERVAL,
+                        help="Seconds between batch job status checks")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Duplicate calls still running after a percentile of recent latency (first response wins)")
+    parser.add_argument("--hedge-percentile", type=float, default=HEDGE_PERCENTILE, metavar="P",
+                        help="Recent-latency percentile after which a call is hedged")
+    parser.add_argument("--hedge-budget", type=float, default=HEDGE_BUDGET_RATIO, metavar="RATIO",
+                        help="Maximum hedged calls as a fraction of all calls")
+    parser.add_argument("--context-cache", action="store_true",
+                        help="Store the system prompt + page content in a provider-side cache once per page and reuse it "
+                             "across strategies and refine rounds")
+    parser.add_argument("--generation", choices=("separate", "combined", "compare"), default="separate",
+                        help="One summarizer call per strategy, one call returning both strategies, "
+                             "or alternate samples between the two to compare them")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="Shard samples across N processes sharing one RPM/TPM budget (each loads its own BERTScore model)")
+    parser.add_argument("--strategy", choices=("all", "fast", "advanced", "auto"), default="all",
+                        help="Strategies per page; auto runs the one the trained router picks (python -m src.router)")
+    parser.add_argument("--router", default=ROUTER_PATH, metavar="PATH", help="Trained router used by --strategy auto")
+    parser.add_argument("--router-audit", type=float, default=ROUTER_AUDIT_RATE, metavar="RATE",
+                        help="Share of fast-routed pages also run through advanced, to measure the quality lost")
+    parser.add_argument("--export", type=parse_exports, default=",".join(RESULT_EXPORTS) or "none", metavar="LIST",
+                        help="Derived exports besides the Parquet result store: csv, xlsx, csv,xlsx or none "
+                             "(default: %(default)s)")
+    parser.add_argument("--metrics", type=parse_metrics, default=",".join(SCORING_METRICS), metavar="LIST",
+                        help="Reference metrics: comma-separated subset of %(default)s, or none "
+                             "(BERTScore loads transformers on first use)")
+    parser.add_argument("--trace", nargs="?",const=TRACE_PATH, default=None, metavar="PATH",
+                        help=f"Record spans, print a per-stage latency breakdown and write a Chrome trace (default {TRACE_PATH})")
+    parser.add_argument("--loadtest", type=int, default=None, metavar="N",
+                        help="Run N synthetic samples against the offline fake backend and report pipeline performance")
+    parser.add_argument("--fake-latency-ms", type=float, default=800.0, help="Load test: median fake call latency")
+    parser.add_argument("--fixed-concurrency", type=int, default=None, metavar="N",
+                        help="Pin the number of in-flight LLM calls instead of adapting it to latency and 429s")
+    parser.add_argument("--fake-capacity", type=int, default=None, metavar="N",
+                        help="Load test: simulated server capacity (latency grows beyond N in-flight calls, 429s beyond 2N)")
+    parser.add_argument("--fake-prefill-ms", type=float, default=0.0, metavar="MS",
+                        help="Load test: extra latency per 1k prompt tokens not served from a context cache")
+    parser.add_argument("--fake-429-rate", type=float, default=0.0, help="Load test: fraction of calls failing with 429")
+    parser.add_argument("--fake-pass-rate", type=float, default=0.7, help="Load test: fraction of judge PASS verdicts")
+    parser.add_argument("--seed", type=int, default=0, help="Load test: RNG seed")
+    args = parser.parse_args()
+
+    if args.strategy != "all" and (args.loadtest or args.batch):
+        print("--strategy applies to the interactive pipeline; running all strategies")
+    if args.loadtest:
+        await run_load_test(args)
+        return
+    if args.batch:
+        await run_batch(args)
+        return
+
+    response_cache = get_response_cache()
+    response_cache.mode = args.cache
+
+    print(f"Starting async benchmark with limit: {args.limit}")
+    print(f"Architecture: 2-Agent (Summarizer + optional Judge)")
+    limiter = configure_concurrency(args.fixed_concurrency, args.workers)
+    print(f"Concurrency: {describe_concurrency(limiter)}" + (f" per worker, {args.workers} workers" if args.workers > 1 else ""))
+    print(f"Response Cache: {args.cache}")
+    print(f"Long pages: {'map-reduce' if args.map_reduce else 'truncated'} at {MAX_CONTENT_TOKENS} tokens")
+    print(f"Duplicate reuse: {'on' if args.dedup else 'off'}")
+    print(f"Pre-judge gate: {f'on (audit rate {args.prejudge_audit})' if args.prejudge else 'off'}")
+    print(f"Hedging: {f'on (p{args.hedge_percentile:g}, budget {args.hedge_budget:.0%})' if args.hedge else 'off'}")
+    print(f"Context cache: {'on' if args.context_cache else 'off'}")
+    print(f"Summary generation: {args.generation}")
+    print(f"Strategies: {args.strategy}" + (f" (router {args.router}, audit rate {args.router_audit})"
+                                             if args.strategy == "auto" else ""))
+    if args.strategy == "auto" and not os.path.exists(args.router):
+        print(f"Error: no strategy router at {args.router}; train one with python -m src.router")
+        return
+    print(f"Reference metrics: {', '.join(sorted(args.metrics)) or 'none'}")
+    print(f"Tracing: {args.trace or 'off'}")
+
+    # Results are journaled as each sample finishes; --resume skips what is already there
+    journal = ResultJournal()
+    if args.resume:
+        completed = journal.completed()
+        print(f"Resuming: {len(completed)} samples already journaled")
+    else:
+        journal.reset()
+        completed = {}
+
+    if args.workers > 1:
+        # Worker processes stream their rows back; this process is the single journal writer
+        run_workers(args, completed, journal)
+    else:
+        from tqdm import tqdm
+        with tqdm(total=args.limit, desc="Processing samples", unit="sample") as pbar:
+            def progress(limiter):
+                pbar.set_postfix_str(limiter.describe(), refresh=False)
+                pbar.update(1)
+
+            await run_pipeline(args, completed, journal.append, progress)
     
-    try:
+    # Rebuild outputs from the journal
+    save_results(journal.iter_results(), STRATEGIES, args.export)
+
+def export_results(store_path, strategies, exports):
+    """
+    Derived exports of the result store: one CSV per strategy ("csv") and one
+    workbook with a sheet per strategy ("xlsx"), with the report rounding applied.
+    """
+    df = round_results(ResultStore.read(store_path))
+    if "csv" in exports:
         for strategy in strategies:
-            filename = f"results/results_{strategy}.csv"
-            f = open(filename, "w", newline="", encoding="utf-8")
-            w = csv.DictWriter(f, fieldnames=fieldnames)
-            w.writeheader()
-            files[strategy] = f
-            writers[strategy] = w
-            
-        for res in flat_results:
-            strat = res.pop("strategy") # Remove helper key
-            if strat in writers:
-                writers[strat].writerow(res)
-                
-    finally:
-        for f in files.values():
-            f.close()
+            df[df["strategy"] == strategy][EXPORT_COLUMNS].to_csv(
+                f"results/results_{strategy}.csv", index=False, encoding="utf-8"
+            )
+        print(f"Exported {', '.join(f'results/results_{strategy}.csv' for strategy in strategies)}")
 
-    print("Combining results into Excel...")
-    try:
-        with pd.ExcelWriter("results/benchmark_results.xlsx") as writer:
-            has_data = False
-            for strategy in strategies:
-                csv_name = f"results/results_{strategy}.csv"
-                if os.path.exists(csv_name):
-                    try:
-                        df = pd.read_csv(csv_name)
-                        if not df.empty:
-                            df.to_excel(writer, sheet_name=strategy, index=False)
-                            has_data = True
-                        else:
-                            print(f"Warning: {csv_name} is empty.")
-                    except Exception as e:
-                        print(f"Error reading/writing {csv_name}: {e}")
-
-            if not has_data:
-                # Create a dummy sheet if no data to prevent ExcelWriter error
-                pd.DataFrame({'Info': ['No results generated']}).to_excel(writer, sheet_name='No Data', index=False)
+    if "xlsx" in exports:
+        import pandas as pd
+        try:
+            with pd.ExcelWriter("results/benchmark_results.xlsx") as writer:
+                for strategy in strategies:
+                    sheet = df[df["strategy"] == strategy][EXPORT_COLUMNS]
+                    if sheet.empty:
+                        print(f"Warning: no {strategy} results for the Excel export.")
+                    else:
+                        sheet.to_excel(writer, sheet_name=strategy, index=False)
+            print("Exported results/benchmark_results.xlsx")
+        except Exception as e:
+            print(f"Error creating Excel file: {e}")
 
-            
-        if has_data:
-            print("Success! Created 'benchmark_results.xlsx'.")
-        else:
-            print("Warning: No data found to write to Excel.")
-            
+def save_results(flat_results, strategies, exports=()):
+    """
+    Streams result rows into the Parquet result store (RESULT_STORE_DIR), writes the
+    requested derived exports ("csv", "xlsx") from it and prints the report.
+    """
+    print("\nSaving results...")
+    start = time.perf_counter()
+    try:
+        with ResultStore() as store:
+            store.append(flat_results)
     except Exception as e:
-        print(f"Error creating Excel file: {e}")
+        print(f"Error writing the result store (rows are kept in {JOURNAL_PATH}): {e}")
+        return
+    print(f"Saved {store.rows_written} rows and {store.references_written} baseline texts to {store.path} "
+          f"in {time.perf_counter() - start:.2f}s")
+    if not store.rows_written:
+        print("Warning: No results to report.")
+        return
+
+    if exports:
+        export_results(store.path, strategies, exports)
+    columns = [name for name, _ in RESULT_COLUMNS if name not in TEXT_COLUMNS]
+    print_report(round_results(ResultStore.read(store.path, columns=columns, with_references=False)))
 
 def main():
     asyncio.run(main_async())
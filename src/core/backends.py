@@ -0,0 +1,469 @@
+import os
+import json
+import time
+import random
+import asyncio
+import contextvars
+import importlib.util
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple, Type
+from pydantic import BaseModel
+from src.schema import CombinedSummaryResponse, JudgeFeedback, SummaryResponse
+from config.settings import (
+    CHARS_PER_TOKEN, CONCURRENCY_CEILING, HTTP2_ENABLED, HTTP_KEEPALIVE_EXPIRY, WARMUP_CONNECTIONS,
+    CONTEXT_CACHE_MIN_TOKENS
+)
+
+
+class ConnectionTimings:
+    """
+    Connection-level timings for one API call, collected from httpcore trace events.
+
+    connect_ms and tls_ms are None when the request reused a pooled connection.
+    """
+
+    def __init__(self):
+        self._started: Dict[str, float] = {}
+        self.connect_ms: Optional[float] = None
+        self.tls_ms: Optional[float] = None
+        self.ttfb_ms: Optional[float] = None
+        self._request_sent_at: Optional[float] = None
+
+    def trace(self, event: str, info: dict):
+        """httpcore `trace` extension callback (sync clients)."""
+        now = time.perf_counter()
+        step, _, phase = event.rpartition(".")
+        if phase == "started":
+            self._started[step] = now
+            if step.endswith("send_request_headers"):
+                self._request_sent_at = now
+        elif phase == "complete" and step in self._started:
+            elapsed_ms = (now - self._started[step]) * 1000
+            if step.endswith("connect_tcp"):
+                self.connect_ms = elapsed_ms
+            elif step.endswith("start_tls"):
+                self.tls_ms = elapsed_ms
+            elif step.endswith("receive_response_headers") and self._request_sent_at is not None:
+                self.ttfb_ms = (now - self._request_sent_at) * 1000
+
+    async def atrace(self, event: str, info: dict):
+        """httpcore `trace` extension callback (async clients)."""
+        self.trace(event, info)
+
+    def as_dict(self) -> dict:
+        return {
+            "connect_ms": self.connect_ms,
+            "tls_ms": self.tls_ms,
+            "ttfb_ms": self.ttfb_ms,
+            "connection_reused": self.connect_ms is None,
+        }
+
+
+# Timings of the API call currently awaited in this task (read by the httpx request hooks)
+_current_timings: contextvars.ContextVar[Optional[ConnectionTimings]] = contextvars.ContextVar(
+    "current_timings", default=None
+)
+
+
+def _attach_trace(request):
+    timings = _current_timings.get()
+    if timings is not None:
+        request.extensions["trace"] = timings.trace
+
+
+async def _attach_atrace(request):
+    timings = _current_timings.get()
+    if timings is not None:
+        request.extensions["trace"] = timings.atrace
+
+
+_clients: Dict[Tuple[str, int], object] = {}
+
+
+def get_gemini_client(api_key: str, max_connections: int = CONCURRENCY_CEILING):
+    """
+    Returns the process-wide genai.Client for this key and pool size.
+
+    All agents share one keep-alive (HTTP/2 when `h2` is installed) connection pool
+    sized to the concurrency ceiling, instead of each agent owning its own client.
+    """
+    key = (api_key, max_connections)
+    if key not in _clients:
+        import httpx
+        from google import genai
+        from google.genai import types
+
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+        http2 = HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+        _clients[key] = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(
+                httpx_client=httpx.Client(limits=limits, http2=http2, event_hooks={"request": [_attach_trace]}),
+                httpx_async_client=httpx.AsyncClient(limits=limits, http2=http2, event_hooks={"request": [_attach_atrace]}),
+            ),
+        )
+    return _clients[key]
+
+
+class LlmResponse:
+    """
+    Raw text response plus token usage (and connection timings, if measured) returned by a backend.
+    `cached_tokens` is the part of `prompt_tokens` served from a context cache.
+    """
+
+    def __init__(self, text: str, prompt_tokens: Optional[int] = None, output_tokens: Optional[int] = None,
+                 timings: Optional[dict] = None, cached_tokens: Optional[int] = None):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+        self.timings = timings
+        self.cached_tokens = cached_tokens
+
+    @property
+    def usage(self) -> Optional[dict]:
+        if self.prompt_tokens is None and self.output_tokens is None:
+            return None
+        usage = {
+            "prompt_token_count": self.prompt_tokens,
+            "candidates_token_count": self.output_tokens,
+        }
+        if self.cached_tokens:
+            usage["cached_content_token_count"] = self.cached_tokens
+        return usage
+
+
+class LlmBackend:
+    """
+    Interface between LlmAgent and an LLM provider.
+
+    Backends return the raw JSON text and token usage; parsing, caching, rate
+    limiting and retries stay in LlmAgent.
+
+    Backends that support explicit context caching implement the `*_context_cache`
+    methods. A call with `cached_content` set sends only the prompt suffix: the system
+    prompt and the prefix stored in that cache are prepended by the provider.
+    """
+
+    supports_context_cache = False
+
+    def generate(self, model: str, system_prompt: str, output_type: Optional[Type[BaseModel]], prompt: str) -> LlmResponse:
+        raise NotImplementedError
+
+    async def agenerate(self, model: str, system_prompt: str, output_type: Optional[Type[BaseModel]], prompt: str,
+                        cached_content: Optional[str] = None) -> LlmResponse:
+        raise NotImplementedError
+
+    def astream(self, model: str, system_prompt: str, output_type: Optional[Type[BaseModel]], prompt: str,
+                cached_content: Optional[str] = None) -> AsyncIterator[LlmResponse]:
+        """
+        Streams the response as LlmResponse chunks holding text deltas.
+        Token usage is reported on the chunk(s) where the provider includes it.
+        """
+        raise NotImplementedError
+
+    def context_cache_min_tokens(self, model: str) -> int:
+        """Smallest prefix (system prompt included) the provider accepts in a context cache."""
+        return CONTEXT_CACHE_MIN_TOKENS.get(model, CONTEXT_CACHE_MIN_TOKENS["default"])
+
+    async def create_context_cache(self, model: str, system_prompt: str, prefix: str, ttl_s: float) -> str:
+        """Stores the system prompt and prefix server-side for `ttl_s` seconds; returns the cache name."""
+        raise NotImplementedError
+
+    async def delete_context_cache(self, name: str):
+        raise NotImplementedError
+
+    async def warm_up(self, model: str):
+        """Opens connections ahead of the first real call (no-op by default)."""
+
+
+class GeminiBackend(LlmBackend):
+    """Google Gemini structured-output backend using the shared, pooled client."""
+
+    def __init__(self, api_key: Optional[str] = None, max_connections: int = CONCURRENCY_CEILING):
+        api_key = api_key or os.environ.get("GOOGLE_API_KEY")
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY environment variable not found. Please set it in your .env file.")
+
+        self.client = get_gemini_client(api_key, max_connections)
+
+    supports_context_cache = True
+
+    def _config(self, system_prompt: str, output_type: Optional[Type[BaseModel]], cached_content: Optional[str] = None):
+        from google.genai import types
+
+        if cached_content:
+            # The system instruction is part of the cached content and must not be resent
+            return types.GenerateContentConfig(
+                cached_content=cached_content,
+                response_mime_type="application/json",
+                response_schema=output_type,
+            )
+        return types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            response_mime_type="application/json",
+            response_schema=output_type,
+        )
+
+    @staticmethod
+    def _to_response(response, timings: ConnectionTimings) -> LlmResponse:
+        if not response.usage_metadata:
+            return LlmResponse(response.text or "", timings=timings.as_dict())
+        return LlmResponse(
+            response.text or "",
+            prompt_tokens=response.usage_metadata.prompt_token_count,
+            output_tokens=response.usage_metadata.candidates_token_count,
+            timings=timings.as_dict(),
+            cached_tokens=response.usage_metadata.cached_content_token_count,
+        )
+
+    def generate(self, model, system_prompt, output_type, prompt) -> LlmResponse:
+        timings = ConnectionTimings()
+        token = _current_timings.set(timings)
+        try:
+            response = self.client.models.generate_content(
+                model=model,
+                contents=prompt,
+                config=self._config(system_prompt, output_type),
+            )
+        finally:
+            _current_timings.reset(token)
+        return self._to_response(response, timings)
+
+    async def agenerate(self, model, system_prompt, output_type, prompt, cached_content=None) -> LlmResponse:
+        timings = ConnectionTimings()
+        token = _current_timings.set(timings)
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=model,
+                contents=prompt,
+                config=self._config(system_prompt, output_type, cached_content),
+            )
+        finally:
+            _current_timings.reset(token)
+        return self._to_response(response, timings)
+
+    async def astream(self, model, system_prompt, output_type, prompt, cached_content=None) -> AsyncIterator[LlmResponse]:
+        timings = ConnectionTimings()
+        token = _current_timings.set(timings)
+        try:
+            stream = await self.client.aio.models.generate_content_stream(
+                model=model,
+                contents=prompt,
+                config=self._config(system_prompt, output_type, cached_content),
+            )
+            async for chunk in stream:
+                yield self._to_response(chunk, timings)
+        finally:
+            _current_timings.reset(token)
+
+    async def warm_up(self, model: str):
+        """
+        Opens WARMUP_CONNECTIONS pooled connections (TCP + TLS) with lightweight
+        metadata calls, so cold-connection cost stays out of measured latencies.
+        """
+        await asyncio.gather(*(self.client.aio.models.get(model=model) for _ in range(WARMUP_CONNECTIONS)))
+
+    async def create_context_cache(self, model, system_prompt, prefix, ttl_s) -> str:
+        from google.genai import types
+
+        cache = await self.client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=system_prompt or None,
+                contents=[prefix] if prefix else None,
+                ttl=f"{int(ttl_s)}s",
+            ),
+        )
+        return cache.name
+
+    async def delete_context_cache(self, name):
+        await self.client.aio.caches.delete(name=name)
+
+
+class FakeRateLimitError(Exception):
+    """Injected 429, matched by LlmAgent's rate-limit retry logic."""
+
+
+class FakeBackend(LlmBackend):
+    """
+    Offline, deterministic stand-in for Gemini.
+
+    Produces schema-valid SummaryResponse / JudgeFeedback JSON with configurable latency,
+    token counts, 429 injection and judge PASS ratio, so the pipeline's own overhead
+    and concurrency behavior can be measured without network or quota.
+    Context caches are kept in memory with their TTL; cached prefix tokens are reported
+    as `cached_tokens` and skip the simulated prefill time.
+    """
+
+    supports_context_cache = True
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_sigma: float = 0.4,
+        latency_fn: Optional[Callable[[random.Random], float]] = None,
+        output_tokens: int = 250,
+        rate_limit_rate: float = 0.0,
+        judge_pass_rate: float = 0.7,
+        seed: int = 0,
+        capacity: Optional[int] = None,
+        prefill_ms_per_1k_tokens: float = 0.0,
+        cache_min_tokens: int = 0,
+    ):
+        """
+        Args:
+            latency_ms: Median simulated call latency.
+            latency_sigma: Log-normal shape parameter (0 = constant latency).
+            latency_fn: Optional override returning a latency in ms from the RNG.
+            output_tokens: Mean number of output tokens per response.
+            rate_limit_rate: Probability that a call fails with an injected 429.
+            judge_pass_rate: Probability that a JudgeFeedback response is PASS.
+            seed: RNG seed; equal seeds and call orders give identical runs.
+            capacity: Optional simulated server capacity: with more calls in flight, latency
+                grows proportionally (queueing), and beyond twice as many calls fail with 429.
+            prefill_ms_per_1k_tokens: Extra latency per 1k prompt tokens not served from a context cache.
+            cache_min_tokens: Smallest prefix accepted by `create_context_cache`.
+        """
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.latency_fn = latency_fn
+        self.output_tokens = output_tokens
+        self.rate_limit_rate = rate_limit_rate
+        self.judge_pass_rate = judge_pass_rate
+        self.rng = random.Random(seed)
+        self.capacity = capacity
+        self.prefill_ms_per_1k_tokens = prefill_ms_per_1k_tokens
+        self.cache_min_tokens = cache_min_tokens
+        self.calls = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.context_caches: Dict[str, dict] = {}
+        self.cache_creations = 0
+
+    @staticmethod
+    def _count_tokens(*texts: str) -> int:
+        return max(1, int(sum(len(text) for text in texts) / CHARS_PER_TOKEN))
+
+    def _latency_s(self, prefill_tokens: int = 0) -> float:
+        if self.latency_fn:
+            latency_ms = self.latency_fn(self.rng)
+        elif self.latency_sigma:
+            latency_ms = self.latency_ms * self.rng.lognormvariate(0, self.latency_sigma)
+        else:
+            latency_ms = self.latency_ms
+        if self.capacity:
+            latency_ms *= max(1.0, self.in_flight / self.capacity)
+        latency_ms += prefill_tokens / 1000 * self.prefill_ms_per_1k_tokens
+        return max(0.0, latency_ms) / 1000
+
+    def _payload(self, output_type: Optional[Type[BaseModel]], prompt: str) -> dict:
+        if output_type is JudgeFeedback:
+            passed = self.rng.random() < self.judge_pass_rate
+            return {
+                "status": "PASS" if passed else "FAIL",
+                "score_accuracy": round(self.rng.uniform(0.75, 1.0) if passed else self.rng.uniform(0.3, 0.7), 2),
+                "critique": None if passed else "Missing key facts from the source.",
+            }
+        if output_type is CombinedSummaryResponse:
+            words = prompt.partition("Content:")[2].split() or prompt.split()
+            fast = " ".join(words[:self.output_tokens // 4])[:1500]
+            advanced = " ".join(words[:self.output_tokens // 2])[:1500]
+            return {"fast": {"content": fast, "language": "en"}, "advanced": {"content": advanced, "language": "en"}}
+        if output_type is SummaryResponse:
+            words = prompt.split()
+            content = " ".join(words[-min(len(words), self.output_tokens // 2):])[:1500]
+            return {"content": content, "language": "en"}
+        return {"text": "OK"}
+
+    def _admit(self):
+        """Rejects a call right away while the simulated server is overloaded."""
+        if self.capacity is not None and self.in_flight > 2 * self.capacity:
+            self.calls += 1
+            self.rate_limited += 1
+            raise FakeRateLimitError("429 RESOURCE_EXHAUSTED: simulated server overload")
+
+    def _expand(self, system_prompt: str, prompt: str, cached_content: Optional[str]) -> Tuple[str, str, int]:
+        """Returns (system prompt, full prompt, cached tokens) of a call, resolving its context cache."""
+        if not cached_content:
+            return system_prompt, prompt, 0
+        entry = self.context_caches.get(cached_content)
+        if entry is None or entry["expires_at"] <= time.monotonic():
+            self.context_caches.pop(cached_content, None)
+            raise ValueError(f"404 NOT_FOUND: cached content {cached_content} not found or expired")
+        return entry["system_prompt"], entry["prefix"] + prompt, entry["tokens"]
+
+    def _respond(self, system_prompt: str, output_type, prompt: str, cached_tokens: int = 0) -> LlmResponse:
+        self.calls += 1
+        if self.rng.random() < self.rate_limit_rate:
+            self.rate_limited += 1
+            raise FakeRateLimitError("429 RESOURCE_EXHAUSTED: injected rate limit")
+        text = json.dumps(self._payload(output_type, prompt), ensure_ascii=False)
+        prompt_tokens = self._count_tokens(system_prompt, prompt)
+        output_tokens = max(1, int(self.rng.gauss(self.output_tokens, self.output_tokens * 0.2)))
+        return LlmResponse(text, prompt_tokens=prompt_tokens, output_tokens=output_tokens,
+                           cached_tokens=cached_tokens or None)
+
+    def generate(self, model, system_prompt, output_type, prompt) -> LlmResponse:
+        time.sleep(self._latency_s(self._count_tokens(system_prompt, prompt)))
+        return self._respond(system_prompt, output_type, prompt)
+
+    async def agenerate(self, model, system_prompt, output_type, prompt, cached_content=None) -> LlmResponse:
+        self.in_flight += 1
+        try:
+            self._admit()
+            system_prompt, prompt, cached_tokens = self._expand(system_prompt, prompt, cached_content)
+            await asyncio.sleep(self._latency_s(self._count_tokens(system_prompt, prompt) - cached_tokens))
+            return self._respond(system_prompt, output_type, prompt, cached_tokens)
+        finally:
+            self.in_flight -= 1
+
+    async def astream(self, model, system_prompt, output_type, prompt, cached_content=None,
+                      chunk_chars: int = 40) -> AsyncIterator[LlmResponse]:
+        """Simulates streaming: ~30% of the latency before the first chunk, the rest spread over chunks."""
+        self.in_flight += 1
+        try:
+            self._admit()
+            system_prompt, prompt, cached_tokens = self._expand(system_prompt, prompt, cached_content)
+            prefill_tokens = self._count_tokens(system_prompt, prompt) - cached_tokens
+            latency_s = self._latency_s()
+            # Prefill happens before the first token
+            await asyncio.sleep(latency_s * 0.3 + prefill_tokens / 1000 * self.prefill_ms_per_1k_tokens / 1000)
+            response = self._respond(system_prompt, output_type, prompt, cached_tokens)
+            pieces = [response.text[i:i + chunk_chars] for i in range(0, len(response.text), chunk_chars)] or [""]
+            for index, piece in enumerate(pieces):
+                if index:
+                    await asyncio.sleep(latency_s * 0.7 / len(pieces))
+                last = index == len(pieces) - 1
+                yield LlmResponse(
+                    piece,
+                    prompt_tokens=response.prompt_tokens if last else None,
+                    output_tokens=response.output_tokens if last else None,
+                    cached_tokens=response.cached_tokens if last else None,
+                )
+        finally:
+            self.in_flight -= 1
+
+    def context_cache_min_tokens(self, model: str) -> int:
+        return self.cache_min_tokens
+
+    async def create_context_cache(self, model, system_prompt, prefix, ttl_s) -> str:
+        tokens = self._count_tokens(system_prompt, prefix)
+        if tokens < self.cache_min_tokens:
+            raise ValueError(f"400 INVALID_ARGUMENT: cached content has {tokens} tokens, minimum is {self.cache_min_tokens}")
+        # Creating a cache prefills its tokens once
+        await asyncio.sleep(tokens / 1000 * self.prefill_ms_per_1k_tokens / 1000)
+        self.cache_creations += 1
+        name = f"cachedContents/fake-{self.cache_creations}"
+        self.context_caches[name] = {
+            "system_prompt": system_prompt,
+            "prefix": prefix,
+            "tokens": tokens,
+            "expires_at": time.monotonic() + ttl_s,
+        }
+        return name
+
+    async def delete_context_cache(self, name):
+        self.context_caches.pop(name, None)
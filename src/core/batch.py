@@ -0,0 +1,280 @@
+import os
+import json
+import asyncio
+import hashlib
+from typing import Any, Dict, Optional, Union
+from src.core.backends import LlmBackend, LlmResponse, get_gemini_client
+from src.core.llm_client import LlmAgent
+from src.schema import JudgeFeedback, SummaryResponse
+from config.settings import BATCH_DIR, BATCH_POLL_INTERVAL, MAX_CONCURRENT_CALLS
+
+# Normalized job states returned by BatchBackend.status
+RUNNING, SUCCEEDED, FAILED = "RUNNING", "SUCCEEDED", "FAILED"
+
+
+def batch_request(agent: LlmAgent, prompt: str) -> dict:
+    """One request of a batch job file (Gemini batch JSONL request format)."""
+    request = {
+        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+        "generation_config": {"response_mime_type": "application/json"},
+    }
+    if agent.system_prompt:
+        request["system_instruction"] = {"parts": [{"text": agent.system_prompt}]}
+    if agent.output_type is not None:
+        request["generation_config"]["response_json_schema"] = agent.output_type.model_json_schema()
+    return request
+
+
+def parse_batch_response(response: dict) -> LlmResponse:
+    """Converts a GenerateContentResponse JSON object from a batch output file."""
+    candidates = response.get("candidates") or []
+    parts = candidates[0].get("content", {}).get("parts", []) if candidates else []
+    text = "".join(part.get("text", "") for part in parts)
+    usage = response.get("usageMetadata") or response.get("usage_metadata") or {}
+    return LlmResponse(
+        text,
+        prompt_tokens=usage.get("promptTokenCount", usage.get("prompt_token_count")),
+        output_tokens=usage.get("candidatesTokenCount", usage.get("candidates_token_count")),
+    )
+
+
+def read_batch_output(lines) -> Dict[str, Union[LlmResponse, Exception]]:
+    """Parses batch output JSONL ({"key", "response"} or {"key", "error"} per line)."""
+    results: Dict[str, Union[LlmResponse, Exception]] = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        if "response" in item:
+            results[item["key"]] = parse_batch_response(item["response"])
+        else:
+            results[item["key"]] = RuntimeError(f"Batch request failed: {item.get('error')}")
+    return results
+
+
+class BatchBackend:
+    """
+    Interface for asynchronous bulk jobs: a JSONL job file is submitted as one job,
+    polled until it finishes, and its results are read back by request key.
+    """
+
+    async def submit(self, job_path: str, model: str, display_name: str) -> str:
+        """Submits the job file and returns a job id."""
+        raise NotImplementedError
+
+    async def status(self, job_id: str) -> str:
+        """Returns RUNNING, SUCCEEDED or FAILED."""
+        raise NotImplementedError
+
+    async def results(self, job_id: str) -> Dict[str, Union[LlmResponse, Exception]]:
+        """Returns {request key: response or per-request error} of a finished job."""
+        raise NotImplementedError
+
+
+class GeminiBatchBackend(BatchBackend):
+    """Gemini Batch API: job files are uploaded with the Files API and processed asynchronously."""
+
+    _STATES = {
+        "JOB_STATE_SUCCEEDED": SUCCEEDED,
+        "JOB_STATE_PARTIALLY_SUCCEEDED": SUCCEEDED,  # Per-request errors are reported in the output
+        "JOB_STATE_FAILED": FAILED,
+        "JOB_STATE_CANCELLED": FAILED,
+        "JOB_STATE_EXPIRED": FAILED,
+    }
+
+    def __init__(self, api_key: Optional[str] = None):
+        api_key = api_key or os.environ.get("GOOGLE_API_KEY")
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY environment variable not found. Please set it in your .env file.")
+        self.client = get_gemini_client(api_key)
+
+    async def submit(self, job_path: str, model: str, display_name: str) -> str:
+        uploaded = await self.client.aio.files.upload(
+            file=job_path, config={"display_name": display_name, "mime_type": "jsonl"}
+        )
+        job = await self.client.aio.batches.create(model=model, src=uploaded.name, config={"display_name": display_name})
+        return job.name
+
+    async def status(self, job_id: str) -> str:
+        job = await self.client.aio.batches.get(name=job_id)
+        return self._STATES.get(job.state.name, RUNNING)
+
+    async def results(self, job_id: str) -> Dict[str, Union[LlmResponse, Exception]]:
+        job = await self.client.aio.batches.get(name=job_id)
+        content = await self.client.aio.files.download(file=job.dest.file_name)
+        return read_batch_output(content.decode("utf-8").splitlines())
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    File-based stand-in for a batch service, for tests and offline runs.
+
+    Each job is a directory holding the submitted file; requests are answered by an
+    interactive LlmBackend (e.g. FakeBackend) in the background and written to
+    output.jsonl in the Gemini batch output format.
+    """
+
+    def __init__(self, backend: LlmBackend, root: str = os.path.join(BATCH_DIR, "local"),
+                 max_concurrency: int = MAX_CONCURRENT_CALLS):
+        """
+        Args:
+            backend: Interactive backend that answers the requests.
+            root: Directory holding one sub-directory per job.
+            max_concurrency: Requests of a job answered at the same time.
+        """
+        self.backend = backend
+        self.root = root
+        self.max_concurrency = max_concurrency
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id)
+
+    async def submit(self, job_path: str, model: str, display_name: str) -> str:
+        with open(job_path, "rb") as f:
+            job_id = f"{display_name}-{hashlib.sha1(f.read()).hexdigest()[:12]}"
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        with open(job_path, "r", encoding="utf-8") as src, open(os.path.join(job_dir, "input.jsonl"), "w", encoding="utf-8") as dst:
+            dst.write(src.read())
+        with open(os.path.join(job_dir, "model"), "w", encoding="utf-8") as f:
+            f.write(model)
+        self._start(job_id)
+        return job_id
+
+    def _start(self, job_id: str):
+        self._tasks[job_id] = asyncio.get_running_loop().create_task(self._process(job_id))
+
+    async def _answer(self, model: str, item: dict, semaphore: asyncio.Semaphore) -> dict:
+        request = item["request"]
+        system_prompt = "".join(p["text"] for p in request.get("system_instruction", {}).get("parts", []))
+        prompt = "".join(p["text"] for content in request["contents"] for p in content["parts"])
+        output_type = _output_type_for(request.get("generation_config", {}).get("response_json_schema"))
+        async with semaphore:
+            try:
+                response = await self.backend.agenerate(model, system_prompt, output_type, prompt)
+            except Exception as e:
+                return {"key": item["key"], "error": {"message": str(e)}}
+        return {
+            "key": item["key"],
+            "response": {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": response.text}]}}],
+                "usageMetadata": {
+                    "promptTokenCount": response.prompt_tokens,
+                    "candidatesTokenCount": response.output_tokens,
+                },
+            },
+        }
+
+    async def _process(self, job_id: str):
+        job_dir = self._job_dir(job_id)
+        with open(os.path.join(job_dir, "model"), "r", encoding="utf-8") as f:
+            model = f.read()
+        with open(os.path.join(job_dir, "input.jsonl"), "r", encoding="utf-8") as f:
+            items = [json.loads(line) for line in f if line.strip()]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        lines = await asyncio.gather(*(self._answer(model, item, semaphore) for item in items))
+        tmp_path = os.path.join(job_dir, "output.jsonl.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, os.path.join(job_dir, "output.jsonl"))
+
+    async def status(self, job_id: str) -> str:
+        job_dir = self._job_dir(job_id)
+        if os.path.exists(os.path.join(job_dir, "output.jsonl")):
+            return SUCCEEDED
+        if not os.path.exists(os.path.join(job_dir, "input.jsonl")):
+            return FAILED
+        task = self._tasks.get(job_id)
+        if task is None:
+            self._start(job_id)  # Submitted by an earlier process that did not finish it
+        elif task.done() and task.exception():
+            print(f"Local batch job {job_id} failed: {task.exception()}")
+            return FAILED
+        return RUNNING
+
+    async def results(self, job_id: str) -> Dict[str, Union[LlmResponse, Exception]]:
+        with open(os.path.join(self._job_dir(job_id), "output.jsonl"), "r", encoding="utf-8") as f:
+            return read_batch_output(f)
+
+
+def _output_type_for(schema: Optional[dict]):
+    """Maps a response JSON schema back to the schema class (so fake backends produce valid payloads)."""
+    if schema is None:
+        return None
+    for output_type in (SummaryResponse, JudgeFeedback):
+        if schema.get("title") == output_type.__name__:
+            return output_type
+    return None
+
+
+async def run_batch_round(agent: LlmAgent, prompts: Dict[str, str], backend: BatchBackend, name: str,
+                          job_dir: str = BATCH_DIR, poll_interval: float = BATCH_POLL_INTERVAL) -> Dict[str, Any]:
+    """
+    Runs one agent's prompts as a single batch job and returns {key: output or Exception}.
+
+    Cached responses are returned without being submitted, and new responses are cached.
+    The job file name is derived from its content, so rerunning an interrupted round
+    re-attaches to the job already submitted instead of paying for it twice.
+
+    Args:
+        agent: Agent whose model, system prompt and output schema are used.
+        prompts: Request key -> prompt.
+        backend: Batch service.
+        name: Round name, used in job file names and as the job display name.
+        job_dir: Directory for job files and job-id manifests.
+        poll_interval: Seconds between status checks.
+    """
+    outputs: Dict[str, Any] = {}
+    pending = {}
+    for key, prompt in prompts.items():
+        cache_key = agent.cache.make_key(agent.model_name, agent.system_prompt, agent.output_type, prompt)
+        cached = agent.cache.get(cache_key)
+        if cached is not None:
+            outputs[key] = agent._cached_output(cached)
+        else:
+            pending[key] = cache_key
+    if not pending:
+        return outputs
+
+    lines = [json.dumps({"key": key, "request": batch_request(agent, prompts[key])}, ensure_ascii=False) for key in pending]
+    body = "\n".join(lines) + "\n"
+    digest = hashlib.sha1(f"{agent.model_name}\n{body}".encode("utf-8")).hexdigest()[:12]
+    os.makedirs(job_dir, exist_ok=True)
+    job_path = os.path.join(job_dir, f"{name}-{digest}.jsonl")
+    manifest_path = job_path + ".job"
+    with open(job_path, "w", encoding="utf-8") as f:
+        f.write(body)
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            job_id = f.read().strip()
+        print(f"Batch '{name}': re-attaching to job {job_id} ({len(pending)} requests)")
+    else:
+        job_id = await backend.submit(job_path, agent.model_name, f"{name}-{digest}")
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            f.write(job_id)
+        print(f"Batch '{name}': submitted job {job_id} ({len(pending)} requests)")
+
+    state = await backend.status(job_id)
+    while state == RUNNING:
+        await asyncio.sleep(poll_interval)
+        state = await backend.status(job_id)
+    if state != SUCCEEDED:
+        os.remove(manifest_path)  # Let the next run submit a fresh job
+        raise RuntimeError(f"Batch job {job_id} ended in state {state}")
+
+    responses = await backend.results(job_id)
+    for key, cache_key in pending.items():
+        response = responses.get(key, RuntimeError(f"No result for request {key}"))
+        if isinstance(response, Exception):
+            outputs[key] = response
+            continue
+        try:
+            data = json.loads(response.text)
+            outputs[key] = agent._to_output(data, response.usage)
+            agent.cache.put(cache_key, data, response.usage)
+        except Exception as e:
+            outputs[key] = e
+    return outputs
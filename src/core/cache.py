@@ -0,0 +1,134 @@
+import os
+import json
+import hashlib
+from typing import Any, Optional, Type
+from pydantic import BaseModel
+from config.settings import CACHE_DIR, CACHE_MAX_BYTES, CACHE_MODE
+
+CACHE_MODES = ("write-through", "read-only", "bypass")
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of parsed LLM responses.
+
+    Entries are keyed by a hash of (model, system prompt, response schema, prompt) and
+    store the parsed JSON plus usage metadata and the latency of the original call. The directory is bounded to `max_bytes`
+    with least-recently-used eviction (file mtime is bumped on every hit).
+
+    Modes:
+        write-through: read hits and store every new response.
+        read-only: read hits but never write (e.g. shared or frozen caches).
+        bypass: ignore the cache entirely.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES, mode: str = CACHE_MODE):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}'. Expected one of {CACHE_MODES}.")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, output_type: Optional[Type[BaseModel]], prompt: str) -> str:
+        """Hashes everything that can change the model's response."""
+        schema = output_type.model_json_schema() if output_type else None
+        payload = json.dumps([model, system_prompt, schema, prompt], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Returns the cached entry ({"data": ..., "usage": ..., "latency_ms": ..., "ttft_ms": ...})
+        or None on a miss. Latencies are None for entries stored without them.
+        """
+        if self.mode == "bypass":
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        self.hits += 1
+        entry.setdefault("latency_ms", None)
+        entry.setdefault("ttft_ms", None)
+        return entry
+
+    def put(self, key: str, data: Any, usage: Optional[dict], latency_ms: Optional[float] = None,
+            ttft_ms: Optional[float] = None):
+        """
+        Stores a parsed response (write-through mode only).
+
+        Args:
+            latency_ms: Latency of the live call, reported again when the entry is replayed.
+            ttft_ms: Time to the first streamed token of the live call (streaming calls only).
+        """
+        if self.mode != "write-through":
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"data": data, "usage": usage, "latency_ms": latency_ms, "ttft_ms": ttft_ms}, f,
+                      ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, path
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Deletes least-recently-used entries until the cache is at 90% of its budget."""
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+                self._size -= size
+            except FileNotFoundError:
+                pass
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Returns the process-wide response cache shared by all agents."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
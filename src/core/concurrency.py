@@ -0,0 +1,159 @@
+import time
+import asyncio
+from collections import deque
+from typing import Dict, Optional
+from config.settings import (
+    MAX_CONCURRENT_CALLS, MIN_CONCURRENT_CALLS, CONCURRENCY_CEILING, CONCURRENCY_BACKOFF,
+    CONCURRENCY_LATENCY_TOLERANCE, CONCURRENCY_LATENCY_BACKOFF
+)
+
+_SHORT_ALPHA = 0.1     # Smoothing of the current latency
+_BASELINE_ALPHA = 0.01  # How fast the no-load baseline follows latency upwards (e.g. larger prompts)
+_MIN_DECREASE_INTERVAL_S = 1.0
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit for in-flight LLM calls, used like a semaphore
+    (`async with limiter:`) and fed with the outcome of each call.
+
+    While calls succeed without latency inflation and the limit is actually used,
+    it grows by about one slot per `limit` successes (additive increase). A 429
+    cuts it by CONCURRENCY_BACKOFF; smoothed latency above CONCURRENCY_LATENCY_TOLERANCE
+    times the no-load baseline (Vegas-style queueing signal) cuts it by
+    CONCURRENCY_LATENCY_BACKOFF. At most one cut is applied per smoothed call
+    latency (and per second), since the calls already in flight report the same congestion.
+    Waiters are served in FIFO order.
+    """
+
+    def __init__(self, initial: int = MAX_CONCURRENT_CALLS, min_limit: int = MIN_CONCURRENT_CALLS,
+                 max_limit: int = CONCURRENCY_CEILING, backoff: float = CONCURRENCY_BACKOFF,
+                 latency_tolerance: float = CONCURRENCY_LATENCY_TOLERANCE,
+                 latency_backoff: float = CONCURRENCY_LATENCY_BACKOFF):
+        """
+        Args:
+            initial: Starting limit.
+            min_limit: The limit never drops below this.
+            max_limit: The limit never grows above this (pass min_limit = max_limit for a fixed limit).
+            backoff: Multiplicative decrease on a rate-limit error.
+            latency_tolerance: Smoothed latency / baseline ratio treated as congestion.
+            latency_backoff: Multiplicative decrease on latency inflation.
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.latency_backoff = latency_backoff
+        self.in_flight = 0
+        self.smoothed_ms: Optional[float] = None
+        self.baseline_ms: Optional[float] = None
+        self.lowest = self.highest = self.limit
+        self.decreases = {"rate_limit": 0, "latency": 0}
+        self._last_decrease = float("-inf")
+        self._waiters = deque()
+
+    @property
+    def adaptive(self) -> bool:
+        return self.min_limit < self.max_limit
+
+    def _has_room(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def _wake(self):
+        while self._waiters and self._has_room():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self):
+        if self._has_room() and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # The slot was granted just before the cancellation
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    def _set_limit(self, limit: float):
+        self.limit = min(max(limit, self.min_limit), self.max_limit)
+        self.lowest = min(self.lowest, self.limit)
+        self.highest = max(self.highest, self.limit)
+        self._wake()
+
+    def _decrease(self, factor: float, reason: str):
+        now = time.monotonic()
+        cooldown = max((self.smoothed_ms or 0.0) / 1000, _MIN_DECREASE_INTERVAL_S)
+        if now - self._last_decrease < cooldown:
+            return
+        self._last_decrease = now
+        self.decreases[reason] += 1
+        self._set_limit(self.limit * factor)
+
+    def on_success(self, latency_ms: float):
+        """Feeds the latency of a successful call (time in the network, not in queues)."""
+        if not self.adaptive:
+            return
+        if self.smoothed_ms is None:
+            self.smoothed_ms = self.baseline_ms = latency_ms
+        else:
+            self.smoothed_ms += _SHORT_ALPHA * (latency_ms - self.smoothed_ms)
+            if self.smoothed_ms < self.baseline_ms:
+                self.baseline_ms = self.smoothed_ms
+            else:
+                self.baseline_ms += _BASELINE_ALPHA * (self.smoothed_ms - self.baseline_ms)
+
+        if self.smoothed_ms > self.baseline_ms * self.latency_tolerance:
+            self._decrease(self.latency_backoff, "latency")
+        elif self.in_flight >= self.limit / 2:
+            # Only grow a limit that is being used; idle headroom says nothing about capacity
+            self._set_limit(self.limit + 1 / self.limit)
+
+    def on_rate_limit(self):
+        """Feeds a rate-limit (429) error."""
+        if self.adaptive:
+            self._decrease(self.backoff, "rate_limit")
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "limit": self.limit,
+            "lowest": self.lowest,
+            "highest": self.highest,
+            "in_flight": self.in_flight,
+            "rate_limit_cuts": self.decreases["rate_limit"],
+            "latency_cuts": self.decreases["latency"],
+        }
+
+    def describe(self) -> str:
+        """Short live status for progress bars."""
+        return f"limit {int(self.limit)}, in flight {self.in_flight}"
+
+
+_concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+
+
+def get_concurrency_limiter() -> AdaptiveConcurrencyLimiter:
+    """Returns the process-wide limiter bounding in-flight LLM calls across all agents."""
+    global _concurrency_limiter
+    if _concurrency_limiter is None:
+        _concurrency_limiter = AdaptiveConcurrencyLimiter()
+    return _concurrency_limiter
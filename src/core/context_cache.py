@@ -0,0 +1,138 @@
+import json
+import time
+import asyncio
+import hashlib
+from typing import Dict, Optional
+from src.core.preprocess import count_tokens
+from config.settings import CONTEXT_CACHE_TTL_S, CONTEXT_CACHE_REFRESH_MARGIN_S
+
+
+class ContextCacheManager:
+    """
+    Explicit provider-side caches of large static prompt prefixes (system prompt + document body).
+
+    The first call with a given (model, system prompt, prefix) creates the cache; concurrent
+    and later calls reuse it, so the fast, advanced and refine calls of one document send and
+    prefill the document once and are billed the cached-input rate for it afterwards.
+    Caches are created with a TTL and re-created when they would expire within the refresh
+    margin. `release` deletes a document's cache once its sample is done (storage is billed
+    per hour) and `close` deletes the rest. Prefixes below the provider minimum, and any
+    prefix whose cache could not be created, are sent inline as usual.
+    """
+
+    def __init__(self, backend, ttl_s: float = CONTEXT_CACHE_TTL_S,
+                 refresh_margin_s: float = CONTEXT_CACHE_REFRESH_MARGIN_S):
+        """
+        Args:
+            backend: LlmBackend the caches are created on (calls using them must go to the same provider).
+            ttl_s: Server-side lifetime of each cache.
+            refresh_margin_s: A cache expiring within this many seconds is re-created rather than reused.
+        """
+        self.backend = backend
+        self.ttl_s = ttl_s
+        self.refresh_margin_s = refresh_margin_s
+        self.created = 0
+        self.reused = 0
+        self.skipped = 0  # Lookups below the provider minimum
+        self.failed = 0
+        self.deleted = 0
+        self.token_seconds = 0.0  # Cached tokens x seconds alive, for the storage cost
+        self._entries: Dict[str, dict] = {}
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, prefix: str) -> str:
+        payload = json.dumps([model, system_prompt, prefix], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def _create(self, model: str, system_prompt: str, prefix: str) -> Optional[str]:
+        try:
+            name = await self.backend.create_context_cache(model, system_prompt, prefix, self.ttl_s)
+        except Exception as e:
+            self.failed += 1
+            print(f"Context cache creation failed (sending the prefix inline): {e}")
+            return None
+        self.created += 1
+        return name
+
+    async def lookup(self, model: str, system_prompt: str, prefix: str) -> Optional[str]:
+        """
+        Returns the name of a live cache holding `system_prompt` + `prefix`, creating it on
+        first use, or None if the prefix should be sent inline.
+        """
+        if not self.backend.supports_context_cache:
+            return None
+        tokens = count_tokens(system_prompt) + count_tokens(prefix)
+        if tokens < self.backend.context_cache_min_tokens(model):
+            self.skipped += 1
+            return None
+
+        key = self.make_key(model, system_prompt, prefix)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry["expires_at"] - self.refresh_margin_s <= now:
+            # Left to expire server-side: calls still in flight may be using it
+            self._retire(self._entries.pop(key), entry["expires_at"])
+            entry = None
+        if entry is None:
+            entry = {
+                "task": asyncio.ensure_future(self._create(model, system_prompt, prefix)),
+                "tokens": tokens,
+                "created_at": now,
+                "expires_at": now + self.ttl_s,
+            }
+            self._entries[key] = entry
+            return await asyncio.shield(entry["task"])
+
+        name = await asyncio.shield(entry["task"])
+        if name is not None:
+            self.reused += 1
+        return name
+
+    def invalidate(self, model: str, system_prompt: str, prefix: str):
+        """Forgets a cache the provider no longer has (e.g. expired early); the next lookup re-creates it."""
+        entry = self._entries.pop(self.make_key(model, system_prompt, prefix), None)
+        if entry is not None:
+            self._retire(entry, time.monotonic())
+
+    def _retire(self, entry: dict, ended_at: float):
+        task = entry["task"]
+        if task.done() and task.result() is not None:
+            self.token_seconds += entry["tokens"] * max(0.0, min(ended_at, entry["expires_at"]) - entry["created_at"])
+
+    async def _delete(self, entry: dict):
+        name = await asyncio.shield(entry["task"])
+        self._retire(entry, time.monotonic())
+        if name is None:
+            return
+        try:
+            await self.backend.delete_context_cache(name)
+            self.deleted += 1
+        except Exception as e:
+            print(f"Error deleting context cache {name} (it expires after its TTL): {e}")
+
+    async def release(self, model: str, system_prompt: str, prefix: str):
+        """Deletes the cache of a prefix that will not be used again (no-op if there is none)."""
+        entry = self._entries.pop(self.make_key(model, system_prompt, prefix), None)
+        if entry is not None:
+            await self._delete(entry)
+
+    async def close(self):
+        """Deletes every cache still alive."""
+        entries = list(self._entries.values())
+        self._entries.clear()
+        await asyncio.gather(*(self._delete(entry) for entry in entries))
+
+    @property
+    def token_hours(self) -> float:
+        return self.token_seconds / 3600
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "created": self.created,
+            "reused": self.reused,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "deleted": self.deleted,
+            "live": len(self._entries),
+            "token_hours": self.token_hours,
+        }
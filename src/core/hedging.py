@@ -0,0 +1,117 @@
+import math
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, List, Optional
+from config.settings import (
+    HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_MIN_DELAY_MS, HEDGE_BUDGET_RATIO, LATENCY_WINDOW
+)
+
+# Upper bounds (ms) of the report buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2000, 3000, 4000, 6000, 10000, 20000, 60000)
+
+
+class LatencyHistogram:
+    """
+    Call latencies of one agent: a rolling window of recent calls (used for
+    percentiles, so the hedge threshold follows the API's current behaviour) plus
+    fixed bucket counts over the whole run for the end-of-run report.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self._recent = deque(maxlen=window)
+
+    def record(self, latency_ms: float):
+        self._recent.append(latency_ms)
+        self.counts[bisect_left(self.buckets_ms, latency_ms)] += 1
+        self.count += 1
+
+    @property
+    def recent(self) -> int:
+        return len(self._recent)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Nearest-rank percentile (p in 0-100) of the recent window, or None if it is empty."""
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        return ordered[max(0, math.ceil(len(ordered) * p / 100) - 1)]
+
+    def format(self, width: int = 40) -> List[str]:
+        """Text bars of the bucket counts, one line per non-empty bucket."""
+        lines = []
+        peak = max(self.counts) or 1
+        low = 0
+        for high, count in zip(list(self.buckets_ms) + [None], self.counts):
+            label = f"{low:>6}-{high:<6}ms" if high is not None else f"{low:>6}+{'':<6}ms"
+            if count:
+                lines.append(f"{label} {'#' * max(1, round(count / peak * width)):<{width}} {count}")
+            low = high
+        return lines
+
+
+class HedgePolicy:
+    """
+    When to send a duplicate of a slow call, and how many duplicates are allowed.
+
+    A call that has not returned after the HEDGE_PERCENTILE of the agent's recent
+    latency is duplicated; the first response wins and the other call is cancelled.
+    Duplicates are capped at `budget_ratio` of all calls, which bounds the extra spend.
+    """
+
+    def __init__(self, percentile: float = HEDGE_PERCENTILE, budget_ratio: float = HEDGE_BUDGET_RATIO,
+                 min_samples: int = HEDGE_MIN_SAMPLES, min_delay_ms: float = HEDGE_MIN_DELAY_MS):
+        """
+        Args:
+            percentile: Recent-latency percentile after which a call is hedged.
+            budget_ratio: Maximum hedges as a fraction of calls made.
+            min_samples: Calls observed before hedging starts.
+            min_delay_ms: Lower bound of the hedge delay.
+        """
+        self.percentile = percentile
+        self.budget_ratio = budget_ratio
+        self.min_samples = min_samples
+        self.min_delay_ms = min_delay_ms
+        self.calls = 0
+        self.hedges = 0
+        self.wins = 0
+        self.extra_tokens = 0  # Estimated prompt tokens sent by hedges
+
+    def delay_s(self, latency: LatencyHistogram) -> Optional[float]:
+        """Seconds to wait before hedging a call, or None while there are too few samples."""
+        if latency.recent < self.min_samples:
+            return None
+        return max(latency.percentile(self.percentile), self.min_delay_ms) / 1000
+
+    def try_spend(self, estimated_tokens: int) -> bool:
+        """Claims one hedge from the budget; False once hedges would exceed budget_ratio of calls."""
+        if self.hedges + 1 > self.budget_ratio * self.calls:
+            return False
+        self.hedges += 1
+        self.extra_tokens += estimated_tokens
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "wins": self.wins,
+            "hedge_rate": self.hedges / self.calls if self.calls else 0.0,
+            "extra_tokens": self.extra_tokens,
+        }
+
+
+def format_latency_report(name: str, latency: LatencyHistogram, hedge: Optional[HedgePolicy] = None) -> List[str]:
+    """Report lines for one agent: latency percentiles, histogram and hedging counters."""
+    if not latency.count:
+        return [f"{name}: no API calls"]
+    p50, p95, p99 = (latency.percentile(p) for p in (50, 95, 99))
+    lines = [f"{name}: {latency.count} calls, recent p50/p95/p99 {p50:.0f} / {p95:.0f} / {p99:.0f} ms"]
+    lines += [f"  {line}" for line in latency.format()]
+    if hedge is not None:
+        stats = hedge.stats()
+        lines.append(f"  Hedged {stats['hedges']}/{stats['calls']} calls ({stats['hedge_rate']:.1%}), "
+                     f"hedge won {stats['wins']}, ~{stats['extra_tokens']} extra prompt tokens")
+    return lines
@@ -1,106 +1,556 @@
 import os
+import json
+import time
 import asyncio
-from typing import Any, Type
+import threading
+from collections import OrderedDict, deque
+from typing import Any, List, Optional, Tuple, Type
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from google import genai
-from google.genai import types
-from config.settings import MAX_RETRIES, BASE_RETRY_DELAY
+from src.core.backends import GeminiBackend, LlmBackend
+from src.core.cache import ResponseCache, get_response_cache
+from src.core.concurrency import AdaptiveConcurrencyLimiter, get_concurrency_limiter
+from src.core.context_cache import ContextCacheManager
+from src.core.hedging import HedgePolicy, LatencyHistogram
+from src.core.tracing import get_tracer
+from src.core.streaming import JsonStringFieldParser
+from src.core.preprocess import count_tokens
+from config.settings import MAX_RETRIES, BASE_RETRY_DELAY, MAX_RPM, MAX_TPM
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate used to reserve TPM capacity before a call is sent."""
+    return count_tokens(text)
+
+
+def is_context_cache_error(error_str: str) -> bool:
+    """Whether a (lower-cased) error message says the referenced context cache is gone."""
+    return "cached content" in error_str or "cachedcontent" in error_str
+
+
+class RateLimiter:
+    """
+    Async limiter enforcing MAX_RPM and MAX_TPM over a rolling 60-second window.
+
+    Callers reserve capacity with an estimated prompt token count *before* sending a
+    request and later reconcile the reservation with the real usage_metadata count.
+    Waiters are served in FIFO order.
+    """
+
+    def __init__(self, max_rpm: int = MAX_RPM, max_tpm: int = MAX_TPM, window_s: float = 60.0):
+        self.max_rpm = max_rpm
+        self.max_tpm = max_tpm
+        self.window_s = window_s
+        self._events = deque()  # [sent_at, tokens] per request still inside the window
+        self._tokens = 0
+        self._lock = None
+
+    def _prune(self, now: float):
+        while self._events and now - self._events[0][0] >= self.window_s:
+            _, tokens = self._events.popleft()
+            self._tokens -= tokens
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        """Seconds until enough old requests leave the window to admit a new one."""
+        wait = 0.0
+        if len(self._events) >= self.max_rpm:
+            oldest = self._events[len(self._events) - self.max_rpm][0]
+            wait = oldest + self.window_s - now
+
+        excess = self._tokens + tokens - self.max_tpm
+        if excess > 0:
+            for sent_at, event_tokens in self._events:
+                excess -= event_tokens
+                if excess <= 0:
+                    wait = max(wait, sent_at + self.window_s - now)
+                    break
+        return max(wait, 0.01)
+
+    async def acquire(self, tokens: int) -> List:
+        """
+        Waits until the window has room for one more request of `tokens` prompt tokens.
+
+        Returns:
+            A reservation to pass to `reconcile` once the actual token count is known.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # A single oversized prompt must still be sendable once the window is empty
+        tokens = min(tokens, self.max_tpm)
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                if len(self._events) < self.max_rpm and self._tokens + tokens <= self.max_tpm:
+                    reservation = [now, tokens]
+                    self._events.append(reservation)
+                    self._tokens += tokens
+                    return reservation
+                await asyncio.sleep(self._wait_time(now, tokens))
+
+    def reconcile(self, reservation: List, actual_tokens: Optional[int]):
+        """Replaces an estimated reservation with the token count reported by the API."""
+        if actual_tokens is None:
+            return
+        if time.monotonic() - reservation[0] < self.window_s:
+            self._tokens += actual_tokens - reservation[1]
+        reservation[1] = actual_tokens
+
+
+class RateBudget(RateLimiter):
+    """
+    RPM/TPM window shared by several processes (`--workers`).
+
+    Lives in a coordinator process (see src/parallel.py) and is called through a
+    multiprocessing proxy, so its methods are synchronous and thread-safe and
+    reservations are referred to by id.
+    """
+
+    def __init__(self, max_rpm: int = MAX_RPM, max_tpm: int = MAX_TPM, window_s: float = 60.0):
+        super().__init__(max_rpm, max_tpm, window_s)
+        self._thread_lock = threading.Lock()
+        self._reservations: "OrderedDict[int, List]" = OrderedDict()
+        self._next_id = 0
+
+    def try_acquire(self, tokens: int) -> Tuple[Optional[int], float]:
+        """Returns (reservation id, 0) if a request fits the window now, else (None, seconds to wait)."""
+        tokens = min(tokens, self.max_tpm)
+        with self._thread_lock:
+            now = time.monotonic()
+            self._prune(now)
+            # Reservations that were never reconciled have left the window
+            while self._reservations and now - next(iter(self._reservations.values()))[0] >= self.window_s:
+                self._reservations.popitem(last=False)
+            if len(self._events) < self.max_rpm and self._tokens + tokens <= self.max_tpm:
+                reservation = [now, tokens]
+                self._events.append(reservation)
+                self._tokens += tokens
+                self._next_id += 1
+                self._reservations[self._next_id] = reservation
+                return self._next_id, 0.0
+            return None, self._wait_time(now, tokens)
+
+    def reconcile_id(self, reservation_id: int, actual_tokens: Optional[int]):
+        with self._thread_lock:
+            reservation = self._reservations.pop(reservation_id, None)
+            if reservation is not None:
+                self.reconcile(reservation, actual_tokens)
+
+
+class SharedRateLimiter:
+    """
+    Worker-side RateLimiter drop-in that reserves capacity from a RateBudget proxy.
+    Proxy calls are blocking IPC, so they run in the default thread pool.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+
+    async def acquire(self, tokens: int) -> int:
+        loop = asyncio.get_running_loop()
+        while True:
+            reservation_id, wait = await loop.run_in_executor(None, self.budget.try_acquire, tokens)
+            if reservation_id is not None:
+                return reservation_id
+            await asyncio.sleep(wait)
+
+    def reconcile(self, reservation: int, actual_tokens: Optional[int]):
+        if actual_tokens is None:
+            return
+        asyncio.get_running_loop().run_in_executor(None, self.budget.reconcile_id, reservation, actual_tokens)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Returns the process-wide limiter shared by all agents."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
 class LlmAgent:
-    def __init__(self, model: str = "gemini-2.0-flash", system_prompt: str = "", output_type: Type[BaseModel] = None):
+    def __init__(self, model: str = "gemini-2.0-flash", system_prompt: str = "", output_type: Type[BaseModel] = None,
+                 result_type: Optional[Type[BaseModel]] = None, rate_limiter: Optional[RateLimiter] = None, concurrency: Optional[AdaptiveConcurrencyLimiter] = None,
+                 cache: Optional[ResponseCache] = None, backend: Optional[LlmBackend] = None,
+                 hedge: Optional[HedgePolicy] = None, context_cache: Optional[ContextCacheManager] = None):
         """
-        Initializes the LLM Agent using Google Gemini API.
+        Initializes the LLM Agent (Google Gemini API unless another backend is given).
         
         Args:
             model: Model name (e.g., 'gemini-2.0-flash').
             system_prompt: System instruction.
-            output_type: Pydantic model class for structured output.
+            output_type: Pydantic model class for structured output (sent as the response schema,
+                so it should only hold fields the model generates).
+            result_type: Model returned to the caller, usually `output_type` extended with
+                client-side measurement fields (usage, timings); defaults to `output_type`.
+            rate_limiter: RPM/TPM limiter; defaults to the process-wide shared limiter.
+            concurrency: Limiter whose slot is held only for the duration of each API call
+                and which adapts to call outcomes; defaults to the process-wide limiter.
+            cache: On-disk response cache; defaults to the process-wide cache.
+            backend: LLM provider; defaults to GeminiBackend (requires GOOGLE_API_KEY).
+            hedge: Optional hedging policy for `async_run` calls (None = never hedge).
+            context_cache: Optional explicit context caching of the system prompt plus the `prefix`
+                of async calls (None = always send the full prompt).
         """
         self.model_name = model
         self.system_prompt = system_prompt
         self.output_type = output_type
-        
-        api_key = os.environ.get("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY environment variable not found. Please set it in your .env file.")
-        
-        self.client = genai.Client(api_key=api_key)
+        self.result_type = result_type or output_type
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.concurrency = concurrency or get_concurrency_limiter()
+        self.cache = cache or get_response_cache()
+        self.backend = backend or GeminiBackend()
+        self.hedge = hedge
+        self.context_cache = context_cache
+        self.latency = LatencyHistogram()  # Per-call latency of `async_run` requests
 
-    def run(self, prompt: str) -> Any:
+    def _to_output(self, data: dict, usage: Optional[dict], timings: Optional[dict] = None) -> Any:
+        """
+        Builds the `result_type` object from parsed JSON, injecting usage metadata and
+        connection timings if available (only the fields the result type defines).
+        """
+        data = dict(data)
+        if usage:
+            data["tokens_input"] = usage["prompt_token_count"]
+            data["tokens_output"] = usage["candidates_token_count"]
+            if usage.get("cached_content_token_count") and "tokens_cached" in self.result_type.model_fields:
+                data["tokens_cached"] = usage["cached_content_token_count"]
+        if timings:
+            data.update({k: v for k, v in timings.items() if k in self.result_type.model_fields})
+        return self.result_type(**data)
+
+    def _cached_output(self, entry: dict) -> Any:
+        """
+        Output of a response cache hit. Result types with a `cached_latency_ms` field get
+        the original call's latency, so replayed rows keep reporting what the call took.
+        """
+        return self._to_output(entry["data"], entry["usage"], {"cached_latency_ms": entry.get("latency_ms")})
+
+    async def _context_cache_name(self, prefix: str) -> Optional[str]:
+        """Name of the context cache holding the system prompt + `prefix`, or None to send them inline."""
+        if self.context_cache is None:
+            return None
+        with get_tracer().span("llm.context_cache"):
+            return await self.context_cache.lookup(self.model_name, self.system_prompt, prefix)
+
+    def run(self, prompt: str, prefix: str = "") -> Any:
         """
         Executes the prompt and returns a structured object using Gemini's structured output.
         """
+        prompt = prefix + prompt
+        cache_key = self.cache.make_key(self.model_name, self.system_prompt, self.output_type, prompt)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return self._cached_output(cached)
+
         try:
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    system_instruction=self.system_prompt,
-                    response_mime_type="application/json",
-                    response_schema=self.output_type,
-                )
-            )
+            start = time.perf_counter()
+            response = self.backend.generate(self.model_name, self.system_prompt, self.output_type, prompt)
             
             # Parse the JSON response into the Pydantic model
-            import json
             data = json.loads(response.text)
-            
-            # Inject usage metadata if available
-            if response.usage_metadata:
-                data["tokens_input"] = response.usage_metadata.prompt_token_count
-                data["tokens_output"] = response.usage_metadata.candidates_token_count
-                
-            return self.output_type(**data)
+            usage = response.usage
+            output = self._to_output(data, usage, response.timings)
+            self.cache.put(cache_key, data, usage, latency_ms=(time.perf_counter() - start) * 1000)
+            return output
             
         except Exception as e:
-            print(f"Error in LlmAgent run (Gemini): {e}")
+            print(f"Error in LlmAgent run: {e}")
             raise e
 
-    async def async_run(self, prompt: str) -> Any:
+    async def async_run(self, prompt: str, prefix: str = "") -> Any:
         """
         Executes the prompt asynchronously with retry logic for rate limits.
+        Waits for RPM/TPM capacity before each request is sent, and holds a
+        concurrency slot only while the request is in flight.
+        Cache hits return immediately without touching the limiter.
+        With a hedge policy, slow requests are duplicated (see `_agenerate`).
+
+        Args:
+            prompt: The prompt (with a `prefix`, the part that follows it).
+            prefix: Static leading part of the prompt shared with other calls (e.g. the
+                document body); with a context cache it is sent once and reused.
         """
+        with get_tracer().span("llm.call", agent=self.result_type.__name__ if self.result_type else None) as call_span:
+            return await self._traced_run(prompt, prefix, call_span)
+
+    async def _traced_run(self, prompt: str, prefix: str, call_span) -> Any:
+        tracer = get_tracer()
+        full_prompt = prefix + prompt
+        cache_key = self.cache.make_key(self.model_name, self.system_prompt, self.output_type, full_prompt)
+        cached = self.cache.get(cache_key)
+        call_span.set(cache="hit" if cached is not None else "miss")
+        if cached is not None:
+            return self._cached_output(cached)
+
+        start = time.perf_counter()
+        estimated_tokens = estimate_tokens(self.system_prompt) + estimate_tokens(full_prompt)
+        use_context_cache = True
         for attempt in range(MAX_RETRIES):
+            cached_content = await self._context_cache_name(prefix) if use_context_cache else None
             try:
-                response = await self.client.aio.models.generate_content(
-                    model=self.model_name,
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        system_instruction=self.system_prompt,
-                        response_mime_type="application/json",
-                        response_schema=self.output_type,
-                    )
-                )
+                queued = tracer.start_span("llm.queue")
+                async with self.concurrency:
+                    queued.end()
+                    with tracer.span("llm.rate_limit"):
+                        reservation = await self.rate_limiter.acquire(estimated_tokens)
+                    sent = time.perf_counter()
+                    with tracer.span("llm.network", attempt=attempt):
+                        response = await self._agenerate(prompt if cached_content else full_prompt,
+                                                         estimated_tokens, cached_content)
+                    self.concurrency.on_success((time.perf_counter() - sent) * 1000)
                 
+                usage = response.usage
+                if usage:
+                    self.rate_limiter.reconcile(reservation, usage["prompt_token_count"])
+
                 # Parse the JSON response into the Pydantic model
-                import json
-                data = json.loads(response.text)
-                
-                # Inject usage metadata if available
-                if response.usage_metadata:
-                    data["tokens_input"] = response.usage_metadata.prompt_token_count
-                    data["tokens_output"] = response.usage_metadata.candidates_token_count
-                    
-                return self.output_type(**data)
+                with tracer.span("llm.parse"):
+                    data = json.loads(response.text)
+                    output = self._to_output(data, usage, response.timings)
+                self.cache.put(cache_key, data, usage, latency_ms=(time.perf_counter() - start) * 1000)
+                return output
                 
             except Exception as e:
                 error_str = str(e).lower()
                 if "rate" in error_str or "quota" in error_str or "429" in error_str:
+                    self.concurrency.on_rate_limit()
+                    if attempt < MAX_RETRIES - 1:
+                        delay = BASE_RETRY_DELAY * (2 ** attempt)  # Exponential backoff
+                        with tracer.span("llm.backoff", delay_s=delay):
+                            await asyncio.sleep(delay)
+                    else:
+                        print(f"Rate limit exceeded after {MAX_RETRIES} retries")
+                        raise e
+                elif cached_content and is_context_cache_error(error_str) and attempt < MAX_RETRIES - 1:
+                    # Expired or deleted under us: forget it and send the prefix inline
+                    print(f"Context cache {cached_content} unusable, retrying inline: {e}")
+                    self.context_cache.invalidate(self.model_name, self.system_prompt, prefix)
+                    use_context_cache = False
+                else:
+                    print(f"Error in LlmAgent async_run: {e}")
+                    raise e
+
+    async def _timed_generate(self, prompt: str, cached_content: Optional[str] = None) -> Any:
+        """One backend call, recorded in the latency histogram once it answers (not when cancelled by a hedge)."""
+        start = time.perf_counter()
+        response = await self.backend.agenerate(self.model_name, self.system_prompt, self.output_type, prompt,
+                                                cached_content=cached_content)
+        self.latency.record((time.perf_counter() - start) * 1000)
+        return response
+
+    async def _hedge_generate(self, prompt: str, estimated_tokens: int, reservations: List,
+                              cached_content: Optional[str] = None) -> Any:
+        # Rate limits still apply, but not the concurrency slot: the primary already holds
+        # one, and waiting for another under load would defeat the hedge. The reservation is
+        # handed back through `reservations`, since a losing duplicate is cancelled before it returns.
+        reservations.append(await self.rate_limiter.acquire(estimated_tokens))
+        return await self._timed_generate(prompt, cached_content)
+
+    async def _agenerate(self, prompt: str, estimated_tokens: int, cached_content: Optional[str] = None) -> Any:
+        """
+        Sends the request; with hedging enabled, a duplicate is sent if it is still
+        running after the hedge delay, and the first successful response wins.
+        """
+        if self.hedge is None:
+            return await self._timed_generate(prompt, cached_content)
+        delay = self.hedge.delay_s(self.latency)
+        self.hedge.calls += 1
+        if delay is None:
+            return await self._timed_generate(prompt, cached_content)
+
+        primary = asyncio.ensure_future(self._timed_generate(prompt, cached_content))
+        tasks = {primary}
+        reservations = []  # The duplicate's, once it is admitted by the rate limiter
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self.hedge.try_spend(estimated_tokens):
+                tasks.add(asyncio.ensure_future(
+                    self._hedge_generate(prompt, estimated_tokens, reservations, cached_content)))
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge.wins += 1
+                        response = task.result()
+                        # Both requests carried the same prompt: the caller reconciles the
+                        # primary's reservation, the duplicate's is reconciled here
+                        usage = response.usage
+                        if usage:
+                            for reservation in reservations:
+                                self.rate_limiter.reconcile(reservation, usage["prompt_token_count"])
+                        return response
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def async_stream(self, prompt: str, field: str = "content", prefix: str = "") -> "StreamingCall":
+        """
+        Executes the prompt with the provider's streaming endpoint.
+
+        Returns a StreamingCall: an async iterator of text deltas of `field`, whose
+        `result()` is the parsed structured output. Rate limiting, concurrency,
+        caching, context caching of `prefix` and 429 retries (before the first delta)
+        match `async_run`.
+        """
+        return StreamingCall(self, prompt, field, prefix)
+
+class StreamingCall:
+    """
+    Streaming LlmAgent call.
+
+    Iterate it (`async for delta in call`) to receive text deltas of one string field of
+    the structured output as they arrive; `await call.result()` returns the parsed output.
+    Records time-to-first-token (ttft_ms) and total latency (latency_ms).
+
+    The backend stream is read by a separate task that holds the concurrency slot and
+    queues deltas without bound, so the slot is released when the response is complete
+    (or the call is closed / cancelled), however slowly the caller consumes the deltas.
+    """
+
+    def __init__(self, agent: "LlmAgent", prompt: str, field: str = "content", prefix: str = ""):
+        self.agent = agent
+        self.prompt = prompt
+        self.prefix = prefix
+        self.field = field
+        self.ttft_ms: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self._output = None
+        self._iterator = None
+
+    def __aiter__(self):
+        if self._iterator is None:
+            self._iterator = self._iterate()
+        return self._iterator
+
+    async def result(self) -> Any:
+        """Drains any remaining deltas and returns the parsed structured output."""
+        async for _ in self:
+            pass
+        return self._output
+
+    def _mark_delta(self, start: float):
+        if self.ttft_ms is None:
+            self.ttft_ms = (time.perf_counter() - start) * 1000
+
+    async def _pump(self, prompt: str, cached_content: Optional[str], estimated_tokens: int, attempt: int,
+                    start: float, parser: JsonStringFieldParser, chunks: List[str], deltas: asyncio.Queue):
+        """
+        Reads one backend stream inside a concurrency slot, collecting the raw chunks and
+        queueing the field's deltas; never waits on the consumer. Records latency_ms.
+        Returns (rate-limit reservation, usage, timings).
+        """
+        agent = self.agent
+        tracer = get_tracer()
+        usage = None
+        timings = None
+        queued = tracer.start_span("llm.queue")
+        async with agent.concurrency:
+            queued.end()
+            with tracer.span("llm.rate_limit"):
+                reservation = await agent.rate_limiter.acquire(estimated_tokens)
+            sent = time.perf_counter()
+            with tracer.span("llm.stream", attempt=attempt):
+                async for chunk in agent.backend.astream(agent.model_name, agent.system_prompt, agent.output_type,
+                                                         prompt, cached_content=cached_content):
+                    chunks.append(chunk.text)
+                    usage = chunk.usage or usage
+                    timings = chunk.timings or timings
+                    delta = parser.feed(chunk.text)
+                    if delta:
+                        self._mark_delta(start)
+                        deltas.put_nowait(delta)
+            agent.concurrency.on_success((time.perf_counter() - sent) * 1000)
+        self.latency_ms = (time.perf_counter() - start) * 1000  # Complete response, not the caller's pace
+        return reservation, usage, timings
+
+    async def _iterate(self):
+        agent = self.agent
+        tracer = get_tracer()
+        start = time.perf_counter()
+        full_prompt = self.prefix + self.prompt
+        cache_key = agent.cache.make_key(agent.model_name, agent.system_prompt, agent.output_type, full_prompt)
+        cached = agent.cache.get(cache_key)
+        if cached is not None:
+            self._output = agent._cached_output(cached)
+            text = getattr(self._output, self.field, "") or ""
+            if text:
+                self._mark_delta(start)
+                yield text
+            # Report what the original call took, not the replay
+            self.latency_ms = (time.perf_counter() - start) * 1000
+            if cached["latency_ms"] is not None:
+                self.latency_ms = cached["latency_ms"]
+                self.ttft_ms = cached["ttft_ms"]
+            return
+
+        estimated_tokens = estimate_tokens(agent.system_prompt) + estimate_tokens(full_prompt)
+        use_context_cache = True
+        for attempt in range(MAX_RETRIES):
+            cached_content = await agent._context_cache_name(self.prefix) if use_context_cache else None
+            prompt = self.prompt if cached_content else full_prompt
+            parser = JsonStringFieldParser(self.field)
+            chunks: List[str] = []
+            yielded = False
+            deltas: asyncio.Queue = asyncio.Queue()
+            pump = asyncio.ensure_future(self._pump(prompt, cached_content, estimated_tokens, attempt, start,
+                                                    parser, chunks, deltas))
+            pump.add_done_callback(lambda _: deltas.put_nowait(None))
+            try:
+                try:
+                    while True:
+                        delta = await deltas.get()
+                        if delta is None:
+                            break
+                        yielded = True
+                        yield delta
+                finally:
+                    if not pump.done():
+                        pump.cancel()  # Closed or cancelled by the caller: free the slot
+                reservation, usage, timings = pump.result()
+
+                if usage:
+                    agent.rate_limiter.reconcile(reservation, usage["prompt_token_count"])
+
+                with tracer.span("llm.parse"):
+                    data = json.loads("".join(chunks))
+                    self._output = agent._to_output(data, usage, timings)
+                agent.cache.put(cache_key, data, usage, latency_ms=self.latency_ms, ttft_ms=self.ttft_ms)
+                return
+
+            except Exception as e:
+                error_str = str(e).lower()
+                # Deltas already handed to the caller cannot be retracted, so only retry before the first one
+                is_rate_limit = "rate" in error_str or "quota" in error_str or "429" in error_str
+                if is_rate_limit:
+                    agent.concurrency.on_rate_limit()
+                if not yielded and is_rate_limit:
                     if attempt < MAX_RETRIES - 1:
                         delay = BASE_RETRY_DELAY * (2 ** attempt)  # Exponential backoff
                         await asyncio.sleep(delay)
                     else:
                         print(f"Rate limit exceeded after {MAX_RETRIES} retries")
                         raise e
+                elif not yielded and cached_content and is_context_cache_error(error_str) and attempt < MAX_RETRIES - 1:
+                    print(f"Context cache {cached_content} unusable, retrying inline: {e}")
+                    agent.context_cache.invalidate(agent.model_name, agent.system_prompt, self.prefix)
+                    use_context_cache = False
                 else:
-                    print(f"Error in LlmAgent async_run (Gemini): {e}")
+                    print(f"Error in LlmAgent stream: {e}")
                     raise e
 
+
 class LoopAgent:
     def __init__(self, agent, **kwargs):
         self.agent = agent
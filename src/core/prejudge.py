@@ -0,0 +1,154 @@
+import re
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from src.schema import JudgeFeedback, SummaryOutput
+from config.settings import (
+    MAX_SUMMARY_CHARS, PREJUDGE_PASS_THRESHOLD, PREJUDGE_FAIL_THRESHOLD, PREJUDGE_AUDIT_RATE, PREJUDGE_WEIGHTS
+)
+
+_WORD_RE = re.compile(r"\w+")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+_TOP_SOURCE_ENTITIES = 10
+_SCRIPT_SAMPLE_CHARS = 20_000  # Enough text to tell the script of a page
+_SCRIPTS = {
+    "LATIN": re.compile(r"[A-Za-z\u00c0-\u024f\u1e00-\u1eff]"),
+    "GREEK": re.compile(r"[\u0370-\u03ff]"),
+    "CYRILLIC": re.compile(r"[\u0400-\u04ff]"),
+    "HEBREW": re.compile(r"[\u0590-\u05ff]"),
+    "ARABIC": re.compile(r"[\u0600-\u06ff\u0750-\u077f]"),
+    "DEVANAGARI": re.compile(r"[\u0900-\u097f]"),
+    "THAI": re.compile(r"[\u0e00-\u0e7f]"),
+    "CJK": re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]"),
+}
+
+
+def dominant_script(text: str) -> Optional[str]:
+    """Most frequent script among the letters of `text` (e.g. LATIN, HEBREW, CJK), or None."""
+    sample = text[:_SCRIPT_SAMPLE_CHARS]
+    counts = {script: len(pattern.findall(sample)) for script, pattern in _SCRIPTS.items()}
+    script = max(counts, key=counts.get)
+    return script if counts[script] else None
+
+
+def _entities(words: List[str], common_words: set) -> List[str]:
+    """Capitalized words never seen in lowercase: a cheap proxy for names (skips sentence starts)."""
+    return [w for w in words if len(w) > 1 and w[0].isupper() and w.lower() not in common_words]
+
+
+def _normalize_number(number: str) -> str:
+    return number.replace(",", "").rstrip(".")
+
+
+def _ngrams(tokens: List[str], n: int) -> Counter:
+    return Counter(zip(*(tokens[i:] for i in range(n))))
+
+
+def ngram_precision(summary_tokens: List[str], source_tokens: List[str], n: int) -> float:
+    """ROUGE-N precision of the summary against the source: share of summary n-grams found in it."""
+    summary_ngrams = _ngrams(summary_tokens, n)
+    total = sum(summary_ngrams.values())
+    if total == 0:
+        return 1.0
+    source_ngrams = _ngrams(source_tokens, n)
+    return sum(min(count, source_ngrams[gram]) for gram, count in summary_ngrams.items()) / total
+
+
+@dataclass
+class PreJudgeVerdict:
+    """Outcome of the local pre-check: decision is "PASS", "FAIL" or "UNSURE"."""
+    decision: str
+    score: float
+    checks: Dict[str, float] = field(default_factory=dict)
+    reasons: List[str] = field(default_factory=list)
+
+    def to_feedback(self) -> JudgeFeedback:
+        critique = None if self.decision == "PASS" else "; ".join(self.reasons) or "Low overlap with the source content."
+        return JudgeFeedback(status=self.decision, score_accuracy=round(self.score, 3), critique=critique)
+
+
+class PreJudgeGate:
+    """
+    Deterministic local pre-check run before the LLM judge.
+
+    Scores a summary on length vs MAX_SUMMARY_CHARS, script/language match with the
+    source, number and entity overlap with the source, coverage of the source's
+    most frequent entities, and ROUGE-1/2 precision against the source. Clear cases
+    are decided locally (PASS, or FAIL with a critique for the refine step); only
+    UNSURE summaries, plus an audit sample, go to the LLM judge.
+    """
+
+    def __init__(self, pass_threshold: float = PREJUDGE_PASS_THRESHOLD, fail_threshold: float = PREJUDGE_FAIL_THRESHOLD,
+                 audit_rate: float = PREJUDGE_AUDIT_RATE, weights: Dict[str, float] = PREJUDGE_WEIGHTS):
+        """
+        Args:
+            pass_threshold: Score at or above which a summary passes without the LLM judge.
+            fail_threshold: Score at or below which a summary fails without the LLM judge.
+            audit_rate: Fraction of local decisions also sent to the LLM judge, to measure agreement.
+            weights: Weights of the soft checks in the score.
+        """
+        self.pass_threshold = pass_threshold
+        self.fail_threshold = fail_threshold
+        self.audit_rate = audit_rate
+        self.weights = weights
+
+    def evaluate(self, summary: SummaryOutput, source_text: str) -> PreJudgeVerdict:
+        text = summary.content.strip()
+        if not text:
+            return PreJudgeVerdict("FAIL", 0.0, reasons=["The summary is empty."])
+
+        reasons = []
+        hard_fail = False
+        if len(text) > MAX_SUMMARY_CHARS:
+            hard_fail = True
+            reasons.append(f"The summary is {len(text)} characters; it must be under {MAX_SUMMARY_CHARS}.")
+        source_script, summary_script = dominant_script(source_text), dominant_script(text)
+        if source_script and summary_script and source_script != summary_script:
+            hard_fail = True
+            reasons.append(f"The summary is written in {summary_script.title()} script but the source is "
+                           f"{source_script.title()}; write it in the source language.")
+
+        summary_words = _WORD_RE.findall(text)
+        source_words = _WORD_RE.findall(source_text)
+        summary_tokens = [w.lower() for w in summary_words]
+        source_tokens = [w.lower() for w in source_words]
+        source_vocabulary = set(source_tokens)
+        common_words = {w for w in source_words + summary_words if w.islower()}
+
+        numbers = {_normalize_number(n) for n in _NUMBER_RE.findall(text)}
+        source_numbers = {_normalize_number(n) for n in _NUMBER_RE.findall(source_text)}
+        missing_numbers = sorted(numbers - source_numbers)
+        entities = set(_entities(summary_words, common_words))
+        missing_entities = sorted(e for e in entities if e.lower() not in source_vocabulary)
+        top_source_entities = [e for e, _ in Counter(_entities(source_words, common_words)).most_common(_TOP_SOURCE_ENTITIES)]
+        lowered_summary = text.lower()
+
+        checks = {
+            "rouge1_precision": ngram_precision(summary_tokens, source_tokens, 1),
+            "rouge2_precision": ngram_precision(summary_tokens, source_tokens, 2),
+            "number_precision": 1 - len(missing_numbers) / len(numbers) if numbers else 1.0,
+            "entity_precision": 1 - len(missing_entities) / len(entities) if entities else 1.0,
+            "entity_coverage": (sum(e.lower() in lowered_summary for e in top_source_entities) / len(top_source_entities)
+                                if top_source_entities else 1.0),
+        }
+        score = sum(self.weights[name] * value for name, value in checks.items()) / sum(self.weights.values())
+
+        if missing_numbers:
+            reasons.append(f"Numbers not found in the source: {', '.join(missing_numbers[:5])}.")
+        if missing_entities and checks["entity_precision"] < 0.8:
+            reasons.append(f"Names not found in the source: {', '.join(missing_entities[:5])}.")
+        if checks["entity_coverage"] < 0.3:
+            reasons.append(f"Key entities of the source are missing: {', '.join(top_source_entities[:5])}.")
+
+        if hard_fail or score <= self.fail_threshold:
+            decision = "FAIL"
+        elif score >= self.pass_threshold and not missing_numbers:
+            decision = "PASS"
+        else:
+            decision = "UNSURE"
+        return PreJudgeVerdict(decision, score, checks, reasons)
+
+    def should_audit(self, summary: SummaryOutput) -> bool:
+        """Deterministically picks a share of local decisions (by content hash) for an LLM audit."""
+        return zlib.crc32(summary.content.encode("utf-8")) % 10_000 < self.audit_rate * 10_000
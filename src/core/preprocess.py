@@ -0,0 +1,170 @@
+import re
+from typing import List
+from config.settings import CHARS_PER_TOKEN, NON_LATIN_CHARS_PER_TOKEN, CJK_CHARS_PER_TOKEN, MAX_CONTENT_TOKENS
+
+# Han, Hiragana/Katakana, Hangul and full-width forms: roughly one token per character
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+
+_MD_LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_BARE_URL_RE = re.compile(r"https?://\S+")
+_LIST_MARKER_RE = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+_LINK_RESIDUE_RE = re.compile(r"[\s|·•/,;:>»«<\-–—*_#()\[\]]+")
+# Anchored: the whole line must be the UI phrase (content lines merely mentioning cookies or log-ins stay)
+_BOILERPLATE_RE = re.compile(
+    r"^\W*(skip to (main )?content|accept (all )?cookies|(manage )?cookie (settings|preferences|policy)"
+    r"|privacy policy|terms (of (use|service)|and conditions)|subscribe( to (our|the) newsletter)?"
+    r"|sign (in|up|out)|log ?(in|out)|follow us( on \w+)?|share (this( \w+)?|on \w+)|back to top|menu|search)\W*$"
+    r"|^\W*we use cookies\b|^\W*(©|copyright (© ?)?\d{4})|all rights reserved\W*$",
+    re.IGNORECASE,
+)
+_BOILERPLATE_MAX_CHARS = 120  # Longer lines are treated as real content even if they match
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?。！？])\s+|(?<=[。！？])")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Script-aware token estimate. Latin text averages ~4 chars/token, while Hebrew,
+    Arabic, Cyrillic etc. tokenize closer to 2 chars/token and CJK to ~1.
+    """
+    cjk = len(_CJK_RE.findall(text))
+    non_latin = len(_NON_ASCII_RE.findall(text)) - cjk
+    latin = len(text) - cjk - non_latin
+    return max(1, int(latin / CHARS_PER_TOKEN + non_latin / NON_LATIN_CHARS_PER_TOKEN + cjk / CJK_CHARS_PER_TOKEN))
+
+
+def _is_link_list(line: str) -> bool:
+    """True for lines made (almost) only of links: nav bars, breadcrumbs, footer link lists."""
+    if not _MD_LINK_RE.search(line) and not _BARE_URL_RE.search(line):
+        return False
+    residue = _LIST_MARKER_RE.sub("", line)
+    link_text = "".join(_MD_LINK_RE.findall(residue))
+    residue = _BARE_URL_RE.sub("", _MD_LINK_RE.sub("", residue))
+    residue = _LINK_RESIDUE_RE.sub("", residue)
+    # Prose with an inline link keeps most of its text outside the link
+    return len(residue) <= max(3, len(link_text) // 4)
+
+
+def strip_boilerplate(text: str) -> str:
+    """
+    Removes page chrome from scraped markdown: link-only lines (navigation, breadcrumbs,
+    footer link lists), image-only lines, short cookie/login/copyright lines and
+    repeated short lines. Paragraph structure is preserved.
+    """
+    lines = []
+    seen_short = set()
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped:
+            if _is_link_list(stripped):
+                continue
+            if len(stripped) <= _BOILERPLATE_MAX_CHARS:
+                if _BOILERPLATE_RE.search(stripped):
+                    continue
+                # Menus and footers repeated on the page; headings and table rules are kept
+                if not _HEADING_RE.match(stripped) and not stripped.startswith("|"):
+                    if stripped in seen_short:
+                        continue
+                    seen_short.add(stripped)
+        lines.append(line.rstrip())
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def split_blocks(text: str) -> List[str]:
+    """
+    Splits markdown into blocks on blank lines and before headings. Fenced code
+    blocks are kept whole.
+    """
+    blocks: List[str] = []
+    current: List[str] = []
+    in_fence = False
+    for line in text.splitlines():
+        if line.strip().startswith("```"):
+            in_fence = not in_fence
+        elif not in_fence and (not line.strip() or _HEADING_RE.match(line)):
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            if not line.strip():
+                continue
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def _cut_block(block: str, max_tokens: int) -> str:
+    """Longest prefix of `block` within `max_tokens`, ending on a sentence or word boundary if possible."""
+    low, high = 0, len(block)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(block[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    prefix = block[:low]
+    if low == len(block):
+        return prefix
+    sentence_ends = [m.end() for m in _SENTENCE_END_RE.finditer(prefix)]
+    if sentence_ends and sentence_ends[-1] > len(prefix) // 2:
+        return prefix[:sentence_ends[-1]].rstrip()
+    space = prefix.rfind(" ")
+    if space > len(prefix) // 2:
+        return prefix[:space]
+    return prefix  # No boundary (e.g. CJK without spaces): cut on the character
+
+
+def truncate_to_budget(text: str, max_tokens: int = MAX_CONTENT_TOKENS) -> str:
+    """
+    Keeps whole blocks from the start of `text` while they fit in `max_tokens`.
+    Only a prose block may be cut (on a sentence boundary), and only if it is the
+    first block or enough budget remains; tables and code blocks are never split.
+    """
+    kept: List[str] = []
+    used = 0
+    for block in split_blocks(text):
+        tokens = count_tokens(block) + 1  # + the blank line separating blocks
+        if used + tokens <= max_tokens:
+            kept.append(block)
+            used += tokens
+            continue
+        remaining = max_tokens - used
+        is_structured = block.lstrip().startswith(("|", "```"))
+        if not kept or (remaining >= max_tokens // 4 and not is_structured):
+            kept.append(_cut_block(block, remaining))
+        break
+    return "\n\n".join(kept)
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Packs blocks into consecutive chunks of at most `max_tokens`, preferring to start
+    a new chunk at a heading once the current one is half full. Oversized blocks are
+    split on sentence boundaries.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    used = 0
+    for block in split_blocks(text):
+        while block:
+            tokens = count_tokens(block) + 1
+            at_heading = _HEADING_RE.match(block) and used >= max_tokens // 2
+            if current and (used + tokens > max_tokens or at_heading):
+                chunks.append("\n\n".join(current))
+                current, used = [], 0
+            if tokens <= max_tokens:
+                current.append(block)
+                used += tokens
+                break
+            piece = _cut_block(block, max_tokens - 1) or block[:1]
+            chunks.append(piece)
+            block = block[len(piece):].lstrip()
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def prepare_content(text: str, max_tokens: int = MAX_CONTENT_TOKENS) -> str:
+    """Strips boilerplate, then truncates to the token budget on block boundaries."""
+    return truncate_to_budget(strip_boilerplate(text), max_tokens)
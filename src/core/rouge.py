@@ -0,0 +1,108 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+import numpy as np
+
+# Same tokenization as rouge_score (lowercase, non-alphanumerics are separators)
+_NON_ALPHANUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+class RougeScore(NamedTuple):
+    precision: float
+    recall: float
+    fmeasure: float
+
+
+def lcs_length(target_masks: Dict[str, int], target_len: int, prediction: Sequence[str]) -> int:
+    """
+    Length of the longest common subsequence of a target and a prediction token list.
+
+    Bit-parallel (Allison-Dix / Hyyrö): `target_masks` maps each target token to the
+    bitmask of its positions, and one pass over the prediction updates a single
+    `target_len`-bit integer, so the cost is O(len(prediction) * target_len / 64)
+    machine-word operations inside Python's big-int arithmetic instead of a Python-level
+    DP table.
+    """
+    full = (1 << target_len) - 1
+    v = full
+    for token in prediction:
+        u = v & target_masks.get(token, 0)
+        if u:
+            v = ((v + u) | (v - u)) & full
+    return target_len - v.bit_count()
+
+
+class RougeLScorer:
+    """
+    ROUGE-L (sentence-level LCS) with the same numbers as
+    `rouge_score.rouge_scorer.RougeScorer(["rougeL"], use_stemmer=True)`.
+
+    Tokenized texts and stemmed words are memoized, so references shared by several
+    summaries (every strategy of a sample, every row of a re-scoring job) are tokenized
+    and turned into LCS bitmasks once.
+    """
+
+    def __init__(self, use_stemmer: bool = True, cache_size: int = 100_000):
+        """
+        Args:
+            use_stemmer: Porter-stem words longer than 3 characters (as rouge_score does).
+            cache_size: Texts whose tokens (and reference bitmasks) are kept.
+        """
+        self._stemmer = None
+        if use_stemmer:
+            # The stemmer rouge_score uses, so stems (and scores) match exactly
+            from nltk.stem import porter
+            self._stemmer = porter.PorterStemmer()
+        self._stems: Dict[str, str] = {}
+        self.tokenize = lru_cache(maxsize=cache_size)(self._tokenize)
+        self._target = lru_cache(maxsize=cache_size)(self._target_masks)
+
+    def _stem(self, word: str) -> str:
+        stem = self._stems.get(word)
+        if stem is None:
+            stem = self._stems[word] = self._stemmer.stem(word)
+        return stem
+
+    def _tokenize(self, text: str) -> Tuple[str, ...]:
+        words = _NON_ALPHANUM_RE.sub(" ", text.lower()).split()
+        if self._stemmer is not None:
+            words = [self._stem(w) if len(w) > 3 else w for w in words]
+        # The stemmer may return words rouge_score's final token check would drop
+        return tuple(w for w in words if w.isascii() and w.isalnum())
+
+    def _target_masks(self, text: str) -> Tuple[Dict[str, int], int]:
+        masks: Dict[str, int] = {}
+        tokens = self.tokenize(text)
+        for i, token in enumerate(tokens):
+            masks[token] = masks.get(token, 0) | (1 << i)
+        return masks, len(tokens)
+
+    def score(self, target: str, prediction: str) -> RougeScore:
+        """ROUGE-L of `prediction` against the reference `target` (argument order as in rouge_score)."""
+        masks, target_len = self._target(target)
+        prediction_tokens = self.tokenize(prediction)
+        if not target_len or not prediction_tokens:
+            return RougeScore(0.0, 0.0, 0.0)
+        lcs = lcs_length(masks, target_len, prediction_tokens)
+        precision = lcs / len(prediction_tokens)
+        recall = lcs / target_len
+        fmeasure = 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+        return RougeScore(precision, recall, fmeasure)
+
+    def score_batch(self, targets: Sequence[str], predictions: Sequence[str]) -> np.ndarray:
+        """
+        Scores (target, prediction) pairs in one call; repeated pairs are scored once.
+
+        Returns:
+            Array of shape (len(targets), 3): precision, recall and fmeasure per pair.
+        """
+        if len(targets) != len(predictions):
+            raise ValueError(f"Got {len(targets)} targets and {len(predictions)} predictions")
+        scored: Dict[Tuple[str, str], RougeScore] = {}
+        rows: List[RougeScore] = []
+        for pair in zip(targets, predictions):
+            score = scored.get(pair)
+            if score is None:
+                score = scored[pair] = self.score(*pair)
+            rows.append(score)
+        return np.array(rows, dtype=float).reshape(len(rows), 3)
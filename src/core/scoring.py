@@ -0,0 +1,123 @@
+import os
+import asyncio
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from config.settings import BERT_BATCH_SIZE, BERT_BATCH_TIMEOUT
+
+
+def bert_score_available() -> bool:
+    """Returns True if the optional bert_score package is installed."""
+    return importlib.util.find_spec("bert_score") is not None
+
+
+class BertScoringStage:
+    """
+    Long-lived BERTScore stage.
+
+    Keeps a single loaded BERTScorer alive, gathers finished summaries into
+    micro-batches (flushed by size or timeout) and scores them in a worker thread,
+    so RoBERTa inference never blocks in-flight LLM calls on the event loop.
+    """
+
+    def __init__(self, lang: str = "en", batch_size: int = BERT_BATCH_SIZE, batch_timeout: float = BERT_BATCH_TIMEOUT):
+        """
+        Args:
+            lang: Language passed to BERTScorer to pick the default model.
+            batch_size: Maximum number of pairs scored in one forward pass.
+            batch_timeout: Seconds to wait for a batch to fill before flushing it.
+        """
+        self.lang = lang
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self._scorer = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # A single thread: the scorer is not thread-safe and batches already amortize the model
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bertscore")
+
+    def _get_scorer(self):
+        if self._scorer is None:
+            # Suppress BERTScore's RoBERTa warnings and use the cached model. Imported here,
+            # not at startup: transformers (and torch) take seconds to load.
+            os.environ["TOKENIZERS_PARALLELISM"] = "false"
+            os.environ["HF_HUB_OFFLINE"] = "1"
+            import transformers
+            transformers.logging.set_verbosity_error()
+            from bert_score import BERTScorer
+            self._scorer = BERTScorer(lang=self.lang)
+        return self._scorer
+
+    def _score_batch(self, candidates: List[str], references: List[str]) -> List[float]:
+        _, _, f1 = self._get_scorer().score(candidates, references, verbose=False)
+        return f1.tolist()
+
+    def start(self):
+        """Starts the batching worker and loads the model in the background."""
+        if self._worker is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._worker = loop.create_task(self._run())
+        # Warm the model up while the first LLM calls are still in flight
+        loop.run_in_executor(self._executor, self._get_scorer)
+
+    async def score(self, candidate: str, reference: str) -> float:
+        """
+        Queues one (candidate, reference) pair and waits for its BERTScore F1.
+        """
+        if self._worker is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((candidate, reference, future))
+        return await future
+
+    async def close(self):
+        """Flushes pending pairs and stops the worker."""
+        if self._worker is not None:
+            await self._queue.put(None)
+            await self._worker
+            self._worker = None
+        self._executor.shutdown(wait=False)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = loop.time() + self.batch_timeout
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[str, str, asyncio.Future]]):
+        candidates = [candidate for candidate, _, _ in batch]
+        references = [reference for _, reference, _ in batch]
+        try:
+            scores = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._score_batch, candidates, references
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), value in zip(batch, scores):
+            if not future.done():
+                future.set_result(value)
@@ -0,0 +1,109 @@
+from typing import List
+
+
+class JsonStringFieldParser:
+    """
+    Incrementally extracts one top-level string field from a JSON object as it streams in.
+
+    Feed raw response chunks with `feed`; each call returns the newly decoded part of
+    the field's value (e.g. `SummaryOutput.content`), so text can be surfaced before
+    the JSON document is complete. Keys are matched only at the top level of the
+    object, and escape sequences split across chunks are handled.
+    """
+
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self, field: str = "content"):
+        self.field = field
+        self.done = False
+        self._pending = ""      # Undecoded tail (an incomplete escape sequence)
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._scanned = ""      # Raw text of the current top-level string, to recognise keys
+        self._last_key = None
+        self._expect_value = False
+        self._in_field = False
+        self._high_surrogate = None
+
+    def feed(self, chunk: str) -> str:
+        """Consumes a raw chunk and returns the newly decoded field text ('' if none)."""
+        if self.done:
+            return ""
+        text = self._pending + chunk
+        self._pending = ""
+        out: List[str] = []
+        i = 0
+        while i < len(text):
+            if self._in_field:
+                i = self._decode_field(text, i, out)
+                if self.done or self._pending:
+                    break
+                continue
+
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and not self._expect_value:
+                        self._last_key = self._scanned
+                if not (char == '"' and not self._in_string):
+                    self._scanned += char
+            elif char == '"':
+                if self._depth == 1 and self._expect_value and self._last_key == self.field:
+                    self._in_field = True
+                    self._expect_value = False
+                else:
+                    self._in_string = True
+                    self._scanned = ""
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+            elif char == ":" and self._depth == 1:
+                self._expect_value = True
+            elif char == "," and self._depth == 1:
+                self._expect_value = False
+                self._last_key = None
+            i += 1
+        return "".join(out)
+
+    def _decode_field(self, text: str, i: int, out: List[str]):
+        """
+        Decodes string content from text[i] and returns the new index. An incomplete
+        escape sequence at the end is kept in `_pending` for the next chunk.
+        """
+        while i < len(text):
+            char = text[i]
+            if char == '"':
+                self.done = True
+                return i + 1
+            if char != "\\":
+                out.append(char)
+                i += 1
+                continue
+            if i + 1 >= len(text):
+                self._pending = text[i:]
+                return len(text)
+            code = text[i + 1]
+            if code != "u":
+                out.append(self._ESCAPES.get(code, code))
+                i += 2
+                continue
+            if i + 6 > len(text):
+                self._pending = text[i:]
+                return len(text)
+            value = int(text[i + 2:i + 6], 16)
+            i += 6
+            if 0xD800 <= value < 0xDC00:
+                self._high_surrogate = value
+            elif 0xDC00 <= value < 0xE000 and self._high_surrogate is not None:
+                out.append(chr(0x10000 + ((self._high_surrogate - 0xD800) << 10) + (value - 0xDC00)))
+                self._high_surrogate = None
+            else:
+                out.append(chr(value))
+        return i
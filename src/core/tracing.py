@@ -0,0 +1,220 @@
+"""
+Span-based tracing of the benchmark pipeline.
+
+Spans nest through a context variable, so a span opened inside an asyncio task
+becomes the parent of spans opened by the tasks it starts. Tracing is off by
+default and then costs one attribute check per span. Finished traces are written
+in the Chrome trace event format (chrome://tracing, https://ui.perfetto.dev);
+every event also carries OpenTelemetry-style trace/span/parent ids in its args.
+"""
+import os
+import json
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+import weakref
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# (trace id, span id) of the innermost open span
+_current: ContextVar[Optional[Tuple[int, int]]] = ContextVar("trace_span", default=None)
+
+
+def _owner():
+    """The asyncio task (or thread, outside the event loop) that opens a span."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return task or threading.current_thread()
+
+
+class Span:
+    """An open span; `end()` it (or use it as a context manager) to record it."""
+
+    __slots__ = ("tracer", "name", "attrs", "span_id", "trace_id", "parent_id", "owner", "lane", "start", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: dict, activate: bool):
+        parent = _current.get()
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = next(tracer._ids)
+        self.trace_id = parent[0] if parent else self.span_id
+        self.parent_id = parent[1] if parent else None
+        self.owner = _owner()
+        self.lane = tracer._enter_lane(self.owner)
+        self._token = _current.set((self.trace_id, self.span_id)) if activate else None
+        self.start = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self, error: Optional[str] = None):
+        end = time.perf_counter()
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        if error:
+            self.attrs["error"] = error
+        self.tracer._record(self, end)
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end(exc_type.__name__ if exc_type else None)
+        return False
+
+
+class _NoopSpan:
+    """Returned while tracing is off."""
+
+    def set(self, **attrs):
+        pass
+
+    def end(self, error: Optional[str] = None):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Collects spans and counters in memory.
+
+    Each span is drawn on a "lane" (a Chrome trace thread) held by the task that
+    opened it until its outermost span ends, so spans on one lane always nest and
+    the number of lanes stays close to the pipeline's concurrency.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.spans: List[tuple] = []    # (name, start_s, end_s, lane, span_id, parent_id, trace_id, attrs)
+        self.counters: List[tuple] = []  # (name, time_s, value)
+        self._epoch = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._owners = weakref.WeakKeyDictionary()  # task/thread -> [lane, open spans]
+        self._free_lanes: List[int] = []
+        self._lanes = itertools.count(1)
+
+    def span(self, name: str, **attrs):
+        """Context manager timing a block; spans opened inside it (also in child tasks) are its children."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attrs, activate=True)
+
+    def start_span(self, name: str, **attrs):
+        """Starts a leaf span ended explicitly with `end()`, e.g. around a wait that is not a `with` block."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attrs, activate=False)
+
+    def counter(self, name: str, value: float):
+        """Records one sample of a time series (drawn as a counter track)."""
+        if self.enabled:
+            self.counters.append((name, time.perf_counter(), value))
+
+    def _enter_lane(self, owner) -> int:
+        entry = self._owners.get(owner)
+        if entry is None:
+            lane = heapq.heappop(self._free_lanes) if self._free_lanes else next(self._lanes)
+            entry = self._owners[owner] = [lane, 0]
+        entry[1] += 1
+        return entry[0]
+
+    def _record(self, span: Span, end: float):
+        self.spans.append((span.name, span.start, end, span.lane, span.span_id, span.parent_id, span.trace_id, span.attrs))
+        entry = self._owners.get(span.owner)
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._owners[span.owner]
+                heapq.heappush(self._free_lanes, entry[0])
+
+    def reset(self):
+        self.spans.clear()
+        self.counters.clear()
+
+    def chrome_trace(self) -> dict:
+        """The collected spans and counters as a Chrome trace event document."""
+        pid = os.getpid()
+
+        def us(t: float) -> float:
+            return round((t - self._epoch) * 1_000_000, 1)
+
+        events = []
+        for name, start, end, lane, span_id, parent_id, trace_id, attrs in self.spans:
+            args = {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)
+                    for key, value in attrs.items()}
+            args.update({"trace_id": f"{trace_id:032x}", "span_id": f"{span_id:016x}",
+                         "parent_span_id": f"{parent_id:016x}" if parent_id else None})
+            events.append({"name": name, "cat": name.split(".")[0], "ph": "X", "ts": us(start),
+                           "dur": round((end - start) * 1_000_000, 1), "pid": pid, "tid": lane, "args": args})
+        for name, at, value in self.counters:
+            events.append({"name": name, "ph": "C", "ts": us(at), "pid": pid, "args": {name: value}})
+        lanes = sorted({span[3] for span in self.spans})
+        events.extend({"name": "thread_name", "ph": "M", "pid": pid, "tid": lane, "args": {"name": f"lane {lane}"}}
+                      for lane in lanes)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str):
+        """Writes the trace as Chrome trace JSON (open it in chrome://tracing or Perfetto)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def stage_breakdown(self) -> List[Dict[str, float]]:
+        """Per span name: count, total and mean time and latency percentiles, sorted by total time."""
+        durations: Dict[str, List[float]] = {}
+        for name, start, end, *_ in self.spans:
+            durations.setdefault(name, []).append((end - start) * 1000)
+        rows = []
+        for name, values in durations.items():
+            values = np.asarray(values)
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            rows.append({"stage": name, "count": len(values), "total_s": values.sum() / 1000, "mean_ms": values.mean(),
+                         "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "max_ms": values.max()})
+        return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+    def format_breakdown(self) -> List[str]:
+        """The stage breakdown as report lines; `share` is total time relative to all sample spans."""
+        rows = self.stage_breakdown()
+        if not rows:
+            return ["No spans recorded."]
+        sample_total = sum(row["total_s"] for row in rows if row["stage"] == "sample") or None
+        lines = [f"{'stage':<18} {'count':>8} {'total s':>9} {'share':>7} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"]
+        for row in rows:
+            share = f"{row['total_s'] / sample_total:.1%}" if sample_total else "-"
+            lines.append(f"{row['stage']:<18} {row['count']:>8} {row['total_s']:>9.1f} {share:>7} {row['mean_ms']:>8.1f} "
+                         f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+        lines.append("(ms unless noted; share = stage time / total sample time, concurrent stages can exceed 100%)")
+        return lines
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Returns the process-wide tracer (disabled until `enabled` is set)."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def span(name: str, **attrs):
+    """Opens a span on the process-wide tracer (a no-op while tracing is off)."""
+    return get_tracer().span(name, **attrs)
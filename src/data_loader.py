@@ -1,45 +1,148 @@
+import gzip
 import json
-from typing import Generator, Optional
+from typing import Any, Generator, Iterator, Optional, TextIO
+from src.dedup import DedupIndex
 from src.schema import RawContent
 
+
+class _JsonStream:
+    """
+    Minimal incremental JSON reader.
+
+    Decodes one value at a time from a text stream with `raw_decode`, keeping only
+    the unread part of the current chunk in memory.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int = 1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Returns the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill(self.chunk_size):
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decodes the next complete JSON value."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number at the very end of the buffer may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow reads geometrically so very large items are not re-parsed per chunk
+            self._fill(size)
+            size *= 2
+
+    def array_items(self) -> Generator[Any, None, None]:
+        """Yields the items of the array starting at the current position."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Malformed array near offset {self.pos}")
+
+
 class DataLoader:
     """Streams records from the large JSON dataset."""
-    
+
     def __init__(self, file_path: str = "data/summaries_1k.json"):
+        """
+        Args:
+            file_path: A JSON file (top-level list or {"data": [...]}), or a JSONL file.
+                Either may be gzip-compressed (".gz").
+        """
         self.file_path = file_path
 
-    def load_samples(self, limit: Optional[int] = None) -> Generator[RawContent, None, None]:
+    def _open(self) -> TextIO:
+        if self.file_path.endswith(".gz"):
+            return gzip.open(self.file_path, "rt", encoding="utf-8")
+        return open(self.file_path, "r", encoding="utf-8")
+
+    def _iter_items(self, f: TextIO) -> Iterator[dict]:
+        """Yields raw records one at a time without loading the whole file."""
+        if self.file_path.endswith((".jsonl", ".jsonl.gz")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        stream = _JsonStream(f)
+        first = stream.peek()
+        # Handle dictionary with 'data' key or direct list
+        if first == "[":
+            yield from stream.array_items()
+        elif first == "{":
+            stream.expect("{")
+            while stream.peek() != "}":
+                key = stream.value()
+                stream.expect(":")
+                if key == "data" and stream.peek() == "[":
+                    yield from stream.array_items()
+                    return
+                stream.value()  # Skip other top-level values
+                if stream.peek() == ",":
+                    stream.pos += 1
+            print("Error: JSON is a dict but missing 'data' list key.")
+        else:
+            print(f"Error: Unknown JSON structure starting with {first!r}")
+
+    def load_samples(self, limit: Optional[int] = None,
+                     dedup: Optional[DedupIndex] = None) -> Generator[RawContent, None, None]:
         """
-        Yields RawContent objects.
-        
+        Yields RawContent objects lazily; memory use does not grow with dataset size.
+
         Args:
             limit: Maximum number of samples to yield.
+            dedup: Optional index that marks duplicates of earlier samples
+                (`duplicate_of` / `dedup_kind` in metadata).
         """
         count = 0
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                # Load the entire JSON content
-                data = json.load(f)
-                
-                # Handle dictionary with 'data' key or direct list
-                items = []
-                if isinstance(data, dict):
-                    if "data" in data and isinstance(data["data"], list):
-                        items = data["data"]
-                    else:
-                        print("Error: JSON is a dict but missing 'data' list key.")
-                        return
-                elif isinstance(data, list):
-                    items = data
-                else:
-                    print(f"Error: Unknown JSON structure {type(data)}")
-                    return
-
-                for item in items:
+            with self._open() as f:
+                for item in self._iter_items(f):
                     if limit and count >= limit:
                         break
-                    
-                    yield RawContent(
+
+                    content = RawContent(
                         text=item.get("markdown_content", "") or item.get("content", ""),
                         url=item.get("url"),
                         metadata={
@@ -47,6 +150,9 @@ class DataLoader:
                             "baseline_summary": item.get("summary")
                         }
                     )
+                    if dedup:
+                        dedup.annotate(content)
+                    yield content
                     count += 1
         except FileNotFoundError:
             print(f"Error: {self.file_path} not found.")
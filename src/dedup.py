@@ -0,0 +1,192 @@
+import re
+import zlib
+import asyncio
+import hashlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+import numpy as np
+from src.core.preprocess import strip_boilerplate
+from src.schema import RawContent
+from config.settings import DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_NEAR_THRESHOLD, DEDUP_SHINGLE_SIZE
+
+# Query parameters that only track the visitor and never change the page
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|gclid|fbclid|msclkid|mc_cid|mc_eid|ref|ref_src|source|igshid|_ga)$", re.IGNORECASE)
+# CJK characters are tokens on their own (no spaces between words); everything else splits on words
+_TOKEN_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]|\w+")
+_MERSENNE_61 = np.uint64((1 << 61) - 1)
+
+
+def canonicalize_url(url: Optional[str]) -> Optional[str]:
+    """
+    Normalizes a URL so mirrors of one page compare equal: scheme and "www." are
+    ignored, the host is lowercased, default ports, fragments, trailing slashes and
+    tracking parameters (utm_*, gclid, ...) are dropped and the query is sorted.
+    """
+    if not url:
+        return None
+    parts = urlsplit(str(url).strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/") or "/"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _TRACKING_PARAMS.match(k))
+    return f"{host}{path}" + (f"?{urlencode(query)}" if query else "")
+
+
+def normalize_text(text: str) -> str:
+    """Boilerplate-free, lowercased, whitespace-collapsed text used for content hashing."""
+    return " ".join(strip_boilerplate(text).lower().split())
+
+
+class MinHasher:
+    """
+    MinHash signatures over token shingles. Estimated Jaccard similarity of two
+    documents is the fraction of equal signature slots.
+    """
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, shingle_size: int = DEDUP_SHINGLE_SIZE, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # a, b < 2^31 and shingle hashes < 2^32 keep a*h + b inside uint64
+        self.a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.shingle_size = shingle_size
+
+    def signature(self, normalized_text: str) -> Optional[np.ndarray]:
+        """Signature of the text, or None if it is too short to shingle."""
+        tokens = _TOKEN_RE.findall(normalized_text)
+        if len(tokens) < self.shingle_size:
+            return None
+        shingles = {" ".join(tokens[i:i + self.shingle_size]) for i in range(len(tokens) - self.shingle_size + 1)}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % _MERSENNE_61
+        return permuted.min(axis=1)
+
+
+class DedupIndex:
+    """
+    Detects duplicate documents while a dataset is streamed.
+
+    The first document seen is the original; later documents are annotated with
+    `duplicate_of` (the original's URL), `dedup_kind` ("url", "exact" or "near") and
+    `dedup_similarity` in their metadata. Near-duplicates are found with MinHash and
+    LSH banding, then confirmed against DEDUP_NEAR_THRESHOLD.
+    """
+
+    def __init__(self, near_threshold: float = DEDUP_NEAR_THRESHOLD, bands: int = DEDUP_BANDS,
+                 hasher: Optional[MinHasher] = None):
+        self.hasher = hasher or MinHasher()
+        self.near_threshold = near_threshold
+        self.bands = bands
+        self.rows = len(self.hasher.a) // bands
+        self._urls: Dict[str, str] = {}
+        self._digests: Dict[str, str] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+        self._signatures: List[np.ndarray] = []
+        self._signature_urls: List[str] = []
+        self.seen = 0
+        self.hits = {"url": 0, "exact": 0, "near": 0}
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _find_near(self, signature: np.ndarray) -> Tuple[Optional[str], float]:
+        candidates = {idx for key in self._band_keys(signature) for idx in self._buckets.get(key, ())}
+        best_url, best_similarity = None, 0.0
+        for idx in candidates:
+            similarity = float(np.mean(self._signatures[idx] == signature))
+            if similarity > best_similarity:
+                best_url, best_similarity = self._signature_urls[idx], similarity
+        return best_url, best_similarity
+
+    def match(self, url: Optional[str], text: str) -> Optional[Tuple[str, str, float]]:
+        """
+        Registers a document and returns (original_url, kind, similarity) if it
+        duplicates one seen before, else None.
+        """
+        self.seen += 1
+        url = str(url) if url else None
+        canonical = canonicalize_url(url)
+        if canonical and canonical in self._urls:
+            self.hits["url"] += 1
+            return self._urls[canonical], "url", 1.0
+
+        normalized = normalize_text(text)
+        if not normalized or not url:
+            return None
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        if digest in self._digests:
+            self.hits["exact"] += 1
+            return self._digests[digest], "exact", 1.0
+
+        signature = self.hasher.signature(normalized)
+        if signature is not None:
+            original, similarity = self._find_near(signature)
+            if original and similarity >= self.near_threshold:
+                self.hits["near"] += 1
+                return original, "near", similarity
+
+        # A new original
+        if canonical:
+            self._urls.setdefault(canonical, url)
+        self._digests[digest] = url
+        if signature is not None:
+            idx = len(self._signatures)
+            self._signatures.append(signature)
+            self._signature_urls.append(url)
+            for key in self._band_keys(signature):
+                self._buckets[key].append(idx)
+        return None
+
+    def annotate(self, content: RawContent) -> RawContent:
+        """Adds dedup metadata to `content` if it duplicates an earlier document."""
+        found = self.match(content.url, content.text)
+        if found:
+            original, kind, similarity = found
+            content.metadata.update({"duplicate_of": original, "dedup_kind": kind, "dedup_similarity": similarity})
+        return content
+
+    @property
+    def hit_rate(self) -> float:
+        return sum(self.hits.values()) / self.seen if self.seen else 0.0
+
+
+class SummaryReuse:
+    """
+    Hands the finished results of original documents to their duplicates.
+
+    Originals are registered (`expect`) in dataset order before any worker starts
+    them, so a duplicate processed concurrently waits for its original instead of
+    calling the LLM again.
+    """
+
+    _FIELDS = ("summary_content", "char_count", "language", "judge_status", "judge_score", "judge_critique")
+
+    def __init__(self):
+        self._results: Dict[str, asyncio.Future] = {}
+
+    def _future(self, url: str) -> asyncio.Future:
+        if url not in self._results:
+            self._results[url] = asyncio.get_running_loop().create_future()
+        return self._results[url]
+
+    def expect(self, url: str):
+        self._future(url)
+
+    def publish(self, url: str, results: List[dict]):
+        """Stores an original's result rows (may be called more than once, e.g. on resume)."""
+        future = self._future(url)
+        rows = {result["strategy"]: {field: result.get(field) for field in self._FIELDS} for result in results}
+        if future.done():
+            future.result().update(rows)
+        else:
+            future.set_result(rows)
+
+    async def lookup(self, url: str) -> Dict[str, dict]:
+        """Result rows of the original by strategy ({} if it was never registered)."""
+        if url not in self._results:
+            return {}
+        return await self._results[url]
@@ -0,0 +1,74 @@
+import os
+import json
+from typing import Dict, Generator, Set
+from config.settings import JOURNAL_PATH
+
+
+class ResultJournal:
+    """
+    Append-only JSONL journal of benchmark result rows.
+
+    Each finished sample is flushed to disk immediately, so an interrupted run keeps
+    everything completed so far and can be resumed by skipping journaled
+    (sample index, strategy) pairs. Rows are keyed by their dataset index (`sample`),
+    not their URL: samples without a URL or sharing one are separate rows.
+    """
+
+    def __init__(self, path: str = JOURNAL_PATH):
+        self.path = path
+        self._checked_tail = False
+
+    def _terminate_partial_line(self):
+        """Ends a line truncated by a crash so resumed appends start on a fresh line."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def reset(self):
+        """Starts a fresh journal, discarding any previous run."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        open(self.path, "w", encoding="utf-8").close()
+
+    def append(self, results: list):
+        """Appends result rows and flushes them to disk."""
+        if not results:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if not self._checked_tail:
+            self._terminate_partial_line()
+            self._checked_tail = True
+        with open(self.path, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+
+    def iter_results(self) -> Generator[dict, None, None]:
+        """
+        Yields journaled rows, keeping the first row per (sample, strategy).
+        A truncated trailing line from a crash is skipped.
+        """
+        seen = set()
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                key = (result.get("sample"), result.get("strategy"))
+                if key[0] is not None and key in seen:
+                    continue
+                seen.add(key)
+                yield result
+
+    def completed(self) -> Dict[int, Set[str]]:
+        """Returns the journaled sample indexes, each with the strategies already done."""
+        done: Dict[int, Set[str]] = {}
+        for result in self.iter_results():
+            if result.get("sample") is not None:
+                done.setdefault(result["sample"], set()).add(result.get("strategy"))
+        return done
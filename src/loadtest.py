@@ -0,0 +1,72 @@
+import math
+import random
+import asyncio
+from typing import Generator, List, Optional
+from src.schema import RawContent
+from src.core.tracing import get_tracer
+
+_WORDS = (
+    "search engine crawler latency summary content market research model data "
+    "report analysis product release pricing policy security cloud network user "
+    "growth revenue quarter team launch feature update study results global"
+).split()
+
+
+def synthetic_samples(n: int, seed: int = 0, min_words: int = 200, max_words: int = 1500) -> Generator[RawContent, None, None]:
+    """Yields deterministic synthetic pages with a baseline summary, for offline load tests."""
+    rng = random.Random(seed)
+    for i in range(n):
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(min_words, max_words))]
+        text = "\n\n".join(" ".join(words[j:j + 60]) for j in range(0, len(words), 60))
+        yield RawContent(
+            url=f"https://loadtest.local/page/{i}",
+            text=text,
+            metadata={
+                "title": f"Synthetic page {i}",
+                "baseline_summary": " ".join(words[:80]),
+            }
+        )
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Linear-interpolated percentile (p in 0-100) of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: how late a periodic timer fires compared to its schedule.
+    Sustained lag means synchronous work is stalling in-flight I/O.
+    """
+
+    def __init__(self, interval_s: float = 0.05):
+        self.interval_s = interval_s
+        self.lags_ms: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        tracer = get_tracer()
+        while True:
+            scheduled = loop.time() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            lag_ms = max(0.0, (loop.time() - scheduled) * 1000)
+            self.lags_ms.append(lag_ms)
+            tracer.counter("event_loop_lag_ms", lag_ms)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,344 @@
+"""
+Vectorized post-hoc metrics over benchmark result tables.
+
+Everything here works on columns (NumPy arrays / pandas Series) as well as on
+scalars, so the live pipeline and offline re-scoring of saved results share one
+implementation. Re-scoring never touches the LLM path:
+
+    python -m src.metrics --results results/journal.jsonl --weights bert_score=0.5,judge_score=0.35
+
+`--rouge` also recomputes ROUGE-L from the saved summary and baseline texts.
+"""
+import os
+import time
+import argparse
+import json
+from typing import TYPE_CHECKING, Dict, Optional
+import numpy as np
+from src.core.rouge import RougeLScorer
+from config.settings import WEIGHTS, MAX_SUMMARY_CHARS, MODEL_NAME, PRICING, BATCH_PRICE_FACTOR
+
+if TYPE_CHECKING:
+    import pandas as pd  # Imported where tables are built, so the live pipeline starts without it
+
+# Normalization ranges for the composite quality score
+BERT_RANGE = (0.70, 0.95)   # BERTScore: typically 0.7-0.95 (0.7 = 0, 0.95 = 1)
+ROUGE_RANGE = (0.10, 0.40)  # ROUGE-L: typically 0.1-0.4 for abstractive summaries
+BERT_MISSING_SCORE = 0.5    # Neutral value when BERTScore is unavailable (<= 0)
+LENGTH_PENALTY_CHARS = 500  # Length score falls linearly to 0 over this many chars past the limit
+
+
+def quality_score(bert_f1, rouge_l, judge_score, char_count, weights: Dict[str, float] = WEIGHTS,
+                  max_chars: int = MAX_SUMMARY_CHARS):
+    """
+    Composite quality score on a 1-10 scale (rounded to 1 decimal).
+    """
+    bert_f1 = np.asarray(bert_f1, dtype=float)
+    rouge_l = np.asarray(rouge_l, dtype=float)
+    judge_score = np.asarray(judge_score, dtype=float)
+    char_count = np.asarray(char_count, dtype=float)
+
+    bert_normalized = np.where(
+        bert_f1 > 0,
+        np.clip((bert_f1 - BERT_RANGE[0]) / (BERT_RANGE[1] - BERT_RANGE[0]), 0, 1),
+        BERT_MISSING_SCORE,
+    )
+    rouge_normalized = np.clip((rouge_l - ROUGE_RANGE[0]) / (ROUGE_RANGE[1] - ROUGE_RANGE[0]), 0, 1)
+    length_score = np.clip(1 - np.maximum(char_count - max_chars, 0) / LENGTH_PENALTY_CHARS, 0, 1)
+
+    composite_raw = (
+        bert_normalized * weights["bert_score"] +
+        judge_score * weights["judge_score"] +
+        length_score * weights["length_compliance"] +
+        rouge_normalized * weights["rouge_l"]
+    )
+    # Scale to 1-10
+    return np.round(1 + composite_raw * 9, 1)
+
+
+def cost_usd(tokens_input, tokens_output, prices: Optional[Dict[str, float]] = None, batch=False, tokens_cached=0):
+    """
+    API cost in USD; `prices` holds USD per 1M "input" / "output" tokens.
+    Rows produced through the Batch API (`batch`) are billed at BATCH_PRICE_FACTOR.
+    The `tokens_cached` part of the input (served from a context cache) is billed at
+    the "cached_input" price; cache storage is billed separately (see cache_storage_usd).
+    """
+    prices = prices or PRICING[MODEL_NAME]
+    tokens_input = np.asarray(tokens_input, dtype=float)
+    tokens_output = np.asarray(tokens_output, dtype=float)
+    tokens_cached = np.minimum(np.asarray(tokens_cached, dtype=float), tokens_input)
+    factor = np.where(np.asarray(batch, dtype=bool), BATCH_PRICE_FACTOR, 1.0)
+    input_usd = (
+        (tokens_input - tokens_cached) / 1_000_000 * prices["input"] +
+        tokens_cached / 1_000_000 * prices.get("cached_input", prices["input"])
+    )
+    return (input_usd + tokens_output / 1_000_000 * prices["output"]) * factor
+
+
+def cache_storage_usd(token_hours: float, prices: Optional[Dict[str, float]] = None) -> float:
+    """Storage cost of context caches, from cached tokens x hours alive."""
+    prices = prices or PRICING[MODEL_NAME]
+    return token_hours / 1_000_000 * prices.get("cache_storage", 0.0)
+
+
+def score_results(df: "pd.DataFrame", weights: Dict[str, float] = WEIGHTS,
+                  prices: Optional[Dict[str, float]] = None) -> "pd.DataFrame":
+    """
+    Recomputes `quality_score` and `cost_usd` for every row from the raw columns.
+    """
+    df = df.copy()
+    batch = df["batch"].fillna(False).astype(bool) if "batch" in df else False
+    cached = df["tokens_cached"].fillna(0) if "tokens_cached" in df else 0
+    df["cost_usd"] = cost_usd(df["tokens_input"].fillna(0), df["tokens_output"].fillna(0), prices, batch, cached)
+    df["quality_score"] = quality_score(
+        df["bert_score_f1"].fillna(0), df["rouge_l_f1"].fillna(0),
+        df["judge_score"].fillna(0), df["char_count"].fillna(0), weights,
+    )
+    return df
+
+
+def rescore_rouge(df: "pd.DataFrame", scorer: Optional[RougeLScorer] = None) -> "pd.DataFrame":
+    """
+    Recomputes `rouge_l_f1` from `summary_content` against `baseline_summary` in one batch
+    (rows without a baseline score 0, as in the live pipeline).
+    """
+    df = df.copy()
+    scorer = scorer or RougeLScorer()
+    references = df["baseline_summary"].fillna("").astype(str).tolist()
+    summaries = df["summary_content"].fillna("").astype(str).tolist()
+    df["rouge_l_f1"] = scorer.score_batch(references, summaries)[:, 2] if len(df) else []
+    return df
+
+
+def round_results(df: "pd.DataFrame") -> "pd.DataFrame":
+    """Applies the report rounding used in the CSV/XLSX outputs."""
+    import pandas as pd
+    df = df.copy()
+    for column in ("latency_ms", "ttft_ms"):
+        if column in df:
+            df[column] = pd.to_numeric(df[column], errors="coerce").round().astype("Int64")
+    for column, decimals in (("rouge_l_f1", 3), ("bert_score_f1", 3), ("cost_usd", 6)):
+        df[column] = pd.to_numeric(df[column], errors="coerce").round(decimals)
+    return df
+
+
+def bootstrap_ci(values, n_resamples: int = 1000, confidence: float = 0.95, seed: int = 0,
+                 chunk_size: int = 100):
+    """
+    Percentile bootstrap confidence interval of the mean. Resamples are drawn in
+    chunks so memory stays bounded for large tables.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return float("nan"), float("nan")
+
+    rng = np.random.default_rng(seed)
+    means = []
+    for start in range(0, n_resamples, chunk_size):
+        size = min(chunk_size, n_resamples - start)
+        indices = rng.integers(0, len(values), size=(size, len(values)))
+        means.append(values[indices].mean(axis=1))
+    means = np.concatenate(means)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(means, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+
+def aggregate(df: "pd.DataFrame", by=("strategy",), n_resamples: int = 1000) -> "pd.DataFrame":
+    """
+    Per-group summary statistics: counts, quality (mean + bootstrap CI), latency
+    percentiles, judge pass rate and cost.
+    """
+    import pandas as pd
+    rows = []
+    for key, group in df.groupby(list(by), dropna=False):
+        key = key if isinstance(key, tuple) else (key,)
+        latency = group["latency_ms"].to_numpy(dtype=float)
+        ci_low, ci_high = bootstrap_ci(group["quality_score"], n_resamples=n_resamples)
+        row = dict(zip(by, key))
+        row.update({
+            "samples": len(group),
+            "quality_mean": group["quality_score"].mean(),
+            "quality_ci_low": ci_low,
+            "quality_ci_high": ci_high,
+            "rouge_l_mean": group["rouge_l_f1"].mean(),
+            "bert_score_mean": group["bert_score_f1"].mean(),
+            "latency_p50_ms": np.percentile(latency, 50),
+            "latency_p95_ms": np.percentile(latency, 95),
+            "latency_p99_ms": np.percentile(latency, 99),
+            "judge_pass_rate": (group["judge_status"] == "PASS").mean(),
+            "cost_total_usd": group["cost_usd"].sum(),
+            "cost_per_1k_usd": group["cost_usd"].mean() * 1000,
+        })
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def dedup_savings(df: "pd.DataFrame") -> Dict[str, float]:
+    """
+    Rows that reused an earlier duplicate's summary (`duplicate_of` set) and the API
+    spend they avoided, i.e. the cost of the original rows they copied.
+    """
+    if "duplicate_of" not in df or df.empty:
+        return {"reused_rows": 0, "hit_rate": 0.0, "saved_usd": 0.0, "saved_tokens": 0}
+    reused = df.loc[df["duplicate_of"].notna(), ["duplicate_of", "strategy"]]
+    originals = df[["url", "strategy", "cost_usd", "tokens_input", "tokens_output"]]
+    saved = reused.merge(originals, left_on=["duplicate_of", "strategy"], right_on=["url", "strategy"], how="left")
+    return {
+        "reused_rows": len(reused),
+        "hit_rate": len(reused) / len(df),
+        "saved_usd": float(saved["cost_usd"].sum()),
+        "saved_tokens": int(saved["tokens_input"].fillna(0).sum() + saved["tokens_output"].fillna(0).sum()),
+    }
+
+
+def prejudge_stats(df: "pd.DataFrame") -> Dict[str, float]:
+    """
+    Pre-judge gate summary over rows it evaluated: share decided locally and agreement
+    with the LLM judge on audited rows (a local PASS/FAIL that was also sent to the judge).
+    """
+    if "prejudge_decision" not in df:
+        return {"rows": 0}
+    gated = df[df["prejudge_decision"].notna()]
+    if gated.empty:
+        return {"rows": 0}
+    audited = gated[(gated["judge_source"] == "llm") & gated["prejudge_decision"].isin(["PASS", "FAIL"])]
+    return {
+        "rows": len(gated),
+        "local_rate": float((gated["judge_source"] == "gate").mean()),
+        "decisions": gated["prejudge_decision"].value_counts().to_dict(),
+        "llm_judge_calls": int(gated["judge_llm_calls"].fillna(0).sum()),
+        "audited": len(audited),
+        "agreement": float((audited["prejudge_decision"] == audited["judge_status"]).mean()) if len(audited) else float("nan"),
+    }
+
+
+def router_stats(df: "pd.DataFrame") -> Dict[str, float]:
+    """
+    Strategy router summary over routed rows (`route` set by --strategy auto): share of
+    pages sent to advanced, and summed latency / cost saved against quality lost relative
+    to always running advanced. The per-page differences are measured on audited pages
+    (routed to fast but also run through advanced) and extrapolated to every fast-routed page.
+    """
+    if "route" not in df or "sample" not in df:
+        return {"samples": 0}
+    routed = df[df["route"].notna()]
+    # Pages are identified by their sample index: URLs can be missing or repeated
+    routes = routed.groupby("sample")["route"].first()
+    if routes.empty:
+        return {"samples": 0}
+    fast_samples = routes.index[routes == "fast"]
+    columns = ["sample", "quality_score", "latency_ms", "cost_usd"]
+    fast = routed[routed["strategy"] == "fast"][columns].drop_duplicates("sample")
+    advanced = routed[routed["strategy"] == "advanced"][columns].drop_duplicates("sample")
+    audited = fast.merge(advanced, on="sample", suffixes=("_fast", "_advanced"))
+    audited = audited[audited["sample"].isin(fast_samples)]
+    stats = {"samples": len(routes), "advanced_rate": 1 - len(fast_samples) / len(routes), "audited": len(audited)}
+    if len(fast_samples) and audited.empty:
+        return stats  # Nothing to measure the fast-routed pages against
+
+    def per_page(column):
+        return float((audited[f"{column}_advanced"] - audited[f"{column}_fast"]).mean()) if len(audited) else 0.0
+
+    advanced_routed = advanced[~advanced["sample"].isin(fast_samples)]
+    for column in ("latency_ms", "cost_usd"):
+        saved = len(fast_samples) * per_page(column)
+        always_advanced = float(advanced_routed[column].sum())
+        if len(audited):
+            always_advanced += len(fast_samples) * float(audited[f"{column}_advanced"].mean())
+        stats[f"{column}_saved"] = saved
+        stats[f"{column}_saved_share"] = saved / always_advanced if always_advanced else float("nan")
+    stats["quality_lost"] = len(fast_samples) * per_page("quality_score") / len(routes)
+    return stats
+
+
+def describe_router_stats(stats: Dict[str, float]) -> str:
+    text = f"{stats['samples']} pages, {stats['advanced_rate']:.1%} routed to advanced"
+    if "quality_lost" not in stats:
+        return text + "; no audited pages to estimate savings from"
+    return (f"{text}; vs always advanced: summed latency {-stats['latency_ms_saved_share']:+.1%} "
+            f"({-stats['latency_ms_saved'] / 1000:+.1f}s), cost {-stats['cost_usd_saved_share']:+.1%} "
+            f"({-stats['cost_usd_saved']:+.6f} USD), quality {-stats['quality_lost']:+.2f} points per page "
+            f"(measured on {stats['audited']} audited pages)")
+
+
+def load_results(path: str) -> "pd.DataFrame":
+    """Loads saved results: a JSONL journal, a result store directory or .parquet file, or a results CSV."""
+    import pandas as pd
+    if os.path.isdir(path):
+        from src.result_store import ResultStore
+        return ResultStore.read(path)
+    if path.endswith(".jsonl"):
+        return pd.read_json(path, lines=True)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def print_report(df: "pd.DataFrame", n_resamples: int = 1000):
+    """Prints per-strategy and per-language breakdowns."""
+    import pandas as pd
+    with pd.option_context("display.max_columns", None, "display.width", 200, "display.precision", 3):
+        print("\nPer-strategy summary:")
+        print(aggregate(df, by=("strategy",), n_resamples=n_resamples).to_string(index=False))
+        if "language" in df:
+            print("\nPer-language summary:")
+            print(aggregate(df, by=("strategy", "language"), n_resamples=n_resamples).to_string(index=False))
+        if "generation" in df and df["generation"].nunique() > 1:
+            print("\nSeparate vs combined summary generation:")
+            print(aggregate(df, by=("strategy", "generation"), n_resamples=n_resamples).to_string(index=False))
+    gate = prejudge_stats(df)
+    if gate["rows"]:
+        decisions = ", ".join(f"{k} {v}" for k, v in sorted(gate["decisions"].items()))
+        agreement = f"{gate['agreement']:.1%}" if gate["audited"] else "n/a"
+        print(f"\nPre-judge gate: {gate['rows']} judged rows, {gate['local_rate']:.1%} decided locally "
+              f"(last round: {decisions}), {gate['llm_judge_calls']} LLM judge calls; "
+              f"agreement with LLM judge {agreement} on {gate['audited']} audited rows")
+    router = router_stats(df)
+    if router["samples"]:
+        print(f"\nStrategy router: {describe_router_stats(router)}")
+    savings = dedup_savings(df)
+    if savings["reused_rows"]:
+        print(f"\nDedup: {savings['reused_rows']}/{len(df)} rows reused a duplicate's summary "
+              f"({savings['hit_rate']:.1%}), saving ~${savings['saved_usd']:.6f} ({savings['saved_tokens']} tokens)")
+
+
+def _parse_overrides(text: Optional[str], base: Dict[str, float]) -> Dict[str, float]:
+    values = dict(base)
+    if text:
+        for item in text.split(","):
+            name, _, value = item.partition("=")
+            values[name.strip()] = float(value)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score saved benchmark results without calling the LLM")
+    parser.add_argument("--results", default="results/journal.jsonl", help="Journal (.jsonl), result store directory, .parquet or results CSV")
+    parser.add_argument("--weights", default=None, help="Weight overrides, e.g. bert_score=0.5,judge_score=0.35")
+    parser.add_argument("--prices", default=None, help="USD per 1M tokens overrides, e.g. input=0.075,output=0.30")
+    parser.add_argument("--bootstrap", type=int, default=1000, help="Bootstrap resamples for confidence intervals")
+    parser.add_argument("--rouge", action="store_true", help="Recompute ROUGE-L from the saved summary texts")
+    parser.add_argument("--out", default=None, help="Optional CSV path for the re-scored rows")
+    args = parser.parse_args()
+
+    weights = _parse_overrides(args.weights, WEIGHTS)
+    prices = _parse_overrides(args.prices, PRICING[MODEL_NAME])
+    print(f"Weights: {json.dumps(weights)}")
+    print(f"Prices (USD / 1M tokens): {json.dumps(prices)}")
+
+    df = load_results(args.results)
+    if args.rouge:
+        start = time.perf_counter()
+        df = rescore_rouge(df)
+        print(f"Recomputed ROUGE-L for {len(df)} rows in {time.perf_counter() - start:.2f}s")
+    df = score_results(df, weights, prices)
+    print_report(df, n_resamples=args.bootstrap)
+    if args.out:
+        round_results(df).to_csv(args.out, index=False)
+        print(f"\nSaved re-scored rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
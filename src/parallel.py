@@ -0,0 +1,190 @@
+"""
+Multi-process benchmark runs (`--workers N`).
+
+The parent reads (and, with --dedup, deduplicates) the dataset once and deals the
+samples out to N worker processes, each running the normal asyncio pipeline on its
+own core. Duplicates go to the worker that runs their original, so they reuse its
+results as in a single-process run. The RPM/TPM window lives in a
+coordinator (multiprocessing manager) process that every worker reserves
+capacity from, so together they stay within one API quota. Workers stream their
+result rows back to the parent, which is the only journal writer.
+"""
+import os
+import queue
+import threading
+import multiprocessing as mp
+from multiprocessing.managers import BaseManager
+from src.core.llm_client import RateBudget, SharedRateLimiter
+from config.settings import MAX_IN_FLIGHT_SAMPLES
+
+
+class _BudgetManager(BaseManager):
+    pass
+
+
+_BudgetManager.register("RateBudget", RateBudget)
+
+
+def _worker_trace_path(path: str, index: int) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.worker{index}{ext or '.json'}"
+
+
+def _put_while_alive(inbox, item, alive, stop=None, timeout=1.0) -> bool:
+    """
+    Puts item on a bounded inbox, giving up once its worker is gone.
+
+    Args:
+        inbox: The worker's inbox queue.
+        item: The item to put.
+        alive: Callable telling whether the worker still drains the inbox.
+        stop: Optional threading.Event; once set, only sentinels (None) are still delivered.
+        timeout: Seconds between liveness checks while the inbox is full.
+
+    Returns:
+        True if the item was queued, False if the worker is dead or the feed was stopped.
+    """
+    while True:
+        if not alive() or (stop is not None and stop.is_set() and item is not None):
+            return False
+        try:
+            inbox.put(item, timeout=timeout)
+            return True
+        except queue.Full:
+            continue
+
+
+def _feed_workers(args, inboxes, dedup=None, alive=None, stop=None):
+    """
+    Loads the dataset once and deals (index, content) samples out round-robin, sending
+    duplicates to the inbox of their original. Ends every live worker's inbox with None.
+
+    Args:
+        args: Parsed benchmark arguments (data, limit).
+        inboxes: One bounded queue per worker.
+        dedup: Optional DedupIndex shared by all workers.
+        alive: Optional callable alive(worker) -> bool. Samples for a dead worker are dropped
+            (its inbox is never drained, so putting on it would block forever).
+        stop: Optional threading.Event the parent sets to end the feed early.
+    """
+    from src.data_loader import DataLoader
+
+    def worker_alive(worker):
+        return alive is None or alive(worker)
+
+    owners = {}  # Original URL -> worker
+    try:
+        for i, content in enumerate(DataLoader(args.data).load_samples(limit=args.limit, dedup=dedup)):
+            if stop is not None and stop.is_set():
+                break
+            original = content.metadata.get("duplicate_of")
+            worker = owners.get(original, i % len(inboxes)) if original else i % len(inboxes)
+            if dedup and content.url and not original:
+                owners[str(content.url)] = worker
+            # Blocks while that worker is saturated, but not past its death
+            _put_while_alive(inboxes[worker], (i, content), lambda: worker_alive(worker), stop)
+    finally:
+        for worker, inbox in enumerate(inboxes):
+            _put_while_alive(inbox, None, lambda: worker_alive(worker))
+
+
+def _worker_main(args, shard, completed, budget, inbox, results):
+    """Entry point of a worker process: runs the samples dealt to it and streams its rows to the parent."""
+    import asyncio
+    from src.benchmark import configure_concurrency, run_pipeline
+    from src.core.cache import get_response_cache
+
+    index, count = shard
+    get_response_cache().mode = args.cache
+    configure_concurrency(args.fixed_concurrency, count)
+    if args.trace:
+        args.trace = _worker_trace_path(args.trace, index)
+
+    def emit(rows):
+        if rows:
+            results.put(("rows", index, rows))
+
+    def progress(limiter):
+        results.put(("progress", index, (int(limiter.limit), limiter.in_flight)))
+
+    async def samples():
+        while True:
+            item = await asyncio.to_thread(inbox.get)
+            if item is None:
+                return
+            yield item
+
+    try:
+        asyncio.run(run_pipeline(args, completed, emit, progress, samples(), SharedRateLimiter(budget)))
+    finally:
+        results.put(("done", index, None))
+
+
+def run_workers(args, completed, journal):
+    """
+    Runs the pipeline in `args.workers` processes and journals their rows as they arrive.
+
+    Args:
+        args: Parsed command-line arguments (passed to every worker).
+        completed: Sample index -> strategies already journaled, which workers skip.
+        journal: ResultJournal the rows are appended to.
+    """
+    from tqdm import tqdm
+    from src.benchmark import print_dedup_report
+    from src.dedup import DedupIndex
+
+    count = args.workers
+    context = mp.get_context("spawn")  # No forked copies of the parent's threads, loop or model state
+    manager = _BudgetManager(ctx=context)
+    manager.start()
+    budget = manager.RateBudget()
+    results = context.Queue()
+    inboxes = [context.Queue(maxsize=max(1, MAX_IN_FLIGHT_SAMPLES // count)) for _ in range(count)]
+    workers = [
+        context.Process(target=_worker_main, args=(args, (index, count), completed, budget, inboxes[index], results),
+                        name=f"benchmark-worker-{index}")
+        for index in range(count)
+    ]
+    for worker in workers:
+        worker.start()
+    dedup = DedupIndex() if args.dedup else None
+    stop = threading.Event()
+    feeder = threading.Thread(target=_feed_workers, args=(args, inboxes, dedup, lambda w: workers[w].is_alive(), stop),
+                              name="benchmark-feeder", daemon=True)
+    feeder.start()
+
+    status = {}
+    running = set(range(count))
+    try:
+        with tqdm(total=args.limit, desc=f"Processing samples ({count} workers)", unit="sample") as pbar:
+            while running:
+                try:
+                    kind, index, payload = results.get(timeout=1.0)
+                except queue.Empty:
+                    for index in list(running):
+                        if not workers[index].is_alive():
+                            print(f"Worker {index} exited with code {workers[index].exitcode} before finishing; "
+                                  "stopping the other workers (rerun with --resume to finish the remaining samples)")
+                            running.discard(index)
+                            stop.set()  # The feeder stops dealing and ends the live inboxes with None
+                    continue
+                if kind == "rows":
+                    journal.append(payload)
+                elif kind == "progress":
+                    status[index] = payload
+                    limit = sum(limit for limit, _ in status.values())
+                    in_flight = sum(in_flight for _, in_flight in status.values())
+                    pbar.set_postfix_str(f"limit {limit}, in flight {in_flight}", refresh=False)
+                    pbar.update(1)
+                else:
+                    running.discard(index)
+    finally:
+        for worker in workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+        for inbox in inboxes:
+            inbox.cancel_join_thread()
+        manager.shutdown()
+    if dedup:
+        print_dedup_report(dedup)
@@ -0,0 +1,174 @@
+"""
+Columnar result store: the benchmark's results as Parquet, for reports and notebooks.
+
+    results/store/results.parquet     one row per (sample index, strategy); the baseline text is
+                                      replaced by its `reference_id`
+    results/store/references.parquet  reference_id -> baseline_summary, written once per text
+
+Rows are written incrementally as Arrow record batches (one Parquet row group per
+batch), so saving a large run never holds all rows in memory. Load it back with
+`ResultStore.read()` (references joined in) or directly:
+
+    pd.read_parquet("results/store/results.parquet", columns=["strategy", "quality_score"])
+"""
+import os
+import hashlib
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence
+from src.metrics import score_results
+from config.settings import RESULT_STORE_DIR, RESULT_STORE_BATCH_ROWS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# (column, Arrow type name) of the results table, in file order
+RESULT_COLUMNS = [
+    ("sample", "int64"), ("url", "string"), ("strategy", "string"), ("language", "string"), ("generation", "string"),
+    ("latency_ms", "float64"), ("ttft_ms", "float64"),
+    ("tokens_input", "int64"), ("tokens_output", "int64"), ("tokens_cached", "int64"), ("cost_usd", "float64"),
+    ("char_count", "int64"),
+    ("judge_status", "string"), ("judge_score", "float64"), ("judge_critique", "string"),
+    ("rouge_l_f1", "float64"), ("bert_score_f1", "float64"), ("quality_score", "float64"),
+    ("summary_content", "string"), ("reference_id", "string"), ("baseline_char_count", "int64"),
+    ("connect_ms", "float64"), ("tls_ms", "float64"), ("ttfb_ms", "float64"), ("connection_reused", "bool"),
+    ("duplicate_of", "string"), ("dedup_kind", "string"),
+    ("judge_source", "string"), ("judge_llm_calls", "int64"),
+    ("prejudge_decision", "string"), ("prejudge_score", "float64"),
+    ("batch", "bool"),
+    ("route", "string"), ("route_probability", "float64"),
+]
+# Long text columns, skipped when only the numbers are needed (e.g. for the report)
+TEXT_COLUMNS = ("summary_content", "judge_critique")
+
+
+def reference_id(text: Optional[str]) -> Optional[str]:
+    """Stable id of a baseline summary text (None for a missing baseline)."""
+    if not text:
+        return None
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _schema(columns):
+    import pyarrow as pa
+
+    return pa.schema([(name, pa.type_for_alias(type_name)) for name, type_name in columns])
+
+
+class ResultStore:
+    """
+    Incremental Parquet writer for benchmark result rows (journal-shaped dicts).
+    Used as a context manager; `append` buffers rows and writes one record batch per
+    `batch_rows`, `close` flushes the rest.
+    """
+
+    def __init__(self, path: str = RESULT_STORE_DIR, batch_rows: int = RESULT_STORE_BATCH_ROWS):
+        """
+        Args:
+            path: Directory holding results.parquet and references.parquet (replaced on open).
+            batch_rows: Rows per record batch / Parquet row group.
+        """
+        self.path = path
+        self.batch_rows = batch_rows
+        self.rows_written = 0
+        self.references_written = 0
+        self._pending: List[dict] = []
+        self._references = set()
+        self._writers = {}
+
+    @property
+    def results_path(self) -> str:
+        return os.path.join(self.path, "results.parquet")
+
+    @property
+    def references_path(self) -> str:
+        return os.path.join(self.path, "references.parquet")
+
+    def open(self):
+        import pyarrow.parquet as pq
+
+        os.makedirs(self.path, exist_ok=True)
+        self._writers = {
+            "results": pq.ParquetWriter(self.results_path, _schema(RESULT_COLUMNS)),
+            "references": pq.ParquetWriter(
+                self.references_path,
+                _schema([("reference_id", "string"), ("baseline_summary", "string"), ("baseline_char_count", "int64")]),
+            ),
+        }
+        return self
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def append(self, results: Iterable[dict]):
+        """Buffers result rows, writing a record batch whenever `batch_rows` are pending."""
+        for result in results:
+            self._pending.append(result)
+            if len(self._pending) >= self.batch_rows:
+                self.flush()
+
+    def flush(self):
+        """Writes the pending rows as one record batch (quality and cost recomputed)."""
+        if not self._pending:
+            return
+        import pandas as pd
+        import pyarrow as pa
+
+        rows, self._pending = self._pending, []
+        new_references = {}
+        for row in rows:
+            text = row.get("baseline_summary")
+            row_reference = reference_id(text)
+            row["reference_id"] = row_reference
+            if row_reference and row_reference not in self._references:
+                self._references.add(row_reference)
+                new_references[row_reference] = text
+
+        frame = score_results(pd.DataFrame(rows, columns=[name for name, _ in RESULT_COLUMNS]))
+        for name, type_name in RESULT_COLUMNS:
+            if type_name == "int64":
+                frame[name] = pd.to_numeric(frame[name], errors="coerce").astype("Int64")
+            elif type_name == "bool":
+                frame[name] = frame[name].astype("boolean")
+        schema = self._writers["results"].schema
+        self._writers["results"].write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+        self.rows_written += len(rows)
+
+        if new_references:
+            self._writers["references"].write_batch(pa.RecordBatch.from_pydict({
+                "reference_id": list(new_references),
+                "baseline_summary": list(new_references.values()),
+                "baseline_char_count": [len(text) for text in new_references.values()],
+            }, schema=self._writers["references"].schema))
+            self.references_written += len(new_references)
+
+    def close(self):
+        """Flushes pending rows and finalizes both files."""
+        try:
+            self.flush()
+        finally:
+            for writer in self._writers.values():
+                writer.close()
+            self._writers = {}
+
+    @staticmethod
+    def read(path: str = RESULT_STORE_DIR, columns: Optional[Sequence[str]] = None,
+             with_references: bool = True) -> "pd.DataFrame":
+        """
+        Loads stored results as a DataFrame.
+
+        Args:
+            path: Store directory.
+            columns: Result columns to load (default: all).
+            with_references: Join the baseline text back in as `baseline_summary`.
+        """
+        import pandas as pd
+
+        results = pd.read_parquet(os.path.join(path, "results.parquet"), columns=columns)
+        if not with_references or "reference_id" not in results:
+            return results
+        references = pd.read_parquet(os.path.join(path, "references.parquet"),
+                                     columns=["reference_id", "baseline_summary"])
+        return results.merge(references, on="reference_id", how="left")
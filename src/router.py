@@ -0,0 +1,276 @@
+"""
+Per-document strategy router: predicts from cheap page features whether the advanced
+strategy will beat fast by at least ROUTER_QUALITY_MARGIN quality points, so
+`--strategy auto` pays advanced latency and judge cost only where it is likely to help.
+
+Trained from past runs that ran both strategies on the same pages (the result store
+by default), joined by sample index with the dataset they ran on for the page text:
+
+    python -m src.router --data data/summaries_1k.json
+
+This prints the held-out latency and cost saved against the quality lost relative to
+always running advanced, then writes the model to ROUTER_PATH.
+"""
+import os
+import re
+import json
+import math
+import zlib
+import argparse
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from src.core.preprocess import count_tokens
+from src.core.prejudge import dominant_script
+from src.schema import RawContent
+from config.settings import (
+    MAX_CONTENT_TOKENS, RESULT_STORE_DIR, ROUTER_PATH, ROUTER_QUALITY_MARGIN, ROUTER_THRESHOLD, ROUTER_AUDIT_RATE
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+_LIST_ITEM_RE = re.compile(r"^(?:[-*+]|\d+[.)])\s+")
+_TABLE_ROW_RE = re.compile(r"^\|.*\|$")
+_LINK_RE = re.compile(r"\[[^\]]*\]\([^)]*\)|https?://\S+")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+FEATURES = [
+    "log_tokens",            # Page length
+    "truncated",             # Longer than MAX_CONTENT_TOKENS (truncated or map-reduced)
+    "non_latin",             # Dominant script is not Latin
+    "cjk",                   # Dominant script is CJK
+    "heading_density",       # Markdown headings per non-empty line
+    "list_ratio",            # List items per non-empty line
+    "table_ratio",           # Table rows per non-empty line
+    "link_density",          # Links per non-empty line
+    "number_density",        # Numbers per token
+    "log_paragraph_tokens",  # Average paragraph length
+]
+
+
+def document_features(content: RawContent) -> Dict[str, float]:
+    """Cheap structural features of a page (no model or LLM call), keyed as in FEATURES."""
+    text = content.text
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    line_count = max(1, len(lines))
+    tokens = count_tokens(text)
+    paragraphs = max(1, sum(1 for block in text.split("\n\n") if block.strip()))
+    script = dominant_script(text)
+    return {
+        "log_tokens": math.log1p(tokens),
+        "truncated": float(tokens > MAX_CONTENT_TOKENS),
+        "non_latin": float(script is not None and script != "LATIN"),
+        "cjk": float(script == "CJK"),
+        "heading_density": sum(1 for line in lines if _HEADING_RE.match(line)) / line_count,
+        "list_ratio": sum(1 for line in lines if _LIST_ITEM_RE.match(line)) / line_count,
+        "table_ratio": sum(1 for line in lines if _TABLE_ROW_RE.match(line)) / line_count,
+        "link_density": len(_LINK_RE.findall(text)) / line_count,
+        "number_density": len(_NUMBER_RE.findall(text)) / tokens,
+        "log_paragraph_tokens": math.log1p(tokens / paragraphs),
+    }
+
+
+def feature_matrix(contents: Iterable[RawContent]) -> np.ndarray:
+    rows = [[features[name] for name in FEATURES] for features in map(document_features, contents)]
+    return np.array(rows, dtype=float).reshape(len(rows), len(FEATURES))
+
+
+class StrategyRouter:
+    """
+    L2-regularized logistic regression over standardized FEATURES, predicting
+    P(advanced beats fast by >= `margin` quality points). Pages at or above
+    `threshold` are routed to advanced, the rest to fast.
+    """
+
+    def __init__(self, weights: Optional[List[float]] = None, bias: float = 0.0,
+                 mean: Optional[List[float]] = None, scale: Optional[List[float]] = None,
+                 threshold: float = ROUTER_THRESHOLD, margin: float = ROUTER_QUALITY_MARGIN, trained_on: int = 0):
+        """
+        Args:
+            weights, bias: Model coefficients over standardized features (zeros: untrained).
+            mean, scale: Feature standardization learned in `fit`.
+            threshold: Win probability from which a page is routed to advanced.
+            margin: Quality-point gain that counts as an advanced win (recorded with the model).
+            trained_on: Number of training pages (informational).
+        """
+        n = len(FEATURES)
+        self.weights = np.asarray(weights if weights is not None else np.zeros(n), dtype=float)
+        self.bias = float(bias)
+        self.mean = np.asarray(mean if mean is not None else np.zeros(n), dtype=float)
+        self.scale = np.asarray(scale if scale is not None else np.ones(n), dtype=float)
+        self.threshold = threshold
+        self.margin = margin
+        self.trained_on = trained_on
+
+    def fit(self, X: np.ndarray, y: np.ndarray, l2: float = 1.0, iterations: int = 500, learning_rate: float = 0.5):
+        """
+        Fits the model by full-batch gradient descent.
+
+        Args:
+            X: Feature matrix, columns in FEATURES order.
+            y: 1 where advanced won the page, else 0.
+            l2: Ridge penalty on the weights (the training sets are small).
+        """
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.mean = X.mean(axis=0)
+        self.scale = np.where(X.std(axis=0) > 0, X.std(axis=0), 1.0)
+        Z = (X - self.mean) / self.scale
+        n = max(1, len(y))
+        positive_rate = float(np.clip(y.mean() if len(y) else 0.5, 1e-3, 1 - 1e-3))
+        self.weights = np.zeros(len(FEATURES))
+        self.bias = math.log(positive_rate / (1 - positive_rate))
+        for _ in range(iterations):
+            error = self._sigmoid(Z @ self.weights + self.bias) - y
+            self.weights -= learning_rate * (Z.T @ error / n + l2 * self.weights / n)
+            self.bias -= learning_rate * float(error.mean())
+        self.trained_on = len(y)
+        return self
+
+    @staticmethod
+    def _sigmoid(z):
+        return 1 / (1 + np.exp(-np.clip(z, -30, 30)))
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Advanced win probability per row of a feature matrix."""
+        return self._sigmoid(((np.asarray(X, dtype=float) - self.mean) / self.scale) @ self.weights + self.bias)
+
+    def route(self, content: RawContent) -> Tuple[str, float]:
+        """Returns ("fast" or "advanced", predicted advanced win probability) for one page."""
+        probability = float(self.predict_proba(feature_matrix([content]))[0])
+        return ("advanced" if probability >= self.threshold else "fast"), probability
+
+    def plan(self, content: RawContent, audit_rate: float = ROUTER_AUDIT_RATE) -> Tuple[List[str], str, float]:
+        """
+        Strategies to run for a page: the routed one, plus advanced for a deterministic
+        `audit_rate` share of fast-routed pages (by content hash), so the report can
+        measure the quality lost by skipping advanced.
+
+        Returns:
+            (strategies, route, probability).
+        """
+        route, probability = self.route(content)
+        strategies = [route]
+        if route == "fast" and zlib.crc32(content.text.encode("utf-8")) % 10_000 < audit_rate * 10_000:
+            strategies.append("advanced")
+        return strategies, route, probability
+
+    def to_dict(self) -> dict:
+        return {
+            "features": FEATURES,
+            "weights": self.weights.tolist(),
+            "bias": self.bias,
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "threshold": self.threshold,
+            "margin": self.margin,
+            "trained_on": self.trained_on,
+        }
+
+    def save(self, path: str = ROUTER_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str = ROUTER_PATH, threshold: Optional[float] = None) -> "StrategyRouter":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("features") != FEATURES:
+            raise ValueError(f"Router at {path} was trained on different features; retrain it with python -m src.router")
+        return cls(data["weights"], data["bias"], data["mean"], data["scale"],
+                   data["threshold"] if threshold is None else threshold, data["margin"], data.get("trained_on", 0))
+
+
+def paired_results(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    One row per sample (dataset index) with both a fast and an advanced result (columns
+    suffixed _fast / _advanced). Samples without a URL or sharing one are kept apart.
+    """
+    if "sample" not in df:
+        raise ValueError("Results have no 'sample' column; rerun the benchmark to record sample indexes")
+    columns = ["sample", "url", "quality_score", "latency_ms", "cost_usd"]
+    fast = df[df["strategy"] == "fast"][columns].dropna(subset=["sample"]).drop_duplicates("sample")
+    advanced = df[df["strategy"] == "advanced"][columns].dropna(subset=["sample"]).drop_duplicates("sample")
+    pairs = fast.merge(advanced.drop(columns="url"), on="sample", suffixes=("_fast", "_advanced"))
+    pairs["sample"] = pairs["sample"].astype(int)
+    return pairs
+
+
+def training_set(pairs: "pd.DataFrame", samples: Iterable[RawContent],
+                 margin: float = ROUTER_QUALITY_MARGIN) -> Tuple[np.ndarray, np.ndarray, "pd.DataFrame"]:
+    """
+    Joins result pairs with their page text by sample index (`samples` is the dataset
+    the results were produced from, in order). Returns the feature matrix, the labels
+    (advanced won by >= `margin`) and the pairs that were found in `samples`, in order.
+    """
+    wanted = set(pairs["sample"])
+    contents = {}
+    for i, content in enumerate(samples):
+        if i in wanted:
+            contents[i] = content
+            if len(contents) == len(wanted):
+                break
+    found = pairs[pairs["sample"].isin(contents)].reset_index(drop=True)
+    X = feature_matrix(contents[i] for i in found["sample"])
+    y = ((found["quality_score_advanced"] - found["quality_score_fast"]) >= margin).to_numpy(dtype=float)
+    return X, y, found
+
+
+def routed_rows(pairs: "pd.DataFrame", routes: Iterable[str]) -> "pd.DataFrame":
+    """Result rows of `pairs` tagged with a route, in the shape `metrics.router_stats` reads."""
+    import pandas as pd
+    frames = []
+    for strategy in ("fast", "advanced"):
+        frame = pairs[["sample", "url"]].copy()
+        frame["strategy"] = strategy
+        for column in ("quality_score", "latency_ms", "cost_usd"):
+            frame[column] = pairs[f"{column}_{strategy}"].to_numpy()
+        frame["route"] = list(routes) if strategy == "fast" else frames[0]["route"].to_numpy()
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the fast/advanced strategy router from past results")
+    parser.add_argument("--results", nargs="+", default=[RESULT_STORE_DIR],
+                        help="Result stores (default: the benchmark's), journals, .parquet files or "
+                             "--export csv files holding both strategies for the same pages")
+    parser.add_argument("--data", default="data/summaries_1k.json", help="Dataset with the page text of those results")
+    parser.add_argument("--margin", type=float, default=ROUTER_QUALITY_MARGIN,
+                        help="Quality points by which advanced must win a page")
+    parser.add_argument("--threshold", type=float, default=ROUTER_THRESHOLD,
+                        help="Win probability from which pages are routed to advanced")
+    parser.add_argument("--holdout", type=float, default=0.25, help="Share of pages held out for the evaluation")
+    parser.add_argument("--seed", type=int, default=0, help="Holdout split seed")
+    parser.add_argument("--out", default=ROUTER_PATH, help="Where to write the trained router")
+    args = parser.parse_args()
+
+    import pandas as pd
+    from src.data_loader import DataLoader
+    from src.metrics import describe_router_stats, load_results, router_stats, score_results
+
+    df = score_results(pd.concat([load_results(path) for path in args.results], ignore_index=True))
+    X, y, pairs = training_set(paired_results(df), DataLoader(args.data).load_samples(), args.margin)
+    if len(y) < 10:
+        print(f"Only {len(y)} pages have both strategies and page text; run both strategies on more pages first.")
+        return
+    print(f"Training pages: {len(y)}, advanced wins by >= {args.margin} points on {y.mean():.1%}")
+
+    holdout = np.random.default_rng(args.seed).random(len(y)) < args.holdout
+    if holdout.any() and (~holdout).any():
+        router = StrategyRouter(threshold=args.threshold, margin=args.margin).fit(X[~holdout], y[~holdout])
+        held_out = pairs[holdout].reset_index(drop=True)
+        routes = np.where(router.predict_proba(X[holdout]) >= args.threshold, "advanced", "fast")
+        print(f"Held-out router ({holdout.sum()} pages): {describe_router_stats(router_stats(routed_rows(held_out, routes)))}")
+        always_fast = router_stats(routed_rows(held_out, ["fast"] * len(held_out)))
+        print(f"Held-out always fast: {describe_router_stats(always_fast)}")
+
+    router = StrategyRouter(threshold=args.threshold, margin=args.margin).fit(X, y)
+    router.save(args.out)
+    print(f"Router written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,16 +14,43 @@ class ResearchBrief(BaseModel):
     core_themes: List[str] = Field(..., description="The main topics identified in the source content")
     critical_facts: List[str] = Field(..., description="Non-negotiable data points to include in the summary")
 
-class SummaryOutput(BaseModel):
-    """The final draft produced by the Writer Agent."""
+class SummaryResponse(BaseModel):
+    """The summary as generated by the Writer Agent (the response schema sent to the model)."""
     content: str = Field(..., max_length=1500, description="The summary text (capped at 1,500 chars)")
-    strategy: Literal["fast", "advanced"] = Field(..., description="The strategy used for generation")
-    char_count: int = Field(..., description="The length of the summary content")
-    latency_ms: float = Field(..., description="Time taken to generate the summary in milliseconds")
+    language: Optional[str] = Field("unknown", description="ISO 639-1 language code detected from content")
+
+class SummaryOutput(SummaryResponse):
+    """The final draft produced by the Writer Agent, with the client-side measurements attached."""
+    strategy: Optional[Literal["fast", "advanced"]] = Field(None, description="The strategy used for generation")
+    char_count: int = Field(0, description="The length of the summary content")
+    latency_ms: float = Field(0.0, description="Time taken to generate the summary in milliseconds")
+    ttft_ms: Optional[float] = Field(None, description="Time to the first summary token in milliseconds (streaming mode only)")
     tokens_input: Optional[int] = Field(0, description="Number of input tokens")
     tokens_output: Optional[int] = Field(0, description="Number of output tokens")
+    tokens_cached: Optional[int] = Field(0, description="Input tokens served from a context cache (included in tokens_input)")
+    connect_ms: Optional[float] = Field(None, description="TCP connect time of the API call (None if the connection was reused)")
+    tls_ms: Optional[float] = Field(None, description="TLS handshake time of the API call (None if the connection was reused)")
+    ttfb_ms: Optional[float] = Field(None, description="Time from sending the request to the first response byte")
+    connection_reused: Optional[bool] = Field(None, description="Whether the API call reused a pooled connection")
+    cached_latency_ms: Optional[float] = Field(None, description="Latency of the original call when the response was replayed from the response cache")
+
+class StrategySummary(BaseModel):
+    """One strategy's summary inside a combined response."""
+    content: str = Field(..., max_length=1500, description="The summary text (capped at 1,500 chars)")
     language: Optional[str] = Field("unknown", description="ISO 639-1 language code detected from content")
 
+class CombinedSummaryResponse(BaseModel):
+    """Fast and advanced summaries of the same content, generated in a single call (the response schema)."""
+    fast: StrategySummary = Field(..., description="Direct summary (FAST strategy)")
+    advanced: StrategySummary = Field(..., description="Summary written with chain-of-thought reasoning (ADVANCED strategy)")
+
+class CombinedSummaryOutput(CombinedSummaryResponse):
+    """A combined response with the usage of its call attached."""
+    tokens_input: Optional[int] = Field(0, description="Number of input tokens of the combined call")
+    tokens_output: Optional[int] = Field(0, description="Number of output tokens of the combined call")
+    tokens_cached: Optional[int] = Field(0, description="Input tokens served from a context cache (included in tokens_input)")
+    cached_latency_ms: Optional[float] = Field(None, description="Latency of the original call when the response was replayed from the response cache")
+
 class JudgeFeedback(BaseModel):
     """Validation and critique provided by the Judge Agent."""
     status: Literal["PASS", "FAIL"] = Field(..., description="Whether the summary meets all requirements")
@@ -0,0 +1,317 @@
+"""
+Long-running summarization service over the existing agents (`python -m src.service`).
+
+Prompt files, agents, the pooled client and its warm-up are set up once at startup
+and shared by every request:
+
+    POST /summarize/fast      {"text": ..., "url": ..., "title": ...}
+    POST /summarize/advanced
+    GET  /metrics
+    GET  /healthz
+
+Concurrent requests for the same strategy, URL and content share one pipeline run
+(request coalescing). Admission control bounds the runs in progress and the queue
+waiting for a slot; beyond either, requests are rejected with 503 and Retry-After.
+"""
+import time
+import asyncio
+import hashlib
+import argparse
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from pydantic import ValidationError
+from src.agents.summarizer import SummarizerAgent
+from src.agents.judge import JudgeAgent
+from src.core.backends import FakeBackend
+from src.core.cache import CACHE_MODES, get_response_cache
+from src.core.concurrency import AdaptiveConcurrencyLimiter, get_concurrency_limiter
+from src.core.hedging import LatencyHistogram
+from src.schema import RawContent
+from src.strategies import run_strategy
+from config.settings import (
+    STRATEGIES, CACHE_MODE, SERVICE_HOST, SERVICE_PORT, SERVICE_MAX_ACTIVE, SERVICE_MAX_QUEUE,
+    SERVICE_QUEUE_TIMEOUT_S, SERVICE_RETRY_AFTER_S, SERVICE_MAX_BODY_BYTES
+)
+
+
+class Overloaded(Exception):
+    """The request was not admitted: the queue is full or it waited too long for a slot."""
+
+
+class AdmissionController:
+    """
+    Bounds the requests running the pipeline (`max_active`) and the requests queued for
+    a slot (`max_queue`, served FIFO). Used as `async with admission:`; raises Overloaded.
+    """
+
+    def __init__(self, max_active: int = SERVICE_MAX_ACTIVE, max_queue: int = SERVICE_MAX_QUEUE,
+                 queue_timeout_s: float = SERVICE_QUEUE_TIMEOUT_S):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = Counter()
+        self._slots = AdaptiveConcurrencyLimiter(initial=max_active, min_limit=max_active, max_limit=max_active)
+
+    @property
+    def active(self) -> int:
+        return self._slots.in_flight
+
+    async def acquire(self):
+        if self.active + self.queued >= self.max_active + self.max_queue:
+            self.rejected["queue_full"] += 1
+            raise Overloaded(f"queue full ({self.queued} requests waiting)")
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            self.rejected["queue_timeout"] += 1
+            raise Overloaded(f"no slot within {self.queue_timeout_s:g}s")
+        finally:
+            self.queued -= 1
+        self.admitted += 1
+
+    def release(self):
+        self._slots.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+
+class RequestCoalescer:
+    """
+    Runs one call per key at a time: callers arriving while a call for their key is in
+    flight await its result (or error) instead of starting their own. A caller that goes
+    away (e.g. a client disconnect) does not cancel the shared call.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.joined = 0
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def _finished(self, key: str, task: asyncio.Future):
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # Retrieved here, so a failure nobody awaits any more is not logged as lost
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Returns (result, joined): joined is True when an in-flight call for `key` was reused.
+        """
+        task = self._in_flight.get(key)
+        joined = task is not None
+        if joined:
+            self.joined += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task), joined
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.calls + self.joined
+        return {
+            "calls": self.calls,
+            "joined": self.joined,
+            "in_flight": self.in_flight,
+            "join_rate": self.joined / requests if requests else 0.0,
+        }
+
+
+class EndpointMetrics:
+    """Latency distribution and response status counts of one endpoint."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.statuses = Counter()
+        self.coalesced = 0
+
+    def record(self, status: int, latency_ms: float, coalesced: bool = False):
+        self.latency.record(latency_ms)
+        self.statuses[status] += 1
+        self.coalesced += int(coalesced)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.latency.count,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "coalesced": self.coalesced,
+            "latency_ms": {f"p{p}": self.latency.percentile(p) for p in (50, 95, 99)},
+        }
+
+
+class SummarizationService:
+    """
+    Transport-independent request handling: validation, coalescing, admission control,
+    the strategy pipeline and per-endpoint metrics (see `create_app` for the HTTP layer).
+    """
+
+    def __init__(self, summarizer: SummarizerAgent, judge: JudgeAgent,
+                 admission: Optional[AdmissionController] = None):
+        self.summarizer = summarizer
+        self.judge = judge
+        self.admission = admission or AdmissionController()
+        self.coalescer = RequestCoalescer()
+        self.metrics = {strategy: EndpointMetrics() for strategy in STRATEGIES}
+        self.started_at = time.monotonic()
+
+    async def start(self):
+        """Opens pooled connections before the first request (agents share one client)."""
+        try:
+            await self.summarizer.agent.backend.warm_up(self.summarizer.agent.model_name)
+        except Exception as e:
+            print(f"Warm-up failed (continuing with cold connections): {e}")
+
+    @staticmethod
+    def coalescing_key(strategy: str, content: RawContent) -> str:
+        digest = hashlib.sha256(content.text.encode("utf-8")).hexdigest()
+        return f"{strategy}:{content.url}:{digest}"
+
+    async def _run(self, strategy: str, content: RawContent) -> Dict[str, Any]:
+        async with self.admission:
+            try:
+                summary, feedback, judging = await run_strategy(content, strategy, self.summarizer, self.judge)
+            finally:
+                await self.summarizer.release_document(content)
+        result = {"strategy": strategy, "summary": summary.model_dump(mode="json")}
+        if strategy == "advanced":
+            result["judge"] = feedback.model_dump(mode="json")
+            result["judge_llm_calls"] = judging["llm_calls"]
+        return result
+
+    async def summarize(self, strategy: str, content: RawContent) -> Tuple[Dict[str, Any], bool]:
+        """Runs (or joins an identical in-flight run of) one strategy; returns (result, coalesced)."""
+        key = self.coalescing_key(strategy, content)
+        return await self.coalescer.run(key, lambda: self._run(strategy, content))
+
+    async def handle(self, strategy: str, payload: Any) -> Tuple[int, Dict[str, Any]]:
+        """
+        Handles one summarization request.
+
+        Args:
+            strategy: "fast" or "advanced".
+            payload: Decoded JSON body: {"text": ..., "url": optional, "title": optional}.
+
+        Returns:
+            (HTTP status, JSON-serializable body).
+        """
+        if strategy not in self.metrics:
+            return 404, {"error": f"Unknown strategy '{strategy}'. Expected one of {STRATEGIES}."}
+        start = time.perf_counter()
+        coalesced = False
+        try:
+            content = RawContent(
+                url=payload.get("url"),
+                text=payload["text"],
+                metadata={"title": payload.get("title", "N/A")},
+            )
+        except (AttributeError, KeyError, TypeError, ValidationError) as e:
+            status, body = 400, {"error": f"Invalid request body: {e}"}
+        else:
+            try:
+                result, coalesced = await self.summarize(strategy, content)
+                status, body = 200, dict(result, coalesced=coalesced)
+            except Overloaded as e:
+                status, body = 503, {"error": f"Overloaded: {e}"}
+            except Exception as e:
+                print(f"Error in service request ({strategy}): {e}")
+                status, body = 500, {"error": str(e)}
+        self.metrics[strategy].record(status, (time.perf_counter() - start) * 1000, coalesced)
+        return status, body
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        cache = get_response_cache()
+        return {
+            "uptime_s": round(time.monotonic() - self.started_at, 1),
+            "endpoints": {f"/summarize/{strategy}": metrics.snapshot() for strategy, metrics in self.metrics.items()},
+            "coalescing": self.coalescer.stats(),
+            "admission": self.admission.stats(),
+            "concurrency": get_concurrency_limiter().stats(),
+            "response_cache": {"mode": cache.mode, "hits": cache.hits, "misses": cache.misses},
+        }
+
+
+def create_app(service: SummarizationService):
+    """Builds the aiohttp application serving `service`."""
+    from aiohttp import web
+
+    async def summarize(request):
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.json_response({"error": "Request body must be JSON"}, status=400)
+        status, body = await service.handle(request.match_info["strategy"], payload)
+        headers = {"Retry-After": str(SERVICE_RETRY_AFTER_S)} if status == 503 else None
+        return web.json_response(body, status=status, headers=headers)
+
+    async def metrics(request):
+        return web.json_response(service.metrics_snapshot())
+
+    async def healthz(request):
+        return web.json_response({"status": "ok"})
+
+    async def on_startup(app):
+        await service.start()
+
+    app = web.Application(client_max_size=SERVICE_MAX_BODY_BYTES)
+    app.router.add_post("/summarize/{strategy}", summarize)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/healthz", healthz)
+    app.on_startup.append(on_startup)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarization HTTP service (fast / advanced strategies)")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--cache", choices=CACHE_MODES, default=CACHE_MODE, help="LLM response cache mode")
+    parser.add_argument("--max-active", type=int, default=SERVICE_MAX_ACTIVE,
+                        help="Requests running the pipeline at once")
+    parser.add_argument("--max-queue", type=int, default=SERVICE_MAX_QUEUE,
+                        help="Requests allowed to wait for a slot before new ones get 503")
+    parser.add_argument("--fake", action="store_true", help="Serve from the offline fake backend (no API key needed)")
+    parser.add_argument("--fake-latency-ms", type=float, default=800.0, help="Fake backend: median call latency")
+    args = parser.parse_args()
+
+    from aiohttp import web
+
+    get_response_cache().mode = args.cache
+    backend = FakeBackend(latency_ms=args.fake_latency_ms) if args.fake else None
+    try:
+        summarizer = SummarizerAgent(backend=backend)
+        judge = JudgeAgent(backend=summarizer.agent.backend)
+    except Exception as e:
+        print(f"Error initializing agents: {e}")
+        return
+
+    service = SummarizationService(summarizer, judge, AdmissionController(args.max_active, args.max_queue))
+    print(f"Serving fast/advanced summaries on http://{args.host}:{args.port} "
+          f"(max {args.max_active} active, {args.max_queue} queued; cache {args.cache})")
+    web.run_app(create_app(service), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
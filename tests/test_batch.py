@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+import tempfile
+import contextlib
+import io
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.agents.summarizer import SummarizerAgent
+from src.agents.judge import JudgeAgent
+from src.core.backends import FakeBackend
+from src.core.batch import LocalBatchBackend, run_batch_round
+from src.core.cache import ResponseCache
+from src.schema import RawContent, SummaryOutput, JudgeFeedback
+
+class TestBatchRound(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.fake = FakeBackend(latency_ms=1, judge_pass_rate=1.0)
+        self.batch = LocalBatchBackend(self.fake, root=os.path.join(self.tmp.name, "local"))
+
+    def _agent(self, agent_cls):
+        agent = agent_cls(backend=self.fake)
+        agent.agent.cache = ResponseCache(cache_dir=os.path.join(self.tmp.name, "cache"))
+        return agent
+
+    async def _round(self, agent, prompts, name):
+        return await run_batch_round(agent, prompts, self.batch, name, job_dir=self.tmp.name, poll_interval=0.01)
+
+    async def test_summaries_then_judge(self):
+        summarizer = self._agent(SummarizerAgent)
+        judge = self._agent(JudgeAgent)
+        contents = [RawContent(url=f"http://test.com/{i}", text=f"page {i} " * 50, metadata={}) for i in range(5)]
+
+        summaries = await self._round(summarizer.agent, {
+            str(i): summarizer._summary_prompt(content, "advanced") for i, content in enumerate(contents)
+        }, "summarize")
+        self.assertEqual(sorted(summaries), [str(i) for i in range(5)])
+        self.assertTrue(all(isinstance(s, SummaryOutput) and s.tokens_input > 0 for s in summaries.values()))
+
+        verdicts = await self._round(judge.agent, {
+            key: judge._evaluate_prompt(summary) for key, summary in summaries.items()
+        }, "judge")
+        self.assertTrue(all(isinstance(v, JudgeFeedback) and v.status == "PASS" for v in verdicts.values()))
+        self.assertEqual(self.fake.calls, 10)
+
+    async def test_judge_round_reattaches_after_crash(self):
+        summarizer = self._agent(SummarizerAgent)
+        judge = self._agent(JudgeAgent)
+        contents = [RawContent(url=f"http://test.com/{i}", text=f"page {i} " * 50, metadata={}) for i in range(3)]
+        summaries = await self._round(summarizer.agent, {
+            str(i): summarizer._summary_prompt(content, "advanced") for i, content in enumerate(contents)
+        }, "summarize")
+
+        submitted = []
+        submit, results = self.batch.submit, self.batch.results
+
+        async def counting_submit(*args):
+            submitted.append(args)
+            return await submit(*args)
+
+        async def crash(job_id):
+            raise RuntimeError("process killed")
+
+        self.batch.submit, self.batch.results = counting_submit, crash
+        for summary in summaries.values():
+            summary.latency_ms = 1234.5
+        with self.assertRaises(RuntimeError):
+            await self._round(judge.agent, {key: judge._evaluate_prompt(s) for key, s in summaries.items()}, "judge")
+
+        # The rerun measures different latencies, but builds the same job file
+        self.batch.results = results
+        for summary in summaries.values():
+            summary.latency_ms = 987.6
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            verdicts = await self._round(judge.agent, {key: judge._evaluate_prompt(s) for key, s in summaries.items()},
+                                         "judge")
+        self.assertIn("re-attaching", output.getvalue())
+        self.assertEqual(len(submitted), 1)
+        self.assertEqual(self.fake.calls, 6)
+        self.assertTrue(all(isinstance(v, JudgeFeedback) for v in verdicts.values()))
+
+    async def test_cached_and_failed_requests(self):
+        summarizer = self._agent(SummarizerAgent)
+        prompts = {"a": "Strategy: FAST\nContent: alpha beta gamma"}
+        await self._round(summarizer.agent, prompts, "summarize")
+        # Served from the response cache: nothing is submitted
+        again = await self._round(summarizer.agent, prompts, "summarize")
+        self.assertEqual(self.fake.calls, 1)
+        self.assertIsInstance(again["a"], SummaryOutput)
+
+        # Per-request errors come back as exceptions without failing the job
+        self.fake.rate_limit_rate = 1.0
+        outputs = await self._round(summarizer.agent, {"b": "Strategy: FAST\nContent: delta"}, "summarize")
+        self.assertIsInstance(outputs["b"], Exception)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+import contextlib
+import io
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.agents.judge import JudgeAgent
+from src.agents.summarizer import SummarizerAgent
+from src.benchmark import process_sample
+from src.core.backends import FakeBackend
+from src.core.cache import ResponseCache
+from src.core.concurrency import AdaptiveConcurrencyLimiter
+from src.core.llm_client import LlmAgent, RateLimiter
+from src.schema import JudgeFeedback, RawContent
+
+
+class TestAdaptiveConcurrency(unittest.IsolatedAsyncioTestCase):
+    async def test_bounds_in_flight_and_serves_fifo(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=2, min_limit=2, max_limit=2)
+        order, peak = [], 0
+
+        async def call(i):
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                order.append(i)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call(i) for i in range(6)))
+        self.assertEqual(peak, 2)
+        self.assertEqual(order, list(range(6)))
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_cancelled_waiter_does_not_leak_a_slot(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=1, min_limit=1, max_limit=1)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        limiter.release()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_additive_increase_when_saturated(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=10, min_limit=1, max_limit=100)
+        limiter.in_flight = 10
+        for _ in range(100):
+            limiter.on_success(100.0)
+        self.assertGreater(limiter.limit, 15)
+        idle = AdaptiveConcurrencyLimiter(initial=10, min_limit=1, max_limit=100)
+        for _ in range(100):
+            idle.on_success(100.0)
+        self.assertEqual(idle.limit, 10)  # Unused headroom does not grow
+
+    def test_multiplicative_decrease(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=40, min_limit=4, max_limit=100, backoff=0.5)
+        limiter.on_rate_limit()
+        limiter.on_rate_limit()  # Same congestion window: ignored
+        self.assertEqual(limiter.limit, 20)
+        self.assertEqual(limiter.decreases["rate_limit"], 1)
+
+        inflated = AdaptiveConcurrencyLimiter(initial=40, min_limit=4, max_limit=100, latency_tolerance=1.5)
+        for _ in range(50):
+            inflated.on_success(100.0)
+        inflated._last_decrease = float("-inf")
+        for _ in range(30):
+            inflated.on_success(400.0)
+        self.assertLess(inflated.limit, 40)
+        self.assertGreater(inflated.decreases["latency"], 0)
+
+    def test_fixed_limit_ignores_feedback(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=8, min_limit=8, max_limit=8)
+        limiter.on_rate_limit()
+        limiter.in_flight = 8
+        limiter.on_success(10.0)
+        self.assertEqual(limiter.limit, 8)
+
+    async def test_agent_feeds_limiter(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=4, min_limit=1, max_limit=50)
+        backend = FakeBackend(latency_ms=5, latency_sigma=0, rate_limit_rate=0.0)
+        agent = LlmAgent(output_type=JudgeFeedback, backend=backend, concurrency=limiter,
+                         rate_limiter=RateLimiter(max_rpm=10**6, max_tpm=10**9), cache=ResponseCache(mode="bypass"))
+        await asyncio.gather(*(agent.async_run(f"Summary Content:\n{i}") for i in range(40)))
+        self.assertGreater(limiter.limit, 4)
+        self.assertEqual(limiter.in_flight, 0)
+
+class RecordingBackend(FakeBackend):
+    """FakeBackend that records the peak number of calls in flight and each call's time span."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.active = 0
+        self.peak = 0
+        self.spans = []
+
+    async def agenerate(self, model, system_prompt, output_type, prompt, cached_content=None):
+        kind = "judge" if output_type is JudgeFeedback else ("advanced" if "Strategy: ADVANCED" in prompt else "fast")
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        start = time.perf_counter()
+        try:
+            return await super().agenerate(model, system_prompt, output_type, prompt, cached_content)
+        finally:
+            self.active -= 1
+            self.spans.append((kind, start, time.perf_counter()))
+
+
+class TestSampleConcurrency(unittest.IsolatedAsyncioTestCase):
+    def _agents(self, backend, limit):
+        summarizer, judge = SummarizerAgent(backend=backend), JudgeAgent(backend=backend)
+        limiter = AdaptiveConcurrencyLimiter(initial=limit, min_limit=limit, max_limit=limit)
+        rate_limiter = RateLimiter(max_rpm=10**6, max_tpm=10**9)
+        for agent in (summarizer.agent, judge.agent):
+            agent.cache = ResponseCache(mode="bypass")
+            agent.concurrency = limiter
+            agent.rate_limiter = rate_limiter
+        return summarizer, judge
+
+    async def _run(self, backend, limit, samples):
+        summarizer, judge = self._agents(backend, limit)
+        contents = [RawContent(url=f"https://example.com/{i}", text=f"page {i} " * 100) for i in range(samples)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            return await asyncio.gather(*(
+                process_sample(i, content, summarizer, judge, ["fast", "advanced"], None)
+                for i, content in enumerate(contents)
+            ))
+
+    async def test_strategies_of_a_sample_overlap(self):
+        backend = RecordingBackend(latency_ms=50, latency_sigma=0, judge_pass_rate=1.0)
+        results = await self._run(backend, limit=10, samples=1)
+        self.assertEqual(sorted(row["strategy"] for row in results[0]), ["advanced", "fast"])
+        spans = {kind: (start, end) for kind, start, end in backend.spans}
+        self.assertEqual(set(spans), {"fast", "advanced", "judge"})
+        # Fast and advanced summaries are in flight at the same time, not one after the other
+        self.assertLess(max(spans["fast"][0], spans["advanced"][0]), min(spans["fast"][1], spans["advanced"][1]))
+        self.assertEqual(backend.peak, 2)
+
+    async def test_global_call_limit_is_respected(self):
+        backend = RecordingBackend(latency_ms=20, latency_sigma=0, judge_pass_rate=0.0)
+        results = await self._run(backend, limit=3, samples=6)
+        self.assertEqual(sum(len(rows) for rows in results), 12)
+        self.assertEqual(backend.peak, 3)  # Saturated, never exceeded
+        # 6 fast + 6 advanced + 6 judge + 6 refine + 6 rejudge
+        self.assertEqual(len(backend.spans), 30)
+
+if __name__ == "__main__":
+    unittest.main()
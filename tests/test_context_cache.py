@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.agents.summarizer import SummarizerAgent
+from src.core.backends import FakeBackend
+from src.core.cache import ResponseCache
+from src.core.context_cache import ContextCacheManager
+from src.core.llm_client import RateLimiter
+from src.metrics import cost_usd
+from src.schema import JudgeFeedback, RawContent
+
+
+def make_summarizer(backend, context_cache=None):
+    summarizer = SummarizerAgent(backend=backend)
+    summarizer.agent.cache = ResponseCache(mode="bypass")
+    summarizer.agent.rate_limiter = RateLimiter(max_rpm=10**6, max_tpm=10**9)
+    summarizer.agent.context_cache = context_cache
+    return summarizer
+
+
+def make_content():
+    text = "\n\n".join(f"Paragraph {i} about search latency and crawler pricing." * 5 for i in range(40))
+    return RawContent(url="https://example.com/page", text=text, metadata={"title": "Example"})
+
+
+class TestContextCache(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_lookups_create_one_cache(self):
+        backend = FakeBackend(latency_ms=1, latency_sigma=0)
+        manager = ContextCacheManager(backend, ttl_s=60)
+        names = await asyncio.gather(*(manager.lookup("m", "system", "document") for _ in range(5)))
+        self.assertEqual(len(set(names)), 1)
+        self.assertEqual((backend.cache_creations, manager.created, manager.reused), (1, 1, 4))
+
+        await manager.release("m", "system", "document")
+        self.assertEqual(backend.context_caches, {})
+        await manager.release("m", "system", "document")  # Already released: no-op
+        self.assertEqual(manager.deleted, 1)
+
+    async def test_small_prefixes_and_expiry(self):
+        backend = FakeBackend(latency_ms=1, latency_sigma=0, cache_min_tokens=100)
+        manager = ContextCacheManager(backend, ttl_s=60, refresh_margin_s=10)
+        self.assertIsNone(await manager.lookup("m", "system", "short"))
+        self.assertEqual(manager.skipped, 1)
+
+        first = await manager.lookup("m", "system", "x" * 1000)
+        next(iter(manager._entries.values()))["expires_at"] -= 55  # Now within the refresh margin
+        second = await manager.lookup("m", "system", "x" * 1000)
+        self.assertNotEqual(first, second)
+        await manager.close()
+        self.assertEqual(list(backend.context_caches), [first])  # Retired cache is left to expire
+
+    async def test_strategies_and_refine_share_the_document_cache(self):
+        content = make_content()
+        feedback = JudgeFeedback(status="FAIL", score_accuracy=0.4, critique="Too short.")
+
+        async def run(context_cache):
+            backend = FakeBackend(latency_ms=1, latency_sigma=0, prefill_ms_per_1k_tokens=200)
+            summarizer = make_summarizer(backend, ContextCacheManager(backend) if context_cache else None)
+            summaries = await asyncio.gather(
+                summarizer.async_summarize(content, "fast"), summarizer.async_summarize(content, "advanced")
+            )
+            summaries.append(await summarizer.async_refine_summary(content, "advanced", feedback, summaries[1].content))
+            await summarizer.release_document(content)
+            return backend, summaries
+
+        backend, cached = await run(context_cache=True)
+        self.assertEqual(backend.cache_creations, 1)
+        self.assertEqual(backend.context_caches, {})
+        self.assertTrue(all(s.tokens_cached > 0 for s in cached))
+
+        _, inline = await run(context_cache=False)
+        self.assertEqual([s.tokens_input for s in cached], [s.tokens_input for s in inline])
+        self.assertTrue(all(s.tokens_cached == 0 for s in inline))
+        self.assertLess(sum(s.latency_ms for s in cached), sum(s.latency_ms for s in inline))
+        billed = lambda rows: sum(cost_usd(s.tokens_input, s.tokens_output, tokens_cached=s.tokens_cached) for s in rows)
+        self.assertLess(billed(cached), billed(inline))
+
+    async def test_vanished_cache_falls_back_to_inline_prompt(self):
+        backend = FakeBackend(latency_ms=1, latency_sigma=0)
+        manager = ContextCacheManager(backend)
+        summarizer = make_summarizer(backend, manager)
+        content = make_content()
+        await manager.lookup(summarizer.agent.model_name, summarizer.agent.system_prompt,
+                             summarizer._document_prefix(content))
+        backend.context_caches.clear()  # Expired server-side
+
+        summary = await summarizer.async_summarize(content, "fast")
+        self.assertEqual(summary.tokens_cached, 0)
+        self.assertEqual(manager._entries, {})
+
+    def test_cached_tokens_are_billed_at_the_cached_rate(self):
+        prices = {"input": 1.0, "output": 0.0, "cached_input": 0.25}
+        self.assertAlmostEqual(float(cost_usd(1_000_000, 0, prices, tokens_cached=400_000)), 0.7)
+        self.assertAlmostEqual(float(cost_usd(1_000_000, 0, {"input": 1.0, "output": 0.0}, tokens_cached=400_000)), 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+import io
+import gzip
+import json
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.data_loader import DataLoader, _JsonStream
+
+ITEMS = [
+    {"url": f"http://example.com/{i}", "title": f"T{i}", "markdown_content": f"Text {i} שלום", "summary": f"S{i}"}
+    for i in range(5)
+]
+
+class TestDataLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write(self, name, text, compress=False):
+        path = os.path.join(self.tmp.name, name)
+        if compress:
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                f.write(text)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return path
+
+    def _urls(self, path, limit=None):
+        return [str(s.url) for s in DataLoader(path).load_samples(limit=limit)]
+
+    def test_supported_shapes(self):
+        expected = [item["url"] for item in ITEMS]
+        paths = [
+            self._write("list.json", json.dumps(ITEMS)),
+            self._write("dict.json", json.dumps({"meta": {"n": [1, 2]}, "data": ITEMS, "after": 1})),
+            self._write("rows.jsonl", "\n".join(json.dumps(item) for item in ITEMS) + "\n"),
+            self._write("rows.jsonl.gz", "\n".join(json.dumps(item) for item in ITEMS), compress=True),
+            self._write("list.json.gz", json.dumps(ITEMS, indent=2), compress=True),
+        ]
+        for path in paths:
+            self.assertEqual(self._urls(path), expected, path)
+        self.assertEqual(len(self._urls(paths[1], limit=2)), 2)
+
+    def test_values_split_across_chunks(self):
+        text = json.dumps([1234567, 'a"b', {"k": [1, 2, 3]}, 98765, None])
+        stream = _JsonStream(io.StringIO(text), chunk_size=3)
+        self.assertEqual(list(stream.array_items()), [1234567, 'a"b', {"k": [1, 2, 3]}, 98765, None])
+
+if __name__ == "__main__":
+    unittest.main()
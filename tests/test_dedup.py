@@ -0,0 +1,75 @@
+import unittest
+import random
+import asyncio
+import sys
+import os
+
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.dedup import DedupIndex, SummaryReuse, canonicalize_url
+from src.metrics import dedup_savings
+
+WORDS = "search engine crawler latency summary market research report pricing cloud network growth".split()
+
+def page(seed, n=400):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+class TestDedup(unittest.TestCase):
+    def test_canonicalize_url(self):
+        self.assertEqual(
+            canonicalize_url("https://WWW.Example.com:443/a//b/?utm_source=x&id=2&gclid=y#top"),
+            canonicalize_url("http://example.com/a/b?id=2"),
+        )
+        self.assertNotEqual(canonicalize_url("https://example.com/a?id=1"), canonicalize_url("https://example.com/a?id=2"))
+
+    def test_exact_near_and_distinct(self):
+        index = DedupIndex()
+        original = page(1)
+        self.assertIsNone(index.match("https://a.com/1", original))
+        self.assertIsNone(index.match("https://a.com/2", page(2)))
+
+        self.assertEqual(index.match("https://www.a.com/1/?utm_campaign=z", "other text")[:2], ("https://a.com/1", "url"))
+        self.assertEqual(index.match("https://mirror.com/1", "  " + original.upper())[:2], ("https://a.com/1", "exact"))
+
+        words = original.split()
+        words[100] = "changed"
+        found = index.match("https://mirror.com/2", " ".join(words))
+        self.assertEqual(found[:2], ("https://a.com/1", "near"))
+        self.assertGreaterEqual(found[2], 0.85)
+
+        self.assertIsNone(index.match("https://a.com/3", page(3)))
+        self.assertEqual(index.hits, {"url": 1, "exact": 1, "near": 1})
+
+    def test_dedup_savings(self):
+        df = pd.DataFrame({
+            "url": ["a", "a", "b", "b"],
+            "strategy": ["fast", "advanced", "fast", "advanced"],
+            "cost_usd": [0.1, 0.2, 0.0, 0.0],
+            "tokens_input": [100, 200, 0, 0],
+            "tokens_output": [10, 20, 0, 0],
+            "duplicate_of": [None, None, "a", "a"],
+        })
+        savings = dedup_savings(df)
+        self.assertEqual(savings["reused_rows"], 2)
+        self.assertAlmostEqual(savings["saved_usd"], 0.3)
+        self.assertEqual(savings["saved_tokens"], 330)
+
+class TestSummaryReuse(unittest.IsolatedAsyncioTestCase):
+    async def test_duplicate_waits_for_original(self):
+        reuse = SummaryReuse()
+        reuse.expect("https://a.com/1")
+        waiter = asyncio.create_task(reuse.lookup("https://a.com/1"))
+        await asyncio.sleep(0)
+        self.assertFalse(waiter.done())
+
+        reuse.publish("https://a.com/1", [{"strategy": "fast", "summary_content": "S", "judge_status": "PASS"}])
+        rows = await waiter
+        self.assertEqual(rows["fast"]["summary_content"], "S")
+        self.assertEqual(await reuse.lookup("https://unknown.com"), {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.backends import FakeBackend
+from src.core.cache import ResponseCache
+from src.core.hedging import HedgePolicy, LatencyHistogram, format_latency_report
+from src.core.llm_client import LlmAgent, RateLimiter
+from src.schema import JudgeFeedback
+
+
+def make_agent(latencies_ms, hedge):
+    """Agent whose backend answers the n-th call after latencies_ms[n] (the last value repeats)."""
+    calls = iter(latencies_ms)
+    last = [latencies_ms[-1]]
+
+    def latency_fn(_rng):
+        last[0] = next(calls, last[0])
+        return last[0]
+
+    backend = FakeBackend(latency_fn=latency_fn)
+    agent = LlmAgent(output_type=JudgeFeedback, backend=backend, hedge=hedge,
+                     rate_limiter=RateLimiter(max_rpm=10**6, max_tpm=10**9), cache=ResponseCache(mode="bypass"))
+    for _ in range(30):
+        agent.latency.record(20.0)  # Warm history: p95 = 20ms
+    return agent, backend
+
+
+class TestHedging(unittest.IsolatedAsyncioTestCase):
+    def test_histogram_percentiles_use_recent_window(self):
+        histogram = LatencyHistogram(window=10)
+        for latency in [5000] * 10 + list(range(1, 11)):
+            histogram.record(latency)
+        self.assertEqual(histogram.percentile(50), 5)
+        self.assertEqual(histogram.percentile(100), 10)
+        self.assertEqual(histogram.count, 20)
+        self.assertEqual(sum(histogram.counts), 20)
+        self.assertTrue(format_latency_report("Judge", histogram)[0].startswith("Judge: 20 calls"))
+
+    def test_budget_caps_hedges(self):
+        policy = HedgePolicy(budget_ratio=0.1)
+        policy.calls = 25
+        self.assertTrue(policy.try_spend(100))
+        self.assertTrue(policy.try_spend(100))
+        self.assertFalse(policy.try_spend(100))
+        self.assertEqual(policy.extra_tokens, 200)
+
+    async def test_hedge_wins_over_slow_call(self):
+        hedge = HedgePolicy(budget_ratio=1.0, min_delay_ms=10)
+        agent, backend = make_agent([2000, 20], hedge)
+        start = time.perf_counter()
+        feedback = await agent.async_run("Summary Content:\nhello")
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertIn(feedback.status, ("PASS", "FAIL"))
+        self.assertEqual(backend.calls, 1)  # The slow primary was cancelled before it answered
+        self.assertEqual((hedge.hedges, hedge.wins), (1, 1))
+        await asyncio.sleep(0.01)  # Let the cancelled primary unwind
+        self.assertEqual(agent.latency.count, 31)  # The duplicate's answer, not the cancelled primary's elapsed time
+
+    async def test_duplicate_reservation_is_reconciled(self):
+        hedge = HedgePolicy(budget_ratio=1.0, min_delay_ms=10)
+        agent, _ = make_agent([2000, 20], hedge)
+        reconciled = []
+        reconcile = agent.rate_limiter.reconcile
+        agent.rate_limiter.reconcile = lambda reservation, tokens: (reconciled.append(tokens),
+                                                                    reconcile(reservation, tokens))
+        await agent.async_run("Summary Content:\nhello")
+        self.assertEqual(len(agent.rate_limiter._events), 2)  # Primary and duplicate
+        self.assertEqual(len(reconciled), 2)
+        self.assertEqual(agent.rate_limiter._tokens, sum(reconciled))  # No estimate left in the window
+
+    async def test_no_hedge_without_budget(self):
+        hedge = HedgePolicy(budget_ratio=0.0, min_delay_ms=10)
+        agent, backend = make_agent([200], hedge)
+        await agent.async_run("Summary Content:\nhello")
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(hedge.hedges, 0)
+
+    async def test_fast_call_is_not_hedged(self):
+        hedge = HedgePolicy(budget_ratio=1.0, min_delay_ms=100)
+        agent, backend = make_agent([5], hedge)
+        await agent.async_run("Summary Content:\nhello")
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(hedge.calls, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.journal import ResultJournal
+
+
+def row(sample, strategy, url):
+    return {"sample": sample, "strategy": strategy, "url": url, "summary_content": f"{sample} {strategy}"}
+
+
+class TestResultJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.journal = ResultJournal(os.path.join(self.tmp.name, "journal.jsonl"))
+
+    def test_rows_are_keyed_by_sample_index(self):
+        self.journal.append([row(0, "fast", None), row(0, "advanced", None)])
+        self.journal.append([row(1, "fast", None)])  # No URL either
+        self.journal.append([row(2, "fast", "https://a.com"), row(3, "fast", "https://a.com")])  # Repeated URL
+        self.journal.append([row(1, "fast", None)])  # Journaled twice: first row wins
+
+        rows = list(self.journal.iter_results())
+        self.assertEqual([(r["sample"], r["strategy"]) for r in rows],
+                         [(0, "fast"), (0, "advanced"), (1, "fast"), (2, "fast"), (3, "fast")])
+        self.assertEqual(self.journal.completed(),
+                         {0: {"fast", "advanced"}, 1: {"fast"}, 2: {"fast"}, 3: {"fast"}})
+
+    def test_truncated_line_is_skipped_and_terminated(self):
+        self.journal.append([row(0, "fast", None)])
+        with open(self.journal.path, "a", encoding="utf-8") as f:
+            f.write('{"sample": 1, "strat')
+        resumed = ResultJournal(self.journal.path)
+        resumed.append([row(1, "fast", None)])
+        self.assertEqual(resumed.completed(), {0: {"fast"}, 1: {"fast"}})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+import io
+import re
+import time
+import asyncio
+import argparse
+import contextlib
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.benchmark import run_load_test
+from src.core.cache import get_response_cache
+from src.loadtest import LoopLagMonitor, percentile, synthetic_samples
+
+
+def load_test_args(**overrides):
+    """The arguments run_load_test reads, at the CLI defaults of an offline run."""
+    args = dict(
+        loadtest=20, seed=0, fake_latency_ms=5.0, fake_429_rate=0.0, fake_capacity=None, fake_pass_rate=0.7,
+        fake_prefill_ms=0.0, map_reduce=False, prejudge=False, prejudge_audit=0.0, hedge=False,
+        hedge_percentile=95.0, hedge_budget=0.05, context_cache=False, metrics=set(), fixed_concurrency=None,
+        generation="separate", stream=False, trace=None,
+    )
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+class TestLoadTestHelpers(unittest.IsolatedAsyncioTestCase):
+    def test_percentile_interpolates_between_ranks(self):
+        values = [40.0, 10.0, 30.0, 20.0]  # Unsorted
+        self.assertEqual(percentile(values, 0), 10.0)
+        self.assertEqual(percentile(values, 100), 40.0)
+        self.assertEqual(percentile(values, 50), 25.0)
+        self.assertAlmostEqual(percentile(values, 90), 37.0)
+        self.assertEqual(percentile([7.0], 99), 7.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_synthetic_samples_are_deterministic(self):
+        first = list(synthetic_samples(3, seed=1, min_words=10, max_words=20))
+        again = list(synthetic_samples(3, seed=1, min_words=10, max_words=20))
+        self.assertEqual([s.text for s in first], [s.text for s in again])
+        self.assertEqual([str(s.url) for s in first], [f"https://loadtest.local/page/{i}" for i in range(3)])
+        self.assertTrue(all(10 <= len(s.text.split()) <= 20 for s in first))
+        self.assertTrue(all(s.metadata["baseline_summary"] for s in first))
+
+    async def test_loop_lag_monitor_sees_a_blocked_loop(self):
+        monitor = LoopLagMonitor(interval_s=0.01)
+        monitor.start()
+        await asyncio.sleep(0.03)
+        time.sleep(0.1)  # Synchronous work stalls the timer
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+        self.assertGreaterEqual(max(monitor.lags_ms), 50)
+        self.assertIsNone(monitor._task)
+
+
+class TestRunLoadTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        cache = get_response_cache()
+        self.addCleanup(setattr, cache, "mode", cache.mode)  # The load test bypasses the shared cache
+
+    async def test_fake_backend_smoke_run_reports_throughput_and_percentiles(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+            await asyncio.wait_for(run_load_test(load_test_args()), timeout=60)
+        report = out.getvalue()
+
+        self.assertIn("Load test: 20 synthetic samples, median call latency 5.0ms", report)
+        self.assertRegex(report, r"Samples: 20 in \d+\.\ds")
+        throughput = re.search(r"Throughput: ([\d.]+) samples/s, ([\d.]+) LLM calls/s", report)
+        self.assertIsNotNone(throughput)
+        samples_per_s, calls_per_s = map(float, throughput.groups())
+        self.assertGreater(samples_per_s, 0)
+        self.assertGreater(calls_per_s, samples_per_s)  # Every sample makes several calls
+
+        p50, p95, p99 = map(int, re.search(r"Sample latency p50/p95/p99: (\d+) / (\d+) / (\d+) ms", report).groups())
+        self.assertLessEqual(p50, p95)
+        self.assertLessEqual(p95, p99)
+        self.assertRegex(report, r"Event-loop lag p50/p99/max: [\d.]+ / [\d.]+ / [\d.]+ ms")
+        calls = re.search(r"LLM calls: (\d+) \(0 injected 429s\), failed strategies: 0", report)
+        self.assertIsNotNone(calls)
+        self.assertGreaterEqual(int(calls.group(1)), 20 * 2)  # At least one summary per strategy
+
+if __name__ == "__main__":
+    unittest.main()
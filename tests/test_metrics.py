@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config.settings import WEIGHTS
+from src.metrics import quality_score, cost_usd, score_results, round_results, bootstrap_ci, aggregate
+
+class TestMetrics(unittest.TestCase):
+    def _frame(self):
+        return pd.DataFrame({
+            "strategy": ["fast", "fast", "advanced"],
+            "language": ["en", "de", "en"],
+            "latency_ms": [100.4, 200.6, None],
+            "tokens_input": [1000, 2000, 3000],
+            "tokens_output": [100, 200, None],
+            "bert_score_f1": [0.95, 0.0, 0.825],
+            "rouge_l_f1": [0.4, 0.1, 0.25],
+            "judge_score": [1.0, 0.0, 0.5],
+            "judge_status": ["PASS", "FAIL", "PASS"],
+            "char_count": [1000, 2500, 1750],
+        })
+
+    def test_vectorized_matches_scalar(self):
+        df = score_results(self._frame())
+        for _, row in df.iterrows():
+            expected = quality_score(row["bert_score_f1"], row["rouge_l_f1"], row["judge_score"], row["char_count"])
+            self.assertAlmostEqual(row["quality_score"], float(expected))
+        # Top of every range, and the neutral BERT fallback with a full length penalty
+        self.assertAlmostEqual(df["quality_score"][0], 10.0)
+        self.assertAlmostEqual(df["quality_score"][1], 1 + 0.5 * WEIGHTS["bert_score"] * 9, places=1)
+
+    def test_reweighting_and_pricing(self):
+        weights = {"bert_score": 0.0, "judge_score": 1.0, "length_compliance": 0.0, "rouge_l": 0.0}
+        df = score_results(self._frame(), weights=weights, prices={"input": 1.0, "output": 10.0})
+        self.assertEqual(list(df["quality_score"]), [10.0, 1.0, 5.5])
+        self.assertAlmostEqual(df["cost_usd"][0], cost_usd(1000, 100, {"input": 1.0, "output": 10.0}))
+        self.assertAlmostEqual(df["cost_usd"][2], 0.003)
+
+    def test_round_results_tolerates_missing_values(self):
+        df = round_results(score_results(self._frame()).assign(ttft_ms=[None, None, None]))
+        self.assertEqual(df["latency_ms"][0], 100)
+        self.assertTrue(pd.isna(df["latency_ms"][2]))
+        self.assertTrue(df["ttft_ms"].isna().all())
+
+    def test_bootstrap_and_aggregate(self):
+        low, high = bootstrap_ci([5.0] * 10, n_resamples=200)
+        self.assertEqual((low, high), (5.0, 5.0))
+        low, high = bootstrap_ci(list(range(100)), n_resamples=500)
+        self.assertLess(low, 49.5)
+        self.assertGreater(high, 49.5)
+
+        summary = aggregate(score_results(self._frame()), n_resamples=50).set_index("strategy")
+        self.assertEqual(summary.loc["fast", "samples"], 2)
+        self.assertEqual(summary.loc["fast", "judge_pass_rate"], 0.5)
+
+if __name__ == "__main__":
+    unittest.main()
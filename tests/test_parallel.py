@@ -0,0 +1,132 @@
+import unittest
+import sys
+import os
+import json
+import queue
+import threading
+import tempfile
+import argparse
+import multiprocessing as mp
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.llm_client import RateBudget, SharedRateLimiter
+from src.dedup import DedupIndex
+from src.parallel import _BudgetManager, _feed_workers, _worker_trace_path
+
+
+class TestRateBudget(unittest.IsolatedAsyncioTestCase):
+    def test_try_acquire_enforces_rpm_and_tpm(self):
+        budget = RateBudget(max_rpm=2, max_tpm=1000)
+        first, wait = budget.try_acquire(100)
+        self.assertIsNotNone(first)
+        self.assertEqual(wait, 0.0)
+        self.assertIsNotNone(budget.try_acquire(100)[0])
+        refused, wait = budget.try_acquire(100)
+        self.assertIsNone(refused)
+        self.assertGreater(wait, 0)
+
+        budget = RateBudget(max_rpm=100, max_tpm=1000)
+        reservation, _ = budget.try_acquire(900)
+        self.assertIsNone(budget.try_acquire(200)[0])
+        budget.reconcile_id(reservation, 500)  # Real usage was lower than estimated
+        self.assertIsNotNone(budget.try_acquire(200)[0])
+        budget.reconcile_id(reservation, 10)  # Already reconciled: ignored
+        self.assertEqual(budget._tokens, 700)
+
+    async def test_shared_limiter_reserves_from_budget(self):
+        budget = RateBudget(max_rpm=10, max_tpm=10_000)
+        limiter = SharedRateLimiter(budget)
+        reservations = [await limiter.acquire(100) for _ in range(3)]
+        self.assertEqual(len(set(reservations)), 3)
+        self.assertEqual(len(budget._events), 3)
+
+    def test_budget_is_shared_through_coordinator_process(self):
+        manager = _BudgetManager(ctx=mp.get_context("spawn"))
+        manager.start()
+        try:
+            budget = manager.RateBudget(2, 1000)
+            self.assertIsNotNone(budget.try_acquire(10)[0])
+            self.assertIsNotNone(budget.try_acquire(10)[0])
+            self.assertIsNone(budget.try_acquire(10)[0])
+        finally:
+            manager.shutdown()
+
+    def test_worker_trace_paths(self):
+        self.assertEqual(_worker_trace_path("results/trace.json", 2), "results/trace.worker2.json")
+
+    def test_feeder_loads_once_and_keeps_duplicates_with_their_original(self):
+        pages = [{"url": f"https://example.com/{i}", "markdown_content": f"page {i} " + "word " * i} for i in range(6)]
+        pages += [{"url": "https://example.com/0", "markdown_content": "same url"},
+                  {"url": "https://example.com/copy", "markdown_content": pages[2]["markdown_content"]}]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "data.json")
+            with open(path, "w") as f:
+                json.dump(pages, f)
+            inboxes = [queue.Queue() for _ in range(4)]
+            dedup = DedupIndex()
+            _feed_workers(argparse.Namespace(data=path, limit=None), inboxes, dedup)
+
+        dealt = []
+        for worker, inbox in enumerate(inboxes):
+            items = list(iter(inbox.get, None))
+            dealt += [(i, worker, content) for i, content in items]
+        owner = {i: worker for i, worker, _ in dealt}
+        self.assertEqual(sorted(owner), list(range(8)))
+        self.assertEqual(dedup.seen, 8)  # Read and deduplicated once, across all workers
+        self.assertEqual(owner[6], owner[0])  # Same URL
+        self.assertEqual(owner[7], owner[2])  # Exact copy
+        self.assertEqual([owner[i] for i in range(6)], [0, 1, 2, 3, 0, 1])  # Originals round-robin
+
+    def _write_pages(self, tmp, count):
+        path = os.path.join(tmp, "data.json")
+        with open(path, "w") as f:
+            json.dump([{"url": f"https://example.com/{i}", "markdown_content": f"page {i}"} for i in range(count)], f)
+        return path
+
+    def _drain(self, inbox, into):
+        thread = threading.Thread(target=lambda: into.extend(iter(inbox.get, None)), daemon=True)
+        thread.start()
+        return thread
+
+    def test_feeder_does_not_hang_on_a_worker_that_exits_early(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self._write_pages(tmp, 12)
+            inboxes = [queue.Queue(maxsize=1) for _ in range(3)]
+            dead = threading.Event()
+            threading.Timer(0.2, dead.set).start()  # Worker 1 never drains its inbox, then exits
+            received = {0: [], 2: []}
+            drains = [self._drain(inboxes[w], received[w]) for w in received]
+
+            feeder = threading.Thread(
+                target=_feed_workers,
+                args=(argparse.Namespace(data=path, limit=None), inboxes, None, lambda w: w != 1 or not dead.is_set()),
+                daemon=True,
+            )
+            feeder.start()
+            feeder.join(timeout=10)
+            self.assertFalse(feeder.is_alive())
+            for drain in drains:
+                drain.join(timeout=5)
+                self.assertFalse(drain.is_alive())  # Got its None sentinel
+        self.assertEqual([i for i, _ in received[0]], [0, 3, 6, 9])
+        self.assertEqual([i for i, _ in received[2]], [2, 5, 8, 11])
+        self.assertEqual(inboxes[1].get_nowait()[0], 1)  # Only what fit before it died
+
+    def test_stopped_feeder_ends_every_inbox(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self._write_pages(tmp, 12)
+            inboxes = [queue.Queue(maxsize=1) for _ in range(2)]
+            stop = threading.Event()
+            stop.set()  # The parent saw a worker die
+            received = {0: [], 1: []}
+            drains = [self._drain(inboxes[w], received[w]) for w in received]
+            _feed_workers(argparse.Namespace(data=path, limit=None), inboxes, stop=stop)
+            for drain in drains:
+                drain.join(timeout=5)
+                self.assertFalse(drain.is_alive())
+        self.assertEqual(received, {0: [], 1: []})
+
+if __name__ == "__main__":
+    unittest.main()
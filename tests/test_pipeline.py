@@ -8,6 +8,9 @@ import os
 sys.path.append(os.getcwd())
 
 from src.agents.summarizer import SummarizerAgent
+from src.agents.judge import JudgeAgent
+from src.core.backends import FakeBackend
+from src.core.cache import ResponseCache
 from src.schema import RawContent, SummaryOutput, JudgeFeedback
 
 class TestPipeline(unittest.IsolatedAsyncioTestCase):
@@ -15,7 +18,7 @@ class TestPipeline(unittest.IsolatedAsyncioTestCase):
         # Mocking
         mock_agent = AsyncMock()
         
-        summarizer = SummarizerAgent()
+        summarizer = SummarizerAgent(backend=FakeBackend())
         summarizer.agent = mock_agent # Inject mock
         
         content = RawContent(url="http://test.com", text="test content", metadata={})
@@ -41,5 +44,49 @@ class TestPipeline(unittest.IsolatedAsyncioTestCase):
         self.assertIn("CRITIQUE", call_args)
         self.assertIn("Too short", call_args)
 
+    async def test_offline_fake_backend(self):
+        backend = FakeBackend(latency_ms=1, judge_pass_rate=0.0)
+        summarizer = SummarizerAgent(backend=backend)
+        judge = JudgeAgent(backend=backend)
+        for agent in (summarizer.agent, judge.agent):
+            agent.cache = ResponseCache(mode="bypass")
+
+        content = RawContent(url="http://test.com", text="alpha beta gamma " * 50, metadata={})
+        summary = await summarizer.async_summarize(content, strategy="advanced")
+        feedback = await judge.async_evaluate(summary)
+
+        self.assertEqual(summary.strategy, "advanced")
+        self.assertGreater(summary.tokens_input, 0)
+        self.assertEqual(feedback.status, "FAIL")
+        self.assertEqual(backend.calls, 2)
+
+    def test_response_schemas_hold_only_generated_fields(self):
+        summarizer = SummarizerAgent(backend=FakeBackend())
+        schema = summarizer.agent.output_type.model_json_schema()
+        self.assertEqual(set(schema["properties"]), {"content", "language"})
+        combined = summarizer.combined_agent.output_type.model_json_schema()
+        self.assertEqual(set(combined["properties"]), {"fast", "advanced"})
+        # Measurements live on the result model only
+        self.assertIn("connect_ms", summarizer.agent.result_type.model_fields)
+
+    async def test_combined_generation_splits_usage(self):
+        backend = FakeBackend(latency_ms=1, latency_sigma=0)
+        summarizer = SummarizerAgent(backend=backend)
+        for agent in (summarizer.agent, summarizer.combined_agent):
+            agent.cache = ResponseCache(mode="bypass")
+
+        content = RawContent(url="http://test.com", text="alpha beta gamma " * 200, metadata={})
+        summaries = await summarizer.async_summarize_combined(content)
+        fast, advanced = summaries["fast"], summaries["advanced"]
+
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual((fast.strategy, advanced.strategy), ("fast", "advanced"))
+        self.assertEqual(fast.latency_ms, advanced.latency_ms)
+        self.assertLessEqual(abs(fast.tokens_input - advanced.tokens_input), 1)
+        self.assertGreater(advanced.tokens_output, fast.tokens_output)  # Longer summary, larger share
+
+        separate = [await summarizer.async_summarize(content, strategy) for strategy in ("fast", "advanced")]
+        self.assertLess(fast.tokens_input + advanced.tokens_input, 0.6 * sum(s.tokens_input for s in separate))
+
 if __name__ == "__main__":
     unittest.main()
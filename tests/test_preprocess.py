@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.agents.summarizer import SummarizerAgent
+from src.core.backends import FakeBackend
+from src.core.cache import ResponseCache
+from src.core.preprocess import count_tokens, strip_boilerplate, truncate_to_budget, chunk_text, split_blocks
+from src.schema import RawContent
+
+PAGE = """[Home](/) | [Products](/p) | [About](/about) | [Contact](/contact)
+Skip to content
+
+# Quarterly report
+
+Revenue grew 12% in the third quarter, driven by cloud sales. See the [full filing](https://x.com/f) for details.
+
+| Region | Growth |
+|--------|--------|
+| EU     | 10%    |
+
+## Outlook
+
+The team expects growth to continue next year.
+
+- [Twitter](https://twitter.com/x)
+- [LinkedIn](https://linkedin.com/x)
+© 2024 Example Corp. All rights reserved.
+"""
+
+class TestPreprocess(unittest.TestCase):
+    def test_token_count_is_script_aware(self):
+        latin = "a" * 400
+        self.assertEqual(count_tokens(latin), 100)
+        self.assertGreater(count_tokens("ש" * 400), count_tokens(latin))
+        self.assertGreater(count_tokens("中" * 400), count_tokens("ש" * 400))
+
+    def test_strip_boilerplate(self):
+        text = strip_boilerplate(PAGE)
+        self.assertNotIn("[Products]", text)
+        self.assertNotIn("Skip to content", text)
+        self.assertNotIn("Twitter", text)
+        self.assertNotIn("All rights reserved", text)
+        # Prose with an inline link, tables and headings survive
+        self.assertIn("See the [full filing]", text)
+        self.assertIn("| EU     | 10%    |", text)
+        self.assertIn("## Outlook", text)
+
+    def test_boilerplate_phrases_must_fill_the_line(self):
+        ui_lines = ["Accept all cookies", "Sign in", "Log in »", "Share on Facebook", "Follow us",
+                    "Copyright 2024 Example Corp", "Menu", "Back to top ↑", "We use cookies to improve your experience."]
+        content_lines = ["## Chocolate chip cookies", "Log in to your router at 192.168.0.1.",
+                         "Share this recipe with friends who love baking.", "The menu changes every season.",
+                         "Our privacy policy changed in 2023, the regulator said.", "Search traffic grew 30%."]
+        text = strip_boilerplate("\n".join(ui_lines + content_lines))
+        self.assertEqual(text.splitlines(), content_lines)
+
+    def test_truncate_on_block_boundaries(self):
+        paragraphs = [f"Paragraph {i} " + "word " * 60 for i in range(20)]
+        text = "\n\n".join(paragraphs)
+        truncated = truncate_to_budget(text, max_tokens=200)
+        self.assertLessEqual(count_tokens(truncated), 200)
+        self.assertTrue(text.startswith(truncated))
+        self.assertTrue(truncated.rstrip().endswith("word"))  # Cut between words, never mid-word
+        self.assertLess(len(truncated), len(text))
+
+        # A table that does not fit is dropped whole rather than cut mid-row
+        table = "| a | b |\n" + "| 1 | 2 |\n" * 200
+        self.assertEqual(truncate_to_budget("Intro " * 100 + "\n\n" + table, max_tokens=300), "Intro " * 100)
+
+    def test_chunks_cover_text(self):
+        text = "\n\n".join(f"## Section {i}\n\n" + f"Sentence {i}. " * 80 for i in range(6))
+        chunks = chunk_text(text, max_tokens=250)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(count_tokens(chunk) <= 250 for chunk in chunks))
+        self.assertEqual(
+            [b for chunk in chunks for b in split_blocks(chunk)],
+            split_blocks(text),
+        )
+
+class TestMapReduce(unittest.IsolatedAsyncioTestCase):
+    async def test_long_page_is_mapped_then_merged(self):
+        backend = FakeBackend(latency_ms=1)
+        summarizer = SummarizerAgent(backend=backend, map_reduce=True)
+        summarizer.agent.cache = ResponseCache(mode="bypass")
+
+        long_text = "\n\n".join("Cloud revenue report paragraph. " * 40 for _ in range(30))
+        content = RawContent(url="http://test.com", text=long_text, metadata={})
+        chunks = summarizer._map_chunks(content)
+        summary = await summarizer.async_summarize(content, strategy="fast")
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(backend.calls, len(chunks) + 1)
+        self.assertGreater(summary.tokens_input, count_tokens(chunks[0]) * len(chunks))
+
+        # Short pages take the single-call path
+        backend.calls = 0
+        await summarizer.async_summarize(RawContent(url="http://test.com", text="short page", metadata={}))
+        self.assertEqual(backend.calls, 1)
+
+if __name__ == "__main__":
+    unittest.main()
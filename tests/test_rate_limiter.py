@@ -0,0 +1,33 @@
+import unittest
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.llm_client import RateLimiter
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_rpm_waits_for_window(self):
+        limiter = RateLimiter(max_rpm=2, max_tpm=1_000, window_s=0.2)
+        start = time.monotonic()
+        await limiter.acquire(1)
+        await limiter.acquire(1)
+        await limiter.acquire(1)  # Must wait for the first request to leave the window
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    async def test_tpm_reconciles_actual_usage(self):
+        limiter = RateLimiter(max_rpm=100, max_tpm=100, window_s=0.2)
+        reservation = await limiter.acquire(90)
+        # The API reported far fewer tokens than estimated, so capacity frees up immediately
+        limiter.reconcile(reservation, 10)
+        start = time.monotonic()
+        await limiter.acquire(80)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        await limiter.acquire(50)  # 90 + 50 > 100: waits for the window to roll
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+if __name__ == "__main__":
+    unittest.main()
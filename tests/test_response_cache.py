@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+import tempfile
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.agents.judge import JudgeAgent
+from src.agents.summarizer import SummarizerAgent
+from src.core.backends import FakeBackend
+from src.core.cache import ResponseCache
+from src.core.llm_client import RateLimiter
+from src.schema import JudgeFeedback, RawContent, SummaryOutput
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_key_depends_on_schema_and_prompt(self):
+        key = ResponseCache.make_key("gemini-2.0-flash", "sys", SummaryOutput, "prompt")
+        self.assertEqual(key, ResponseCache.make_key("gemini-2.0-flash", "sys", SummaryOutput, "prompt"))
+        self.assertNotEqual(key, ResponseCache.make_key("gemini-2.0-flash", "sys", JudgeFeedback, "prompt"))
+        self.assertNotEqual(key, ResponseCache.make_key("gemini-2.0-flash", "sys", SummaryOutput, "prompt2"))
+
+    def test_modes(self):
+        cache = ResponseCache(cache_dir=self.tmp.name, mode="write-through")
+        cache.put("ab12", {"status": "PASS"}, {"prompt_token_count": 3, "candidates_token_count": 1})
+        self.assertEqual(cache.get("ab12")["data"], {"status": "PASS"})
+
+        read_only = ResponseCache(cache_dir=self.tmp.name, mode="read-only")
+        read_only.put("cd34", {"status": "FAIL"}, None)
+        self.assertIsNone(read_only.get("cd34"))
+        self.assertIsNotNone(read_only.get("ab12"))
+
+        self.assertIsNone(ResponseCache(cache_dir=self.tmp.name, mode="bypass").get("ab12"))
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(cache_dir=self.tmp.name, max_bytes=400)
+        for i in range(10):
+            key = f"{i:02d}" + "f" * 62
+            cache.put(key, {"content": "x" * 50}, None)
+            path = cache._path(key)
+            os.utime(path, (i, i))  # Deterministic recency order
+        self.assertLessEqual(cache._scan_size(), 400)
+        self.assertIsNotNone(cache.get("09" + "f" * 62))
+        self.assertIsNone(cache.get("00" + "f" * 62))
+
+    def test_rerun_is_served_from_cache_with_original_latency(self):
+        backend = FakeBackend(latency_ms=50, latency_sigma=0)
+        summarizer = SummarizerAgent(backend=backend)
+        judge = JudgeAgent(backend=backend)
+        cache = ResponseCache(cache_dir=self.tmp.name, mode="write-through")
+        for agent in (summarizer.agent, judge.agent):
+            agent.cache = cache
+            agent.rate_limiter = RateLimiter(max_rpm=10**6, max_tpm=10**9)
+        content = RawContent(url="https://example.com", text="alpha beta gamma " * 50)
+
+        async def run():
+            summary = await summarizer.async_summarize(content, "fast")
+            return summary, await judge.async_evaluate(summary)
+
+        first, first_feedback = asyncio.run(run())
+        self.assertEqual((cache.hits, cache.misses, backend.calls), (0, 2, 2))
+        second, second_feedback = asyncio.run(run())
+        # Summary and judge verdict both replayed: the judge prompt does not change between runs
+        self.assertEqual((cache.hits, cache.misses, backend.calls), (2, 2, 2))
+        self.assertEqual(second_feedback, first_feedback)
+        self.assertGreaterEqual(second.latency_ms, 50)
+        self.assertAlmostEqual(second.latency_ms, first.latency_ms, delta=20)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import tempfile
+import contextlib
+import io
+import importlib.util
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.result_store import ResultStore, reference_id
+
+
+def make_rows(samples=5):
+    rows = []
+    for i in range(samples):
+        for strategy in ("fast", "advanced"):
+            rows.append({
+                "url": f"https://example.com/{i}", "strategy": strategy, "language": "en",
+                "latency_ms": 1000.0 + i, "ttft_ms": None, "tokens_input": 1000, "tokens_output": 100,
+                "char_count": 900, "judge_status": "PASS", "judge_score": 0.9, "judge_critique": "ok",
+                "rouge_l_f1": 0.3, "bert_score_f1": 0.85, "summary_content": f"summary {i} {strategy}",
+                "baseline_summary": f"baseline {i % 2}" if i < 4 else "", "baseline_char_count": 10,
+                "connection_reused": True if i else None, "judge_llm_calls": 1, "batch": False,
+                "generation": "separate",
+                # tokens_cached, cost_usd, quality_score etc. missing, as in older journals
+            })
+    return rows
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow not installed")
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "store")
+
+    def test_rows_round_trip_with_deduplicated_references(self):
+        import pyarrow.parquet as pq
+
+        with ResultStore(self.path, batch_rows=3) as store:
+            store.append(make_rows())
+        self.assertEqual((store.rows_written, store.references_written), (10, 2))
+        self.assertEqual(pq.ParquetFile(store.results_path).num_row_groups, 4)
+
+        df = ResultStore.read(self.path)
+        self.assertEqual(len(df), 10)
+        self.assertEqual(df["baseline_summary"].iloc[2], "baseline 1")
+        self.assertTrue(df["baseline_summary"].isna().iloc[-1])  # No baseline
+        self.assertEqual(df["reference_id"].iloc[0], reference_id("baseline 0"))
+        self.assertEqual(str(df["tokens_input"].dtype), "int64")
+        self.assertTrue((df["quality_score"] > 1).all())  # Recomputed on write
+        self.assertGreater(df["cost_usd"].iloc[0], 0)
+
+        numbers = ResultStore.read(self.path, columns=["strategy", "quality_score"])
+        self.assertEqual(list(numbers.columns), ["strategy", "quality_score"])
+
+    def test_save_results_writes_store_and_exports(self):
+        from src.benchmark import save_results
+        from src.metrics import load_results
+
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        os.makedirs("results")
+        with contextlib.redirect_stdout(io.StringIO()):
+            save_results(iter(make_rows()), ["fast", "advanced"], exports={"csv", "xlsx"})
+        self.assertTrue(os.path.exists("results/store/results.parquet"))
+        self.assertTrue(os.path.exists("results/benchmark_results.xlsx"))
+        fast = load_results("results/results_fast.csv")
+        self.assertEqual(len(fast), 5)
+        self.assertEqual(fast["baseline_summary"].iloc[1], "baseline 1")
+        self.assertEqual(len(load_results("results/store")), 10)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+import time
+import random
+
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rouge_score import rouge_scorer
+from src.core.rouge import RougeLScorer, lcs_length
+from src.metrics import rescore_rouge
+
+VOCAB = (
+    "the running runs ran search searching latency crawler crawlers pricing engines indexing "
+    "results page summary generously generous it's 2024 3.5 e-mail über naïve résumé "
+    "東京 搜索引擎 поиск Größe ÉTÉ ﬁle"
+).split()
+
+
+def random_pairs(n, seed=0):
+    rng = random.Random(seed)
+    references = [" ".join(rng.choices(VOCAB, k=rng.randint(20, 120))) for _ in range(max(1, n // 10))]
+    return [(rng.choice(references), " ".join(rng.choices(VOCAB, k=rng.randint(10, 90)))) for _ in range(n)]
+
+
+class TestRougeL(unittest.TestCase):
+    def setUp(self):
+        self.reference = rouge_scorer.RougeScorer(["rougeL"], use_stemmer=True)
+        self.scorer = RougeLScorer()
+
+    def test_matches_rouge_score(self):
+        pairs = random_pairs(300) + [
+            ("", "anything"), ("anything", ""), ("!!! ???", "..."), ("same text", "same text"),
+            ("The cats were running quickly.", "A cat runs quick!"), ("東京", "東京"),
+        ]
+        for target, prediction in pairs:
+            expected = self.reference.score(target, prediction)["rougeL"]
+            self.assertEqual(tuple(self.scorer.score(target, prediction)), tuple(expected), (target, prediction))
+
+        batch = self.scorer.score_batch([t for t, _ in pairs], [p for _, p in pairs])
+        self.assertEqual(batch.shape, (len(pairs), 3))
+        self.assertEqual(batch[-3].tolist(), [1.0, 1.0, 1.0])
+
+    def test_bit_parallel_lcs(self):
+        masks, length = self.scorer._target_masks("a b c b d a b")
+        self.assertEqual(lcs_length(masks, length, ("b", "d", "c", "a", "b", "a")), 4)
+        self.assertEqual(lcs_length(masks, length, ("x", "y")), 0)
+
+    def test_rescore_results(self):
+        df = pd.DataFrame({
+            "summary_content": ["cats are running", "no reference", None],
+            "baseline_summary": ["a cat runs", None, "text"],
+            "rouge_l_f1": [0.0, 0.5, 0.5],
+        })
+        rescored = rescore_rouge(df, self.scorer)
+        expected = self.reference.score("a cat runs", "cats are running")["rougeL"].fmeasure
+        self.assertEqual(rescored["rouge_l_f1"].tolist(), [expected, 0.0, 0.0])
+
+    def test_faster_than_rouge_score(self):
+        pairs = random_pairs(300, seed=1)
+        start = time.perf_counter()
+        for target, prediction in pairs:
+            self.reference.score(target, prediction)
+        reference_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.scorer.score_batch([t for t, _ in pairs], [p for _, p in pairs])
+        native_s = time.perf_counter() - start
+        self.assertLess(native_s * 10, reference_s)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import sys
+import os
+import tempfile
+import json
+import contextlib
+import io
+import importlib.util
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.metrics import router_stats
+from src.router import (FEATURES, StrategyRouter, document_features, feature_matrix, main, paired_results,
+                        routed_rows, training_set)
+from src.schema import RawContent
+
+TABLE_PAGE = "# Prices\n\n" + "\n".join(f"| plan {i} | {i * 10} USD | {i} seats |" for i in range(30))
+PROSE_PAGE = "A short note about the weather, written in plain sentences without much structure."
+
+
+def page(i, text):
+    return RawContent(url=f"https://example.com/{i}", text=text)
+
+
+def pages(n=40):
+    # Table-heavy pages are the ones where advanced wins
+    return [page(i, TABLE_PAGE + f"\n\nrow {i}" if i % 2 else PROSE_PAGE + f" Note {i}.") for i in range(n)]
+
+
+class TestRouter(unittest.TestCase):
+    def test_document_features(self):
+        features = document_features(RawContent(text="# Title\n\n- one\n- two\n\n| a | b |\n| 1 | 2 |\n\nSee [x](https://x.y) 42."))
+        self.assertEqual(list(features), FEATURES)
+        self.assertAlmostEqual(features["heading_density"], 1 / 6)
+        self.assertAlmostEqual(features["list_ratio"], 2 / 6)
+        self.assertAlmostEqual(features["table_ratio"], 2 / 6)
+        self.assertEqual(document_features(RawContent(text="東京の天気は晴れです。"))["cjk"], 1.0)
+
+    def test_fit_route_and_persist(self):
+        contents = pages()
+        y = np.array([i % 2 for i in range(len(contents))], dtype=float)
+        router = StrategyRouter().fit(feature_matrix(contents), y)
+        self.assertEqual(router.route(page(100, TABLE_PAGE))[0], "advanced")
+        self.assertEqual(router.route(page(101, PROSE_PAGE))[0], "fast")
+
+        self.assertEqual(router.plan(page(101, PROSE_PAGE), audit_rate=0.0)[0], ["fast"])
+        self.assertEqual(router.plan(page(101, PROSE_PAGE), audit_rate=1.0)[0], ["fast", "advanced"])
+        self.assertEqual(router.plan(page(100, TABLE_PAGE), audit_rate=1.0)[0], ["advanced"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "router.json")
+            router.save(path)
+            loaded = StrategyRouter.load(path)
+            np.testing.assert_allclose(loaded.predict_proba(feature_matrix(contents)),
+                                       router.predict_proba(feature_matrix(contents)))
+            with open(path) as f:
+                data = json.load(f)
+            with open(path, "w") as f:
+                json.dump(dict(data, features=FEATURES[:-1]), f)
+            with self.assertRaises(ValueError):
+                StrategyRouter.load(path)
+
+    def test_training_set_from_result_pairs(self):
+        contents = pages(6)
+        rows = []
+        for i, content in enumerate(contents[:5]):  # Page 5 has no results, page 4 only fast
+            for strategy, quality in (("fast", 6.0), ("advanced", 6.0 + (i % 2))):
+                if i == 4 and strategy == "advanced":
+                    continue
+                rows.append({"sample": i, "url": str(content.url) if i != 1 else None, "strategy": strategy,
+                             "quality_score": quality, "latency_ms": 1000, "cost_usd": 0.001})
+        for row in rows:
+            if row["sample"] == 3:
+                row["url"] = rows[0]["url"]  # Repeats sample 0's URL
+        X, y, found = training_set(paired_results(pd.DataFrame(rows)), contents, margin=0.5)
+        self.assertEqual(X.shape, (4, len(FEATURES)))
+        self.assertEqual(y.tolist(), [0.0, 1.0, 0.0, 1.0])
+        self.assertEqual(found["sample"].tolist(), [0, 1, 2, 3])
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow not installed")
+    def test_trains_from_the_result_store_by_default(self):
+        from src.result_store import ResultStore
+
+        contents = pages()
+        rows = []
+        for i, content in enumerate(contents):
+            for strategy, quality in (("fast", 6.0), ("advanced", 6.0 + 2 * (i % 2))):
+                rows.append({"sample": i, "url": str(content.url), "strategy": strategy, "quality_score": quality,
+                             "judge_score": quality / 10, "latency_ms": 1000, "tokens_input": 100, "tokens_output": 10})
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            self.addCleanup(os.chdir, cwd)
+            with ResultStore("results/store") as store:
+                store.append(rows)
+            with open("data.json", "w") as f:
+                json.dump([{"url": str(c.url), "markdown_content": c.text} for c in contents], f)
+            argv = ["router", "--data", "data.json", "--out", "router.json"]
+            with mock.patch.object(sys, "argv", argv), contextlib.redirect_stdout(io.StringIO()) as output:
+                main()
+            self.assertIn(f"Training pages: {len(contents)}", output.getvalue())
+            self.assertTrue(os.path.exists("router.json"))
+
+    def test_router_stats_against_always_advanced(self):
+        df = pd.DataFrame([
+            # Routed to advanced
+            {"sample": 0, "url": "a", "strategy": "advanced", "route": "advanced", "quality_score": 8.0, "latency_ms": 3000, "cost_usd": 0.003},
+            # Routed to fast and audited
+            {"sample": 1, "url": "b", "strategy": "fast", "route": "fast", "quality_score": 7.0, "latency_ms": 1000, "cost_usd": 0.001},
+            {"sample": 1, "url": "b", "strategy": "advanced", "route": "fast", "quality_score": 8.0, "latency_ms": 3000, "cost_usd": 0.003},
+            # Routed to fast only
+            {"sample": 2, "url": "c", "strategy": "fast", "route": "fast", "quality_score": 7.0, "latency_ms": 1000, "cost_usd": 0.001},
+            # Not routed (--strategy all)
+            {"sample": 3, "url": "d", "strategy": "fast", "route": None, "quality_score": 1.0, "latency_ms": 1, "cost_usd": 0.0},
+        ])
+        stats = router_stats(df)
+        self.assertEqual((stats["samples"], stats["audited"]), (3, 1))
+        self.assertAlmostEqual(stats["advanced_rate"], 1 / 3)
+        self.assertAlmostEqual(stats["latency_ms_saved"], 4000)
+        self.assertAlmostEqual(stats["latency_ms_saved_share"], 4000 / 9000)
+        self.assertAlmostEqual(stats["cost_usd_saved"], 0.004)
+        self.assertAlmostEqual(stats["quality_lost"], 2 / 3)
+        self.assertEqual(router_stats(df.drop(columns="route")), {"samples": 0})
+
+        # Pages without a URL or sharing one are still separate pages
+        df["url"] = [None, None, None, "a", "a"]
+        self.assertEqual(router_stats(df), stats)
+        held_out = paired_results(df.assign(route=None))
+        self.assertEqual(held_out["sample"].tolist(), [1])
+        routed = routed_rows(paired_results(pd.concat([df, df.assign(sample=df["sample"] + 10)])), ["fast", "fast"])
+        self.assertEqual(router_stats(routed)["samples"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
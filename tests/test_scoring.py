@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import asyncio
+import threading
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.scoring import BertScoringStage
+
+
+class StubScorer:
+    """Stands in for BERTScorer: F1 is the candidate length, batches are recorded."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.batches = []
+        self.threads = set()
+
+    def score(self, candidates, references, verbose=False):
+        self.batches.append(list(zip(candidates, references)))
+        self.threads.add(threading.current_thread().name)
+        if self.error:
+            raise self.error
+        return None, None, np.array([float(len(c)) for c in candidates])
+
+
+def stage_with(scorer, **kwargs):
+    stage = BertScoringStage(**kwargs)
+    stage._scorer = scorer  # Never loads bert_score
+    return stage
+
+
+class TestBertScoringStage(unittest.IsolatedAsyncioTestCase):
+    async def test_full_batch_is_flushed_without_waiting_for_the_timeout(self):
+        scorer = StubScorer()
+        stage = stage_with(scorer, batch_size=3, batch_timeout=30)
+        scores = await asyncio.wait_for(
+            asyncio.gather(*(stage.score("x" * n, "ref") for n in (1, 2, 3))), timeout=5
+        )
+        self.assertEqual(scores, [1.0, 2.0, 3.0])
+        self.assertEqual([len(batch) for batch in scorer.batches], [3])
+        self.assertTrue(all(name.startswith("bertscore") for name in scorer.threads))  # Off the event loop
+        await stage.close()
+
+    async def test_partial_batch_is_flushed_on_timeout(self):
+        scorer = StubScorer()
+        stage = stage_with(scorer, batch_size=10, batch_timeout=0.05)
+        scores = await asyncio.wait_for(asyncio.gather(stage.score("ab", "r"), stage.score("abc", "r")), timeout=5)
+        self.assertEqual(scores, [2.0, 3.0])
+        self.assertEqual([len(batch) for batch in scorer.batches], [2])
+
+        # The stage keeps running: a later pair starts a new batch
+        self.assertEqual(await asyncio.wait_for(stage.score("a", "r"), timeout=5), 1.0)
+        self.assertEqual([len(batch) for batch in scorer.batches], [2, 1])
+        await stage.close()
+
+    async def test_scorer_error_reaches_every_waiter(self):
+        stage = stage_with(StubScorer(error=RuntimeError("CUDA out of memory")), batch_size=3, batch_timeout=30)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(stage.score("x", "r") for _ in range(3)), return_exceptions=True), timeout=5
+        )
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(isinstance(r, RuntimeError) and "out of memory" in str(r) for r in results))
+        await stage.close()
+
+    async def test_close_flushes_pending_pairs_and_stops(self):
+        scorer = StubScorer()
+        stage = stage_with(scorer, batch_size=10, batch_timeout=30)
+        pending = [asyncio.ensure_future(stage.score("x" * n, "r")) for n in (4, 5)]
+        await asyncio.sleep(0.01)  # Both queued, waiting for the batch to fill
+        self.assertFalse(any(task.done() for task in pending))
+
+        await asyncio.wait_for(stage.close(), timeout=5)
+        self.assertEqual([task.result() for task in pending], [4.0, 5.0])
+        self.assertEqual([len(batch) for batch in scorer.batches], [2])
+        self.assertIsNone(stage._worker)
+        await stage.close()  # Idempotent
+
+if __name__ == "__main__":
+    unittest.main()
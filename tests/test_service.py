@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+import asyncio
+import importlib.util
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.agents.summarizer import SummarizerAgent
+from src.agents.judge import JudgeAgent
+from src.core.backends import FakeBackend
+from src.core.cache import ResponseCache
+from src.core.llm_client import RateLimiter
+from src.service import AdmissionController, RequestCoalescer, SummarizationService, create_app
+
+
+def make_service(latency_ms=20, admission=None):
+    backend = FakeBackend(latency_ms=latency_ms, latency_sigma=0, judge_pass_rate=1.0)
+    summarizer = SummarizerAgent(backend=backend)
+    judge = JudgeAgent(backend=backend)
+    for agent in (summarizer.agent, judge.agent):
+        agent.cache = ResponseCache(mode="bypass")
+        agent.rate_limiter = RateLimiter(max_rpm=10**6, max_tpm=10**9)
+    return SummarizationService(summarizer, judge, admission), backend
+
+
+PAGE = {"url": "https://example.com/a", "title": "A", "text": "alpha beta gamma delta " * 100}
+
+
+class TestService(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_duplicates_share_one_call(self):
+        service, backend = make_service()
+        responses = await asyncio.gather(*(service.handle("fast", PAGE) for _ in range(5)))
+        self.assertTrue(all(status == 200 for status, _ in responses))
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(sum(body["coalesced"] for _, body in responses), 4)
+        self.assertEqual(len({body["summary"]["content"] for _, body in responses}), 1)
+
+        # Different content or strategy is not coalesced; a finished call is not reused
+        await asyncio.gather(service.handle("fast", dict(PAGE, text="other page")), service.handle("advanced", PAGE))
+        await service.handle("fast", PAGE)
+        self.assertEqual(service.coalescer.stats()["calls"], 4)
+        self.assertEqual(service.coalescer.in_flight, 0)
+
+    async def test_admission_rejects_beyond_queue(self):
+        service, _ = make_service(latency_ms=100, admission=AdmissionController(max_active=1, max_queue=1))
+        pages = [dict(PAGE, text=f"page {i} " * 50) for i in range(3)]
+        statuses = sorted(status for status, _ in await asyncio.gather(*(service.handle("fast", p) for p in pages)))
+        self.assertEqual(statuses, [200, 200, 503])
+        self.assertEqual(service.admission.stats()["rejected"], {"queue_full": 1})
+
+        timed_out = AdmissionController(max_active=1, max_queue=5, queue_timeout_s=0.01)
+        async with timed_out:
+            with self.assertRaises(Exception):
+                await timed_out.acquire()
+        self.assertEqual((timed_out.active, timed_out.queued), (0, 0))
+
+    async def test_bad_requests_and_metrics(self):
+        service, _ = make_service()
+        self.assertEqual((await service.handle("fast", {"url": "https://example.com"}))[0], 400)
+        self.assertEqual((await service.handle("fast", ["not", "an", "object"]))[0], 400)
+        self.assertEqual((await service.handle("medium", PAGE))[0], 404)
+        status, body = await service.handle("advanced", PAGE)
+        self.assertEqual(status, 200)
+        self.assertEqual(body["judge"]["status"], "PASS")
+
+        metrics = service.metrics_snapshot()
+        self.assertEqual(metrics["endpoints"]["/summarize/fast"]["statuses"], {"400": 2})
+        self.assertEqual(metrics["endpoints"]["/summarize/advanced"]["requests"], 1)
+        self.assertIsNotNone(metrics["endpoints"]["/summarize/advanced"]["latency_ms"]["p50"])
+
+    async def test_failed_call_fails_every_waiter(self):
+        coalescer = RequestCoalescer()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        outcomes = await asyncio.gather(*(coalescer.run("k", fail) for _ in range(3)), return_exceptions=True)
+        self.assertTrue(all(isinstance(outcome, ValueError) for outcome in outcomes))
+        self.assertEqual((coalescer.calls, coalescer.joined), (1, 2))
+
+    @unittest.skipUnless(importlib.util.find_spec("aiohttp"), "aiohttp not installed")
+    async def test_http_endpoints(self):
+        from aiohttp.test_utils import TestClient, TestServer
+
+        service, _ = make_service()
+        async with TestClient(TestServer(create_app(service))) as client:
+            response = await client.post("/summarize/fast", json=PAGE)
+            self.assertEqual(response.status, 200)
+            self.assertIn("summary", await response.json())
+            self.assertEqual((await client.post("/summarize/fast", data="not json")).status, 400)
+            metrics = await (await client.get("/metrics")).json()
+            self.assertEqual(metrics["endpoints"]["/summarize/fast"]["statuses"], {"200": 1, "400": 1})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import sys
+import os
+import json
+import argparse
+import subprocess
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+IMPORT_BUDGET_S = 1.0  # `import src.benchmark` took ~2.3s while transformers and pandas loaded eagerly
+HEAVY_MODULES = ("transformers", "torch", "bert_score", "pandas", "tqdm", "rouge_score", "nltk", "google.genai")
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import src.benchmark
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+class TestStartup(unittest.TestCase):
+    def test_benchmark_import_is_light_and_within_budget(self):
+        # Best of a few fresh interpreters, so one slow filesystem read does not fail the budget
+        runs = []
+        for _ in range(3):
+            output = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+            runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+        self.assertEqual(runs[0]["loaded"], [])
+        self.assertLess(min(run["seconds"] for run in runs), IMPORT_BUDGET_S)
+
+    def test_help_does_not_load_heavy_dependencies(self):
+        output = subprocess.run([sys.executable, "-m", "src.benchmark", "--help"], cwd=ROOT,
+                                capture_output=True, text=True, timeout=30)
+        self.assertEqual(output.returncode, 0, output.stderr)
+        self.assertIn("--metrics", output.stdout)
+
+    def test_parse_metrics(self):
+        from src.benchmark import parse_metrics
+
+        self.assertEqual(parse_metrics("rouge,bert"), {"rouge", "bert"})
+        self.assertEqual(parse_metrics(" rouge "), {"rouge"})
+        self.assertEqual(parse_metrics("none"), set())
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_metrics("rouge,bleu")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+import json
+import random
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.agents.summarizer import SummarizerAgent
+from src.core.backends import FakeBackend
+from src.core.cache import ResponseCache
+from src.core.concurrency import AdaptiveConcurrencyLimiter
+from src.core.llm_client import RateLimiter
+from src.core.streaming import JsonStringFieldParser
+from src.schema import RawContent
+
+class TestStreaming(unittest.IsolatedAsyncioTestCase):
+    def test_field_parser_random_chunking(self):
+        content = 'Line "one"\n\\ שלום 😀\tend'
+        for ensure_ascii in (True, False):
+            doc = json.dumps({"meta": {"content": "nested"}, "x": "content", "content": content, "strategy": "fast"},
+                             ensure_ascii=ensure_ascii)
+            for seed in range(50):
+                rng = random.Random(seed)
+                parser = JsonStringFieldParser("content")
+                out, i = "", 0
+                while i < len(doc):
+                    step = rng.randint(1, 6)
+                    out += parser.feed(doc[i:i + step])
+                    i += step
+                self.assertEqual(out, content)
+                self.assertTrue(parser.done)
+
+    async def test_streamed_summary_records_ttft(self):
+        summarizer = SummarizerAgent(backend=FakeBackend(latency_ms=20, latency_sigma=0))
+        summarizer.agent.cache = ResponseCache(mode="bypass")
+        content = RawContent(url="http://test.com", text="alpha beta gamma " * 50, metadata={})
+
+        deltas = []
+        summary = await summarizer.async_summarize_stream(content, strategy="fast", on_delta=deltas.append)
+
+        self.assertGreater(len(deltas), 1)
+        self.assertEqual("".join(deltas), summary.content)
+        self.assertLess(summary.ttft_ms, summary.latency_ms)
+        self.assertGreater(summary.tokens_input, 0)
+
+    def _single_slot_summarizer(self):
+        summarizer = SummarizerAgent(backend=FakeBackend(latency_ms=20, latency_sigma=0))
+        summarizer.agent.cache = ResponseCache(mode="bypass")
+        summarizer.agent.concurrency = AdaptiveConcurrencyLimiter(initial=1, min_limit=1, max_limit=1)
+        summarizer.agent.rate_limiter = RateLimiter(max_rpm=10**6, max_tpm=10**9)
+        return summarizer
+
+    async def test_slow_consumer_does_not_hold_the_slot(self):
+        summarizer = self._single_slot_summarizer()
+        content = RawContent(url="http://test.com", text="alpha beta gamma " * 50, metadata={})
+        call = summarizer.stream_summary(content, "fast")
+        deltas = call.__aiter__()
+        received = [await deltas.__anext__()]
+
+        # The consumer pauses after its first delta; another call still gets the only slot
+        other = await asyncio.wait_for(summarizer.async_summarize(content, "advanced"), timeout=0.25)
+        self.assertTrue(other.content)
+
+        received += [delta async for delta in deltas]
+        summary = await call.result()
+        self.assertEqual("".join(received), summary.content)
+        self.assertLess(call.latency_ms, 250)  # Measured to the complete response, not the consumer's pace
+        self.assertEqual(summarizer.agent.concurrency.in_flight, 0)
+
+    async def test_closing_a_stream_releases_the_slot(self):
+        summarizer = self._single_slot_summarizer()
+        summarizer.agent.backend.latency_ms = 200
+        content = RawContent(url="http://test.com", text="alpha beta gamma " * 50, metadata={})
+        reader = asyncio.ensure_future(summarizer.stream_summary(content, "fast").result())
+        await asyncio.sleep(0.05)
+        self.assertEqual(summarizer.agent.concurrency.in_flight, 1)
+
+        reader.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reader
+        await asyncio.sleep(0)
+        self.assertEqual(summarizer.agent.concurrency.in_flight, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+import json
+import asyncio
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.tracing import Tracer
+
+
+class TestTracing(unittest.IsolatedAsyncioTestCase):
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer()
+        with tracer.span("sample") as span:
+            span.set(url="x")
+        tracer.start_span("llm.queue").end()
+        tracer.counter("event_loop_lag_ms", 1.0)
+        self.assertEqual((tracer.spans, tracer.counters), ([], []))
+
+    async def test_child_tasks_inherit_parent_and_get_own_lanes(self):
+        tracer = Tracer(enabled=True)
+
+        async def child(name):
+            with tracer.span(name):
+                await asyncio.sleep(0.01)
+
+        with tracer.span("sample", sample=0):
+            await asyncio.gather(child("fast"), child("advanced"))
+        with tracer.span("sample", sample=1):
+            pass
+
+        spans = {(s[0], s[7].get("sample")): s for s in tracer.spans}
+        root = spans[("sample", 0)]
+        fast, advanced = spans[("fast", None)], spans[("advanced", None)]
+        self.assertEqual(fast[5], root[4])       # parent span id
+        self.assertEqual(advanced[6], root[6])   # same trace id
+        self.assertNotEqual(fast[3], advanced[3])  # concurrent spans never share a lane
+        self.assertNotEqual(spans[("sample", 1)][6], root[6])  # a new root starts a new trace
+
+    async def test_export_and_breakdown(self):
+        tracer = Tracer(enabled=True)
+        for _ in range(3):
+            with tracer.span("llm.call", agent="SummaryOutput"):
+                queued = tracer.start_span("llm.queue")
+                queued.end()
+        try:
+            with tracer.span("llm.parse"):
+                raise ValueError("bad json")
+        except ValueError:
+            pass
+        tracer.counter("event_loop_lag_ms", 2.5)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace", "trace.json")
+            tracer.export(path)
+            with open(path, "r", encoding="utf-8") as f:
+                events = json.load(f)["traceEvents"]
+
+        complete = [e for e in events if e["ph"] == "X"]
+        self.assertEqual(len(complete), 7)
+        self.assertTrue(all(e["dur"] >= 0 and "span_id" in e["args"] for e in complete))
+        self.assertEqual([e["args"]["error"] for e in complete if e["name"] == "llm.parse"], ["ValueError"])
+        self.assertEqual(sum(e["ph"] == "C" for e in events), 1)
+
+        rows = {row["stage"]: row for row in tracer.stage_breakdown()}
+        self.assertEqual(rows["llm.call"]["count"], 3)
+        self.assertGreaterEqual(rows["llm.call"]["p99_ms"], rows["llm.call"]["p50_ms"])
+        self.assertIn("llm.queue", "\n".join(tracer.format_breakdown()))
+
+if __name__ == "__main__":
+    unittest.main()